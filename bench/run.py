@@ -0,0 +1,384 @@
+"""
+Нагрузочный прогон V1 API:
+  - наполняет базу книгами, издательствами и файлами через bulk-эндпоинты
+  - гоняет сценарии роутеров `book`, `publishing_house`, `book_file`
+    с заданной конкурентностью и печатает RPS и p50/p95/p99
+  - сохраняет JSON-базлайн и сравнивает с предыдущим
+
+    python bench/run.py --output bench/baseline.json
+    python bench/run.py --compare bench/baseline.json --concurrency 32
+
+Без `--url` приложение поднимается в процессе поверх ASGITransport
+на временной SQLite-базе; с `--url` нагружается уже запущенный сервер.
+"""
+
+import argparse
+import asyncio
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import AsyncIterator, Callable, NamedTuple, Optional
+
+import orjson
+from httpx import ASGITransport, AsyncClient
+
+ROOT = Path(__file__).resolve().parent.parent
+WORDS = ("river", "shadow", "engine", "garden", "harbor", "winter", "signal", "atlas")
+LANGS = ("en", "de", "fr", "uk")
+
+
+class Request(NamedTuple):
+    method: str
+    url: str
+    body: Optional[bytes] = None
+
+
+class Scenario(NamedTuple):
+    name: str
+    router: str
+    build: Callable[[random.Random, "Dataset"], Request]
+
+
+class Dataset(NamedTuple):
+    books: list[str]
+    publishing_houses: list[str]
+    files: list[str]
+
+
+class Result(NamedTuple):
+    requests: int
+    errors: int
+    elapsed: float
+    latencies: list[float]
+
+    def summary(self) -> dict[str, float]:
+        cuts = statistics.quantiles(self.latencies, n=100, method="inclusive")
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rps": round(self.requests / self.elapsed, 1),
+            "p50_ms": round(cuts[49] * 1000, 3),
+            "p95_ms": round(cuts[94] * 1000, 3),
+            "p99_ms": round(cuts[98] * 1000, 3),
+        }
+
+
+def new_book(rng: random.Random) -> bytes:
+    return orjson.dumps(
+        {
+            "title": " ".join(rng.sample(WORDS, 2)).title(),
+            "author": f"Author {rng.randrange(50)}",
+            "desc": " ".join(rng.choices(WORDS, k=12)),
+            "page_count": rng.randrange(50, 900),
+        }
+    )
+
+
+SCENARIOS = (
+    Scenario("book.list", "book", lambda rng, data: Request("GET", "/V1/book/")),
+    Scenario(
+        "book.list.expand",
+        "book",
+        lambda rng, data: Request("GET", "/V1/book/?expand=pubs.files"),
+    ),
+    Scenario(
+        "book.list.sorted",
+        "book",
+        lambda rng, data: Request(
+            "GET", f"/V1/book/?sort=-title&author=Author%20{rng.randrange(50)}"
+        ),
+    ),
+    Scenario(
+        "book.get",
+        "book",
+        lambda rng, data: Request("GET", f"/V1/book/{rng.choice(data.books)}"),
+    ),
+    Scenario(
+        "book.search",
+        "book",
+        lambda rng, data: Request("GET", f"/V1/book/search?q={rng.choice(WORDS)}"),
+    ),
+    Scenario(
+        "book.create",
+        "book",
+        lambda rng, data: Request("POST", "/V1/book/", new_book(rng)),
+    ),
+    Scenario(
+        "publishing_house.list",
+        "publishing_house",
+        lambda rng, data: Request(
+            "GET", f"/V1/publishing-house/?lang={rng.choice(LANGS)}&expand=files"
+        ),
+    ),
+    Scenario(
+        "publishing_house.get",
+        "publishing_house",
+        lambda rng, data: Request(
+            "GET", f"/V1/publishing-house/{rng.choice(data.publishing_houses)}"
+        ),
+    ),
+    Scenario(
+        "book_file.download",
+        "book_file",
+        lambda rng, data: Request(
+            "GET", f"/V1/book-file/{rng.choice(data.files)}/content"
+        ),
+    ),
+)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the V1 API.")
+    parser.add_argument("--url", help="Running server; in-process app if omitted")
+    parser.add_argument("--books", type=int, default=200)
+    parser.add_argument(
+        "--pubs", type=int, default=2, help="Publishing houses per book"
+    )
+    parser.add_argument("--files", type=int, default=20, help="Book files to upload")
+    parser.add_argument("--file-size", type=int, default=64 * 2**10)
+    parser.add_argument("--requests", type=int, default=1000, help="Per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="Per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--only", default="", help="Comma-separated routers or scenario names"
+    )
+    parser.add_argument("--output", type=Path, default=ROOT / "bench/latest.json")
+    parser.add_argument("--compare", type=Path, help="Baseline to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.15,
+        help="Allowed relative drop in RPS or growth in p95",
+    )
+    return parser.parse_args(argv)
+
+
+@asynccontextmanager
+async def in_process_client() -> AsyncIterator[AsyncClient]:
+    """
+    Приложение в процессе, настроенное как в `lifespan`:
+      - файловая SQLite с прагмами и пулом из настроек, а не `:memory:`
+      - база, хранилище и метрики всегда во временной папке, даже если
+        в окружении уже указаны другие, и папка удаляется после прогона
+      - лимит запросов снят, иначе прогон упрётся в 429
+    """
+    folder = Path(tempfile.mkdtemp(prefix="library-bench-"))
+    defaults = {
+        "DEVELOPMENT": "false",
+        "API_HOST": "127.0.0.1",
+        "API_PORT": "8000",
+        "API_WORKERS": "1",
+        "LOGGER_LEVEL": "WARNING",
+        "LOGGER_MAXBYTES": str(2**20),
+        "LOGGER_BACKUPCOUNT": "1",
+        "LOGGER_BLACKLIST": "aiosqlite",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    # Прогон пишет в базу: чужие DATABASE_* и пути из окружения не берутся.
+    for key in [key for key in os.environ if key.startswith("DATABASE_")]:
+        del os.environ[key]
+    os.environ |= {
+        "DATABASE_DRIVERNAME": "sqlite+aiosqlite",
+        "DATABASE_DATABASENAME": str(folder / "library.db"),
+        "DATABASE_REPLICAS": "[]",
+        "STORAGE_FOLDER": str(folder / "storage"),
+        "METRICS_FOLDER": str(folder / "metrics"),
+    }
+    sys.path.insert(0, str(ROOT / "src"))
+
+    from api.v1 import dependencies
+    from core.ratelimit import MemoryBackend
+    from core.setting import appSetting
+    from database.mixin import set_id_generator
+    from database.model import CoreModel
+    from database.session import SessionManager
+    from main import app
+
+    dependencies.rate_limit_backend = MemoryBackend(limit=10**9, period=60)
+    set_id_generator(appSetting.DATABASE.IDVERSION)
+    await SessionManager(
+        appSetting.DATABASE.URL,
+        pragmas=appSetting.DATABASE.PRAGMAS,
+        **appSetting.DATABASE.ENGINEOPTIONS,
+    ).init_db(CoreModel.metadata)
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            yield client
+    finally:
+        await SessionManager.close()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+async def bulk_ids(client: AsyncClient, url: str, items: list[dict]) -> list[str]:
+    ids = []
+    for start in range(0, len(items), 500):
+        response = await client.post(url, json=items[start : start + 500])
+        response.raise_for_status()
+        ids.extend(item["id"] for item in response.json()["items"] if item["id"])
+    return ids
+
+
+async def seed(client: AsyncClient, args: argparse.Namespace) -> Dataset:
+    rng = random.Random(args.seed)
+    books = await bulk_ids(
+        client,
+        "/V1/book/bulk",
+        [orjson.loads(new_book(rng)) for _ in range(args.books)],
+    )
+    publishing_houses = await bulk_ids(
+        client,
+        "/V1/publishing-house/bulk",
+        [
+            {"name": f"{rng.choice(WORDS).title()} Press", "lang": rng.choice(LANGS)}
+            | {"book_id": book_id}
+            for book_id in books
+            for _ in range(args.pubs)
+        ],
+    )
+    files = []
+    for pub_id in rng.sample(
+        publishing_houses, min(args.files, len(publishing_houses))
+    ):
+        response = await client.post(
+            f"/V1/book-file/{pub_id}",
+            files={
+                "file": ("book.pdf", rng.randbytes(args.file_size), "application/pdf")
+            },
+        )
+        response.raise_for_status()
+        files.append(response.json()["id"])
+    return Dataset(books, publishing_houses, files)
+
+
+async def drive(
+    client: AsyncClient,
+    scenario: Scenario,
+    data: Dataset,
+    total: int,
+    concurrency: int,
+    seed: int,
+) -> Result:
+    rng = random.Random(seed)
+    requests = [scenario.build(rng, data) for _ in range(total)]
+    latencies: list[float] = []
+    errors = 0
+    queue = iter(requests)
+
+    async def worker() -> None:
+        nonlocal errors
+        for request in queue:
+            start = time.perf_counter()
+            response = await client.request(
+                request.method,
+                request.url,
+                content=request.body,
+                headers={"Content-Type": "application/json"} if request.body else None,
+            )
+            await response.aread()
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return Result(total, errors, time.perf_counter() - start, latencies)
+
+
+def compare(
+    results: dict[str, dict], baseline: dict[str, dict], tolerance: float
+) -> list[str]:
+    """Сценарии, где RPS упал или p95 вырос больше чем на `tolerance`."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {previous['rps']} -> {current['rps']}")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms"
+            )
+    return regressions
+
+
+def render(results: dict[str, dict], baseline: dict[str, dict]) -> str:
+    lines = [
+        f"{'scenario':<24}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'errors':>8}{'Δ rps':>9}"
+    ]
+    for name, row in results.items():
+        previous = baseline.get(name)
+        delta = f"{(row['rps'] / previous['rps'] - 1) * 100:+.1f}%" if previous else ""
+        lines.append(
+            f"{name:<24}{row['rps']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+            f"{row['p99_ms']:>10}{row['errors']:>8}{delta:>9}"
+        )
+    return "\n".join(lines)
+
+
+async def run(args: argparse.Namespace) -> int:
+    only = {name for name in args.only.split(",") if name}
+    scenarios = [
+        scenario
+        for scenario in SCENARIOS
+        if not only or scenario.name in only or scenario.router in only
+    ]
+    baseline = (
+        orjson.loads(args.compare.read_bytes())["results"] if args.compare else {}
+    )
+
+    client_context = (
+        AsyncClient(base_url=args.url, timeout=60) if args.url else in_process_client()
+    )
+    async with client_context as client:
+        data = await seed(client, args)
+        results = {}
+        for scenario in scenarios:
+            await drive(client, scenario, data, args.warmup, args.concurrency, 0)
+            result = await drive(
+                client, scenario, data, args.requests, args.concurrency, args.seed
+            )
+            results[scenario.name] = result.summary()
+
+    print(render(results, baseline))
+    report = {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "target": args.url or "in-process",
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "books": args.books,
+            "pubs": args.pubs,
+            "files": args.files,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f"Saved {args.output}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,79 @@
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import database.search  # noqa: F401 — DDL полнотекстового поиска
+import database.summary  # noqa: F401 — триггеры счётчиков книг
+import database.version  # noqa: F401 — триггеры версий списков
+from core.setting import appSetting
+from database.model import CoreModel
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get(
+    "configure_logger", True
+):
+    fileConfig(config.config_file_name)
+
+target_metadata = CoreModel.metadata
+
+
+def get_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or (
+        appSetting.DATABASE.URL.render_as_string(hide_password=False)
+    )
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """
+    Что сравнивает autogenerate:
+      - таблицы поиска (`book_search*`) создаются DDL-событиями, а не моделями
+    """
+    return not (type_ == "table" and name.startswith("book_search"))
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
+        render_as_batch=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite не умеет ALTER большей части DDL — пересоздаём таблицу.
+        render_as_batch=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    engine = create_async_engine(get_url())
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+def run_migrations_online() -> None:
+    asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,47 @@
+"""Индексы для фильтров и сортировок списков
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("ix_book_created_at_id", "book", ["created_at", "id"]),
+    ("ix_book_updated_at_id", "book", ["updated_at", "id"]),
+    ("ix_book_title_id", "book", ["title", "id"]),
+    ("ix_book_author_created_at_id", "book", ["author", "created_at", "id"]),
+    ("ix_book_page_count", "book", ["page_count"]),
+    ("ix_publishing_house_created_at_id", "publishing_house", ["created_at", "id"]),
+    ("ix_publishing_house_updated_at_id", "publishing_house", ["updated_at", "id"]),
+    ("ix_publishing_house_name_id", "publishing_house", ["name", "id"]),
+    ("ix_publishing_house_book_id", "publishing_house", ["book_id"]),
+    (
+        "ix_publishing_house_lang_created_at_id",
+        "publishing_house",
+        ["lang", "created_at", "id"],
+    ),
+    ("ix_book_file_pub_id_file_type", "book_file", ["pub_id", "file_type"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,157 @@
+"""Убрать лишний UNIQUE с первичных ключей
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("book_file", "publishing_house", "book")
+
+# SQLite хранит `UNIQUE (id)` без имени — даём его на время batch-операции.
+NAMING_CONVENTION = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+
+# Поиск SQLite на момент ревизии: FTS5-таблица с rowid книги.
+SEARCH_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS book_search USING fts5(
+        title, author, "desc", pubs, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_insert AFTER INSERT ON book BEGIN
+        INSERT INTO book_search (rowid, title, author, "desc", pubs)
+        VALUES (new.rowid, new.title, new.author, coalesce(new."desc", ''), '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_update
+    AFTER UPDATE OF title, author, "desc" ON book BEGIN
+        UPDATE book_search
+        SET title = new.title, author = new.author, "desc" = coalesce(new."desc", '')
+        WHERE rowid = new.rowid;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_delete AFTER DELETE ON book BEGIN
+        DELETE FROM book_search WHERE rowid = old.rowid;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_pub_insert
+    AFTER INSERT ON publishing_house BEGIN
+        UPDATE book_search SET pubs = (
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = new.book_id
+        ) WHERE rowid = (SELECT rowid FROM book WHERE id = new.book_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_pub_update
+    AFTER UPDATE OF name, book_id ON publishing_house BEGIN
+        UPDATE book_search SET pubs = coalesce((
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = old.book_id
+        ), '') WHERE rowid = (SELECT rowid FROM book WHERE id = old.book_id);
+        UPDATE book_search SET pubs = (
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = new.book_id
+        ) WHERE rowid = (SELECT rowid FROM book WHERE id = new.book_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_pub_delete
+    AFTER DELETE ON publishing_house BEGIN
+        UPDATE book_search SET pubs = coalesce((
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = old.book_id
+        ), '') WHERE rowid = (SELECT rowid FROM book WHERE id = old.book_id);
+    END
+    """,
+    """
+    INSERT INTO book_search (rowid, title, author, "desc", pubs)
+    SELECT book.rowid, title, author, coalesce("desc", ''), coalesce((
+        SELECT group_concat(name, ' ') FROM publishing_house
+        WHERE book_id = book.id
+    ), '')
+    FROM book WHERE book.rowid NOT IN (SELECT rowid FROM book_search)
+    """,
+)
+
+
+def sqlite_rebuild(table: str, upgrade: bool) -> None:
+    """
+    SQLite меняет ограничения только пересозданием таблицы:
+      - данные, индексы и внешние ключи копируются batch-режимом Alembic
+      - миграции идут без `PRAGMA foreign_keys`, иначе DROP родителя удалит детей
+    """
+    with op.batch_alter_table(
+        table, recreate="always", naming_convention=NAMING_CONVENTION
+    ) as batch:
+        if upgrade:
+            batch.drop_constraint(f"uq_{table}_id", type_="unique")
+        else:
+            batch.create_unique_constraint(f"uq_{table}_id", ["id"])
+
+
+def postgres_rebuild(table: str, upgrade: bool) -> None:
+    """Внешние ключи могут опираться на UNIQUE, поэтому пересоздаются вокруг него."""
+    inspector = sa.inspect(op.get_bind())
+    references = [
+        (child, fk)
+        for child in TABLES
+        for fk in inspector.get_foreign_keys(child)
+        if fk["referred_table"] == table
+    ]
+    for child, fk in references:
+        op.drop_constraint(fk["name"], child, type_="foreignkey")
+    if upgrade:
+        op.drop_constraint(f"{table}_id_key", table, type_="unique")
+    else:
+        op.create_unique_constraint(f"{table}_id_key", table, ["id"])
+    for child, fk in references:
+        op.create_foreign_key(
+            fk["name"],
+            child,
+            table,
+            fk["constrained_columns"],
+            fk["referred_columns"],
+            **fk["options"],
+        )
+
+
+def rebuild(upgrade: bool) -> None:
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        if dialect == "sqlite":
+            sqlite_rebuild(table, upgrade)
+        else:
+            postgres_rebuild(table, upgrade)
+
+    if dialect == "sqlite":
+        # Триггеры поиска удалены вместе со старыми таблицами, а индекс
+        # FTS5 ссылается на rowid книг, которые при копировании сменились.
+        op.execute("DROP TABLE IF EXISTS book_search")
+        for statement in SEARCH_DDL:
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rebuild(upgrade=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    rebuild(upgrade=False)
@@ -0,0 +1,82 @@
+"""Фоновая обработка файлов книг
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from database.mixin import new_id, utcnow
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    # Сумма контентно-адресуемого хранилища: модель её уже пишет и читает.
+    ("sha256", sa.String(64)),
+    ("mime_type", sa.String(100)),
+    ("page_count", sa.Integer()),
+    ("cover_path", sa.String(1024)),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, type_ in COLUMNS:
+        op.add_column("book_file", sa.Column(name, type_, nullable=True))
+
+    job = op.create_table(
+        "book_file_job",
+        sa.Column("id", sa.UUID(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("run_after", sa.DateTime(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column(
+            "book_file_id",
+            sa.UUID(),
+            sa.ForeignKey("book_file.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_book_file_job_status_run_after", "book_file_job", ["status", "run_after"]
+    )
+    op.create_index("ix_book_file_job_book_file_id", "book_file_job", ["book_file_id"])
+
+    # Уже загруженные файлы ставятся в очередь наравне с новыми.
+    book_file = sa.table("book_file", sa.column("id", sa.UUID()))
+    now = utcnow()
+    rows = [
+        {
+            "id": new_id(),
+            "created_at": now,
+            "updated_at": now,
+            "status": "pending",
+            "attempts": 0,
+            "run_after": now,
+            "book_file_id": id,
+        }
+        for id in op.get_bind().scalars(sa.select(book_file.c.id))
+    ]
+    if rows:
+        op.bulk_insert(job, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_book_file_job_book_file_id", table_name="book_file_job")
+    op.drop_index("ix_book_file_job_status_run_after", table_name="book_file_job")
+    op.drop_table("book_file_job")
+    for name, _ in reversed(COLUMNS):
+        op.drop_column("book_file", name)
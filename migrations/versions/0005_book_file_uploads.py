@@ -0,0 +1,60 @@
+"""Загрузка файлов книг по частям
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "book_file_upload",
+        sa.Column("id", sa.UUID(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("chunk_size", sa.Integer(), nullable=False),
+        sa.Column("completing", sa.Boolean(), nullable=False),
+        sa.Column(
+            "pub_id",
+            sa.UUID(),
+            sa.ForeignKey("publishing_house.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_book_file_upload_created_at", "book_file_upload", ["created_at"]
+    )
+    op.create_table(
+        "book_file_upload_chunk",
+        sa.Column(
+            "upload_id",
+            sa.UUID(),
+            sa.ForeignKey("book_file_upload.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("index", sa.Integer(), primary_key=True),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("sha256", sa.String(64), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("book_file_upload_chunk")
+    op.drop_index("ix_book_file_upload_created_at", table_name="book_file_upload")
+    op.drop_table("book_file_upload")
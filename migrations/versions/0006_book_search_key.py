@@ -0,0 +1,199 @@
+"""Поиск SQLite по своему ключу вместо rowid книги
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Новая схема: ключ индекса из `book_search_key`, привязанный к id книги.
+SQLITE_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS book_search_key (
+        id INTEGER PRIMARY KEY,
+        book_id CHAR(32) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS book_search USING fts5(
+        title, author, "desc", pubs, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_insert AFTER INSERT ON book BEGIN
+        INSERT INTO book_search_key (book_id) VALUES (new.id);
+        INSERT INTO book_search (rowid, title, author, "desc", pubs)
+        VALUES (
+            (SELECT id FROM book_search_key WHERE book_id = new.id),
+            new.title, new.author, coalesce(new."desc", ''), ''
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_update
+    AFTER UPDATE OF title, author, "desc" ON book BEGIN
+        UPDATE book_search
+        SET title = new.title, author = new.author, "desc" = coalesce(new."desc", '')
+        WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_delete AFTER DELETE ON book BEGIN
+        DELETE FROM book_search
+        WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = old.id);
+        DELETE FROM book_search_key WHERE book_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_pub_insert
+    AFTER INSERT ON publishing_house BEGIN
+        UPDATE book_search SET pubs = (
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = new.book_id
+        ) WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = new.book_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_pub_update
+    AFTER UPDATE OF name, book_id ON publishing_house BEGIN
+        UPDATE book_search SET pubs = coalesce((
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = old.book_id
+        ), '') WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = old.book_id);
+        UPDATE book_search SET pubs = (
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = new.book_id
+        ) WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = new.book_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_pub_delete
+    AFTER DELETE ON publishing_house BEGIN
+        UPDATE book_search SET pubs = coalesce((
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = old.book_id
+        ), '') WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = old.book_id);
+    END
+    """,
+    """
+    INSERT INTO book_search_key (book_id)
+    SELECT id FROM book WHERE id NOT IN (SELECT book_id FROM book_search_key)
+    """,
+    """
+    INSERT INTO book_search (rowid, title, author, "desc", pubs)
+    SELECT book_search_key.id, title, author, coalesce("desc", ''), coalesce((
+        SELECT group_concat(name, ' ') FROM publishing_house
+        WHERE book_id = book.id
+    ), '')
+    FROM book JOIN book_search_key ON book_search_key.book_id = book.id
+    WHERE book_search_key.id NOT IN (SELECT rowid FROM book_search)
+    """,
+)
+
+# Триггеры и таблицы SQLite-поиска: триггеры с прежним телом не заменяются
+# через IF NOT EXISTS, поэтому при смене схемы удаляются явно.
+SQLITE_DROP = (
+    "DROP TRIGGER IF EXISTS book_search_insert",
+    "DROP TRIGGER IF EXISTS book_search_update",
+    "DROP TRIGGER IF EXISTS book_search_delete",
+    "DROP TRIGGER IF EXISTS book_search_pub_insert",
+    "DROP TRIGGER IF EXISTS book_search_pub_update",
+    "DROP TRIGGER IF EXISTS book_search_pub_delete",
+    "DROP TABLE IF EXISTS book_search",
+    "DROP TABLE IF EXISTS book_search_key",
+)
+
+# Прежняя схема: строки FTS5 под rowid книги.
+ROWID_DDL = (
+    """
+    CREATE VIRTUAL TABLE book_search USING fts5(
+        title, author, "desc", pubs, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER book_search_insert AFTER INSERT ON book BEGIN
+        INSERT INTO book_search (rowid, title, author, "desc", pubs)
+        VALUES (new.rowid, new.title, new.author, coalesce(new."desc", ''), '');
+    END
+    """,
+    """
+    CREATE TRIGGER book_search_update
+    AFTER UPDATE OF title, author, "desc" ON book BEGIN
+        UPDATE book_search
+        SET title = new.title, author = new.author, "desc" = coalesce(new."desc", '')
+        WHERE rowid = new.rowid;
+    END
+    """,
+    """
+    CREATE TRIGGER book_search_delete AFTER DELETE ON book BEGIN
+        DELETE FROM book_search WHERE rowid = old.rowid;
+    END
+    """,
+    """
+    CREATE TRIGGER book_search_pub_insert
+    AFTER INSERT ON publishing_house BEGIN
+        UPDATE book_search SET pubs = (
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = new.book_id
+        ) WHERE rowid = (SELECT rowid FROM book WHERE id = new.book_id);
+    END
+    """,
+    """
+    CREATE TRIGGER book_search_pub_update
+    AFTER UPDATE OF name, book_id ON publishing_house BEGIN
+        UPDATE book_search SET pubs = coalesce((
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = old.book_id
+        ), '') WHERE rowid = (SELECT rowid FROM book WHERE id = old.book_id);
+        UPDATE book_search SET pubs = (
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = new.book_id
+        ) WHERE rowid = (SELECT rowid FROM book WHERE id = new.book_id);
+    END
+    """,
+    """
+    CREATE TRIGGER book_search_pub_delete
+    AFTER DELETE ON publishing_house BEGIN
+        UPDATE book_search SET pubs = coalesce((
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = old.book_id
+        ), '') WHERE rowid = (SELECT rowid FROM book WHERE id = old.book_id);
+    END
+    """,
+    """
+    INSERT INTO book_search (rowid, title, author, "desc", pubs)
+    SELECT book.rowid, title, author, coalesce("desc", ''), coalesce((
+        SELECT group_concat(name, ' ') FROM publishing_house
+        WHERE book_id = book.id
+    ), '')
+    FROM book
+    """,
+)
+
+
+def rebuild(statements: Sequence[str]) -> None:
+    """Индекс пересобирается из книг целиком, Postgres уже ключуется по id."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in (*SQLITE_DROP, *statements):
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rebuild(SQLITE_DDL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    rebuild(ROWID_DDL)
@@ -0,0 +1,109 @@
+"""Версии списков в collection_version
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+# Таблицы, по которым списки считают версию своих ответов.
+TABLES = ("book", "publishing_house", "book_file")
+OPERATIONS = ("insert", "update", "delete")
+
+SEED = """
+    INSERT INTO collection_version (name, version, changed_at)
+    SELECT '{table}', 0, {now}
+    WHERE NOT EXISTS (SELECT 1 FROM collection_version WHERE name = '{table}')
+"""
+
+# SQLite: триггер на каждую операцию, номер растёт с каждой строкой.
+SQLITE_DDL = tuple(
+    f"""
+    CREATE TRIGGER IF NOT EXISTS collection_version_{table}_{operation}
+    AFTER {operation.upper()} ON {table} BEGIN
+        UPDATE collection_version
+        SET version = version + 1, changed_at = {SQLITE_NOW}
+        WHERE name = '{table}';
+    END
+    """
+    for table in TABLES
+    for operation in OPERATIONS
+) + tuple(SEED.format(table=table, now=SQLITE_NOW) for table in TABLES)
+
+SQLITE_DROP_DDL = tuple(
+    f"DROP TRIGGER IF EXISTS collection_version_{table}_{operation}"
+    for table in TABLES
+    for operation in OPERATIONS
+)
+
+# Postgres: один раз на оператор, а не на строку — горячая строка версии
+# блокируется короче.
+POSTGRES_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION collection_version_bump() RETURNS trigger AS $$
+    BEGIN
+        UPDATE collection_version
+        SET version = version + 1, changed_at = now() AT TIME ZONE 'utc'
+        WHERE name = TG_TABLE_NAME;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    *(
+        f"""
+        CREATE OR REPLACE TRIGGER collection_version_{table}
+        AFTER INSERT OR UPDATE OR DELETE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION collection_version_bump()
+        """
+        for table in TABLES
+    ),
+    *(SEED.format(table=table, now="now() AT TIME ZONE 'utc'") for table in TABLES),
+)
+
+POSTGRES_DROP_DDL = (
+    *(
+        f"DROP TRIGGER IF EXISTS collection_version_{table} ON {table}"
+        for table in TABLES
+    ),
+    "DROP FUNCTION IF EXISTS collection_version_bump()",
+)
+
+DDL_BY_DIALECT = {
+    "sqlite": (SQLITE_DDL, SQLITE_DROP_DDL),
+    "postgresql": (POSTGRES_DDL, POSTGRES_DROP_DDL),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "collection_version",
+        sa.Column("name", sa.String(64), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+    )
+    # Триггеры и строки версий для каждой таблицы.
+    statements, _ = DDL_BY_DIALECT[op.get_bind().dialect.name]
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _, drops = DDL_BY_DIALECT[op.get_bind().dialect.name]
+    for statement in drops:
+        op.execute(statement)
+    op.drop_table("collection_version")
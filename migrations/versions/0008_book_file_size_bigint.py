@@ -0,0 +1,46 @@
+"""Размер файла книги в BIGINT
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def alter_size(type_: sa.types.TypeEngine, existing_type: sa.types.TypeEngine) -> None:
+    """
+    Загрузка по частям принимает файлы больше 2 ГиБ:
+      - на Postgres `integer` переполняется, тип меняется на месте
+      - SQLite хранит INTEGER в 64 битах, а пересоздание таблицы сняло бы
+        с неё триггеры, поэтому там ничего не меняется
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.alter_column(
+        "book_file",
+        "size",
+        type_=type_,
+        existing_type=existing_type,
+        existing_nullable=False,
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    alter_size(sa.BigInteger(), sa.Integer())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    alter_size(sa.Integer(), sa.BigInteger())
@@ -0,0 +1,158 @@
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Sequence, TypeVar
+
+import orjson
+from fastapi import HTTPException, Request, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.v1.dependencies import response_cache
+from api.v1.schemas import BulkItemResult, BulkResult
+from database.session import SessionManager
+
+LOG = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+T = TypeVar("T")
+Item = tuple[int, T]
+ChunkWriter = Callable[
+    [AsyncSession, list[Item[T]]], Awaitable[tuple[list[BulkItemResult], set[str]]]
+]
+
+
+def bulk_openapi(item_schema: dict[str, Any]) -> dict[str, Any]:
+    """Описание тела запроса: JSON-массив или NDJSON-поток объектов."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": item_schema}},
+                NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+            },
+        }
+    }
+
+
+async def _raw_items(request: Request) -> AsyncIterator[Any]:
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        buffer = b""
+        async for chunk in request.stream():
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid JSON body") from e
+    if not isinstance(payload, list):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Expected a JSON array")
+    for item in payload:
+        yield item
+
+
+async def bulk_chunks(
+    request: Request, schema: type[T], size: int = BULK_CHUNK_SIZE
+) -> AsyncIterator[tuple[list[Item[T]], list[BulkItemResult]]]:
+    """
+    Читает тело пачками по `size` элементов:
+      - каждый элемент валидируется отдельно
+      - невалидные элементы сразу превращаются в результаты с кодом 422
+    """
+    adapter = TypeAdapter(schema)
+    valid: list[Item[T]] = []
+    invalid: list[BulkItemResult] = []
+    index = 0
+    async for raw in _raw_items(request):
+        try:
+            if isinstance(raw, bytes):
+                valid.append((index, adapter.validate_json(raw)))
+            else:
+                valid.append((index, adapter.validate_python(raw)))
+        except ValidationError as e:
+            invalid.append(
+                BulkItemResult(
+                    index=index,
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    error=str(e),
+                )
+            )
+        index += 1
+        if len(valid) + len(invalid) >= size:
+            yield valid, invalid
+            valid, invalid = [], []
+
+    if valid or invalid:
+        yield valid, invalid
+
+
+async def _transaction(
+    write: ChunkWriter[T], items: list[Item[T]]
+) -> Optional[tuple[list[BulkItemResult], set[str]]]:
+    async with SessionManager.scoped_session() as session:
+        outcome = await write(session, items)
+        await session.commit()
+        return outcome
+    # scoped_session откатил транзакцию и подавил ошибку.
+    return None
+
+
+async def write_chunk(
+    write: ChunkWriter[T], items: list[Item[T]]
+) -> list[BulkItemResult]:
+    """
+    Пишет пачку одной транзакцией:
+      - если транзакция откатилась, пачка повторяется поштучно,
+        чтобы ошибка досталась только виновному элементу
+      - кэш инвалидируется после коммита
+    """
+    if not items:
+        return []
+
+    outcome = await _transaction(write, items)
+    if outcome is None and len(items) > 1:
+        LOG.warning("Bulk chunk of %s items failed, retrying one by one", len(items))
+        results = []
+        for item in items:
+            results += await write_chunk(write, [item])
+        return results
+
+    if outcome is None:
+        index, _ = items[0]
+        return [
+            BulkItemResult(
+                index=index,
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                error="Transaction failed",
+            )
+        ]
+
+    results, cache_keys = outcome
+    await response_cache.delete(*cache_keys)
+    return results
+
+
+async def run_bulk(
+    request: Request, schema: type[T], write: ChunkWriter[T]
+) -> BulkResult:
+    results: list[BulkItemResult] = []
+    async for valid, invalid in bulk_chunks(request, schema):
+        results += invalid
+        results += await write_chunk(write, valid)
+
+    results.sort(key=lambda result: result.index)
+    return BulkResult.from_items(results)
+
+
+def split_found(
+    items: Sequence[Item[T]], found: set, key: Callable[[T], Any]
+) -> tuple[list[Item[T]], list[Item[T]]]:
+    hits = [(index, item) for index, item in items if key(item) in found]
+    misses = [(index, item) for index, item in items if key(item) not in found]
+    return hits, misses
@@ -0,0 +1,109 @@
+import hashlib
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from fastapi import Request, Response, status
+from sqlalchemy import Select, func, select
+
+from database.model import Book, BookFile, CollectionVersion, PublishingHouse
+
+
+class Version(NamedTuple):
+    etag: str
+    last_modified: str
+
+
+def make_version(*parts) -> Version:
+    """
+    Слабый ETag и Last-Modified по версии записи:
+      - в версию входят `updated_at` записи и детей и число детей
+      - число детей меняет ETag при удалении, которое не трогает `updated_at`
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    stamps = [part for part in parts if isinstance(part, datetime)]
+    last_modified = max(stamps, default=datetime(1970, 1, 1))
+    return Version(
+        etag=f'W/"{digest}"',
+        last_modified=format_datetime(
+            last_modified.replace(tzinfo=UTC, microsecond=0), usegmt=True
+        ),
+    )
+
+
+def is_not_modified(request: Request, version: Version) -> bool:
+    if if_none_match := request.headers.get("if-none-match"):
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or version.etag.removeprefix("W/") in tags
+
+    if if_modified_since := request.headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(version.last_modified) <= since
+
+    return False
+
+
+def version_headers(version: Version) -> dict[str, str]:
+    return {
+        "ETag": version.etag,
+        "Last-Modified": version.last_modified,
+        "Cache-Control": "no-cache",
+    }
+
+
+def not_modified_response(
+    version: Version, headers: Optional[dict[str, str]] = None
+) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=version_headers(version) | (headers or {}),
+    )
+
+
+def book_version_stmt(id: UUID) -> Select:
+    return (
+        select(
+            Book.updated_at,
+            func.max(PublishingHouse.updated_at),
+            func.max(BookFile.updated_at),
+            func.count(PublishingHouse.id.distinct()),
+            func.count(BookFile.id),
+        )
+        .outerjoin(PublishingHouse, PublishingHouse.book_id == Book.id)
+        .outerjoin(BookFile, BookFile.pub_id == PublishingHouse.id)
+        .where(Book.id == id)
+        .group_by(Book.id)
+    )
+
+
+def publishing_house_version_stmt(id: UUID) -> Select:
+    return (
+        select(
+            PublishingHouse.updated_at,
+            func.max(BookFile.updated_at),
+            func.count(BookFile.id),
+        )
+        .outerjoin(BookFile, BookFile.pub_id == PublishingHouse.id)
+        .where(PublishingHouse.id == id)
+        .group_by(PublishingHouse.id)
+    )
+
+
+def collection_version_stmt(*models) -> Select:
+    """
+    Версия коллекции по `collection_version`, её ведут триггеры:
+      - номер растёт при любой записи в таблицу, в том числе при удалении
+      - чтение одной строки по ключу на таблицу вместо просмотра всех строк
+    """
+    columns = []
+    for model in models:
+        where = CollectionVersion.name == model.__tablename__
+        columns.append(select(CollectionVersion.version).where(where).scalar_subquery())
+        columns.append(
+            select(CollectionVersion.changed_at).where(where).scalar_subquery()
+        )
+    return select(*columns)
@@ -1,30 +1,81 @@
+from typing import NamedTuple
+from uuid import UUID
+
 from fastapi import status, Request, Response, HTTPException
-import time
 
-RATE_LIMIT = 100
-RATE_RESET_TIME = 60
+from api.v1.conditional import (
+    Version,
+    is_not_modified,
+    not_modified_response,
+    version_headers,
+)
+from core.cache import CacheBackend, MemoryCache, SQLiteCache
+from core.ratelimit import MemoryBackend, RateLimitBackend, SQLiteBackend
+from core.setting import CacheSetting, RateLimitSetting, appSetting
 
-rate_limits = {}
 
+def create_rate_limit_backend(setting: RateLimitSetting) -> RateLimitBackend:
+    if setting.BACKEND == "sqlite":
+        return SQLiteBackend(setting.LIMIT, setting.PERIOD, setting.FILE)
+    return MemoryBackend(setting.LIMIT, setting.PERIOD, setting.MAXKEYS)
 
-def rate_limiter(request: Request, response: Response):
-    client_ip = request.client.host
-    now = int(time.time())
 
-    if client_ip in rate_limits:
-        remaining, reset_time = rate_limits[client_ip]
-    else:
-        remaining, reset_time = RATE_LIMIT, now + RATE_RESET_TIME
+def create_response_cache(setting: CacheSetting) -> CacheBackend:
+    if setting.BACKEND == "sqlite":
+        return SQLiteCache(setting.TTL, setting.FILE)
+    return MemoryCache(setting.TTL, setting.MAXENTRIES)
+
+
+rate_limit_backend = create_rate_limit_backend(appSetting.RATELIMIT)
+response_cache = create_response_cache(appSetting.CACHE)
+
 
-    if remaining <= 0:
+class CachedResponse(NamedTuple):
+    """Готовое JSON-тело ответа вместе с его версией."""
+
+    body: bytes
+    version: Version
+
+    def pack(self) -> bytes:
+        etag, last_modified = self.version
+        return f"{etag}\n{last_modified}\n".encode() + self.body
+
+    @classmethod
+    def unpack(cls, raw: bytes) -> "CachedResponse":
+        etag, last_modified, body = raw.split(b"\n", 2)
+        return cls(body, Version(etag.decode(), last_modified.decode()))
+
+    def to_response(self, request: Request, hit: bool) -> Response:
+        """Отдаёт байты без повторной валидации `response_model` или 304."""
+        headers = {"X-Cache": "HIT" if hit else "MISS"}
+        if is_not_modified(request, self.version):
+            return not_modified_response(self.version, headers)
+        return Response(
+            self.body,
+            media_type="application/json",
+            headers=version_headers(self.version) | headers,
+        )
+
+
+def book_cache_key(id: UUID) -> str:
+    return f"book:{id}"
+
+
+def publishing_house_cache_key(id: UUID) -> str:
+    return f"publishing_house:{id}"
+
+
+async def rate_limiter(request: Request, response: Response):
+    client_ip = request.client.host
+    result = await rate_limit_backend.hit(client_ip)
+
+    if not result.allowed:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Rate limit exceeded. Try again later.⏳",
-            headers={"Retry-After": str(reset_time - now)},
+            headers={"Retry-After": str(result.retry_after)},
         )
 
-    rate_limits[client_ip] = [remaining - 1, reset_time]
-
-    response.headers["X-RateLimit-Limit"] = str(RATE_LIMIT)
-    response.headers["X-RateLimit-Remaining"] = str(remaining - 1)
-    response.headers["X-RateLimit-Reset"] = str(reset_time)
+    response.headers["X-RateLimit-Limit"] = str(result.limit)
+    response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+    response.headers["X-RateLimit-Reset"] = str(result.reset)
@@ -0,0 +1,68 @@
+from typing import Any, Callable
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.v1.serialize import BOOK, BOOK_FILE, PUBLISHING_HOUSE, Level, attach
+from database.model import BookFile, PublishingHouse
+
+BOOK_EXPAND = ("pubs", "pubs.files")
+PUBLISHING_HOUSE_EXPAND = ("files",)
+
+# Пути `expand` образуют цепочку: n путей — это n уровней под корнем.
+BOOK_TREE = (
+    Level(BOOK),
+    Level(PUBLISHING_HOUSE, "pubs", PublishingHouse.book_id),
+    Level(BOOK_FILE, "files", BookFile.pub_id),
+)
+PUBLISHING_HOUSE_TREE = (
+    Level(PUBLISHING_HOUSE),
+    Level(BOOK_FILE, "files", BookFile.pub_id),
+)
+
+
+def expand_query(
+    allowed: tuple[str, ...], default: str = ""
+) -> Callable[..., frozenset[str]]:
+    """
+    Зависимость `?expand=pubs,pubs.files`:
+      - неизвестные пути дают 400
+      - вложенный путь подразумевает родителя: `pubs.files` => `pubs`
+    """
+
+    def parse_expand(
+        expand: str = Query(
+            default,
+            description=f"Nested collections to load: {', '.join(allowed)} 🌳",
+        ),
+    ) -> frozenset[str]:
+        paths = {path.strip() for path in expand.split(",") if path.strip()}
+        if unknown := paths - set(allowed):
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                f"Unknown expand paths: {', '.join(sorted(unknown))}",
+            )
+        paths |= {path.rsplit(".", 1)[0] for path in paths if "." in path}
+        return frozenset(paths)
+
+    return parse_expand
+
+
+def book_levels(expand: frozenset[str]) -> tuple[Level, ...]:
+    return BOOK_TREE[: 1 + len(expand)]
+
+
+def publishing_house_levels(expand: frozenset[str]) -> tuple[Level, ...]:
+    return PUBLISHING_HOUSE_TREE[: 1 + len(expand)]
+
+
+async def expand_books(
+    session: AsyncSession, books: list[dict[str, Any]], expand: frozenset[str]
+) -> None:
+    if "pubs" not in expand:
+        return
+    pubs = await attach(
+        session, books, "pubs", PUBLISHING_HOUSE, PublishingHouse.book_id
+    )
+    if "pubs.files" in expand:
+        await attach(session, pubs, "files", BOOK_FILE, BookFile.pub_id)
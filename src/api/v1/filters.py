@@ -0,0 +1,119 @@
+from datetime import UTC, datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import Query
+from sqlalchemy import Select, exists
+
+from database.model import Book, BookFile, PublishingHouse
+
+BOOK_SORT = ("created_at", "updated_at", "title")
+PUBLISHING_HOUSE_SORT = ("created_at", "updated_at", "name")
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Время со смещением переводится в UTC, без смещения считается UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC)
+    return value.replace(tzinfo=None)
+
+
+def created_range(
+    stmt: Select,
+    model,
+    created_after: Optional[datetime],
+    created_before: Optional[datetime],
+) -> Select:
+    if created_after is not None:
+        stmt = stmt.where(model.created_at >= naive_utc(created_after))
+    if created_before is not None:
+        stmt = stmt.where(model.created_at < naive_utc(created_before))
+    return stmt
+
+
+class BookFilter:
+    """
+    Фильтры списка книг:
+      - `author` — точное совпадение, идёт по индексу `(author, created_at, id)`
+      - диапазоны `page_count` и `created_at`, правая граница даты не включается
+    """
+
+    def __init__(
+        self,
+        author: Optional[str] = Query(None, description="Exact author name ✍️"),
+        min_pages: Optional[int] = Query(None, ge=0, description="Minimum page count"),
+        max_pages: Optional[int] = Query(None, ge=0, description="Maximum page count"),
+        created_after: Optional[datetime] = Query(
+            None, description="Created at or after (UTC) 📅"
+        ),
+        created_before: Optional[datetime] = Query(
+            None, description="Created before (UTC) 📅"
+        ),
+    ):
+        self.author = author
+        self.min_pages = min_pages
+        self.max_pages = max_pages
+        self.created_after = created_after
+        self.created_before = created_before
+
+    def apply(self, stmt: Select) -> Select:
+        if self.author is not None:
+            stmt = stmt.where(Book.author == self.author)
+        if self.min_pages is not None:
+            stmt = stmt.where(Book.page_count >= self.min_pages)
+        if self.max_pages is not None:
+            stmt = stmt.where(Book.page_count <= self.max_pages)
+        return created_range(stmt, Book, self.created_after, self.created_before)
+
+    def __repr__(self) -> str:
+        filters = {k: v for k, v in vars(self).items() if v is not None}
+        return f"BookFilter({filters})"
+
+
+class PublishingHouseFilter:
+    """
+    Фильтры списка издательств:
+      - `lang` и `book_id` — точное совпадение по индексам
+      - `file_type` — издательства, у которых есть файл этого типа
+    """
+
+    def __init__(
+        self,
+        lang: Optional[str] = Query(None, description="Language code 🌐"),
+        book_id: Optional[UUID] = Query(None, description="Parent book 📖"),
+        file_type: Optional[str] = Query(
+            None, description="Has a file of this type, e.g. `pdf` 📄"
+        ),
+        created_after: Optional[datetime] = Query(
+            None, description="Created at or after (UTC) 📅"
+        ),
+        created_before: Optional[datetime] = Query(
+            None, description="Created before (UTC) 📅"
+        ),
+    ):
+        self.lang = lang
+        self.book_id = book_id
+        # Тип хранится как суффикс пути: `.pdf`.
+        self.file_type = f".{file_type.lstrip('.')}" if file_type else None
+        self.created_after = created_after
+        self.created_before = created_before
+
+    def apply(self, stmt: Select) -> Select:
+        if self.lang is not None:
+            stmt = stmt.where(PublishingHouse.lang == self.lang)
+        if self.book_id is not None:
+            stmt = stmt.where(PublishingHouse.book_id == self.book_id)
+        if self.file_type is not None:
+            stmt = stmt.where(
+                exists().where(
+                    BookFile.pub_id == PublishingHouse.id,
+                    BookFile.file_type == self.file_type,
+                )
+            )
+        return created_range(
+            stmt, PublishingHouse, self.created_after, self.created_before
+        )
+
+    def __repr__(self) -> str:
+        filters = {k: v for k, v in vars(self).items() if v is not None}
+        return f"PublishingHouseFilter({filters})"
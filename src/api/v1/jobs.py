@@ -0,0 +1,87 @@
+import io
+import logging
+import os
+
+from sqlalchemy import select, update
+
+from api.v1.dependencies import (
+    book_cache_key,
+    publishing_house_cache_key,
+    response_cache,
+)
+from core.jobs import JobQueue
+from core.setting import appSetting
+from database.model import BookFile, BookFileJob, PublishingHouse
+from database.session import SessionManager
+from utils.file import FileManager
+from utils.processing import inspect_file
+
+LOG = logging.getLogger(__name__)
+
+
+async def process_book_file(queue: JobQueue, job: BookFileJob) -> None:
+    """
+    Обработка загруженного файла:
+      - разбор содержимого (тип, страницы, обложка) идёт в пуле процессов
+      - обложка сохраняется в то же контентно-адресуемое хранилище
+      - вложенные ответы книги и издательства сбрасываются из кэша
+      - ошибка БД не гасится, а уходит в очередь на повтор
+    """
+    book_file = None
+    async with SessionManager.scoped_session(reraise=True) as session:
+        book_file = (
+            await session.execute(
+                select(BookFile.path, BookFile.pub_id, PublishingHouse.book_id)
+                .join(PublishingHouse, PublishingHouse.id == BookFile.pub_id)
+                .where(BookFile.id == job.book_file_id)
+            )
+        ).first()
+    if book_file is None:
+        LOG.info("Book file %s was deleted, nothing to process", job.book_file_id)
+        return
+
+    info = await queue.run_in_pool(inspect_file, book_file.path)
+    cover_path = None
+    if info.cover:
+        stored = await FileManager.reading(
+            f"cover{info.cover_suffix}", io.BytesIO(info.cover)
+        )
+        cover_path = str(stored.path)
+
+    async with SessionManager.scoped_session(reraise=True) as session:
+        await session.execute(
+            update(BookFile)
+            .where(BookFile.id == job.book_file_id)
+            .values(
+                mime_type=info.mime_type,
+                page_count=info.page_count,
+                cover_path=cover_path,
+            )
+        )
+        await session.commit()
+
+    await response_cache.delete(
+        publishing_house_cache_key(book_file.pub_id),
+        book_cache_key(book_file.book_id),
+    )
+    LOG.info(
+        "Processed book file %s: %s, %s pages",
+        job.book_file_id,
+        info.mime_type,
+        info.page_count,
+    )
+
+
+job_queue = JobQueue(
+    BookFileJob,
+    process_book_file,
+    workers=appSetting.JOBS.WORKERS,
+    # Пул свой у каждого воркера API: ядра делятся между ними.
+    processes=appSetting.JOBS.PROCESSES
+    or max(1, (os.cpu_count() or 1) // appSetting.API.WORKERS),
+    max_attempts=appSetting.JOBS.MAXATTEMPTS,
+    backoff=appSetting.JOBS.BACKOFF,
+    timeout=appSetting.JOBS.TIMEOUT,
+    poll_interval=appSetting.JOBS.POLLINTERVAL,
+    retention=appSetting.JOBS.RETENTION,
+)
@@ -0,0 +1,180 @@
+import base64
+from datetime import datetime
+from typing import Any, Callable, NamedTuple, Optional, Sequence
+from uuid import UUID
+
+import orjson
+from fastapi import HTTPException, Query, status
+from sqlalchemy import ColumnElement, Select, tuple_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def _pack(key: list) -> str:
+    raw = orjson.dumps(key)
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _unpack(cursor: str) -> list:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    return orjson.loads(raw)
+
+
+class Sort(NamedTuple):
+    field: str
+    descending: bool = False
+
+    def __str__(self) -> str:
+        return f"-{self.field}" if self.descending else self.field
+
+
+DEFAULT_SORT = Sort("created_at")
+
+
+def sort_query(allowed: tuple[str, ...]) -> Callable[..., Sort]:
+    """Зависимость `?sort=title` / `?sort=-created_at`, неизвестные поля дают 400."""
+
+    def parse_sort(
+        sort: str = Query(
+            str(DEFAULT_SORT),
+            description=f"Sort by {', '.join(allowed)}; prefix `-` for descending ↕️",
+        ),
+    ) -> Sort:
+        field = sort.removeprefix("-")
+        if field not in allowed:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST, f"Unknown sort field: {field}"
+            )
+        return Sort(field, sort.startswith("-"))
+
+    return parse_sort
+
+
+def encode_cursor(sort: Sort, value: Any, id: UUID) -> str:
+    """Пакует ключ последней строки страницы в непрозрачный курсор."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return _pack([str(sort), value, str(id)])
+
+
+def decode_cursor(cursor: str) -> tuple[str, Any, UUID]:
+    try:
+        sort, value, id = _unpack(cursor)
+        return sort, value, UUID(id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid cursor") from e
+
+
+def encode_rank_cursor(score: float, id: UUID) -> str:
+    return _pack([score, str(id)])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, UUID]:
+    try:
+        score, id = _unpack(cursor)
+        return float(score), UUID(id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid cursor") from e
+
+
+class Pagination:
+    """
+    Keyset-пагинация по `(поле сортировки, id)`:
+      - страница читается через `WHERE (поле, id) > курсор`, без OFFSET
+        (`<` при сортировке по убыванию)
+      - запрашивается `limit + 1` строк, чтобы узнать, есть ли следующая страница
+      - курсор помнит сортировку и не подходит к другой
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(
+            DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Page size 📏"
+        ),
+        cursor: Optional[str] = Query(
+            None, description="`next_cursor` from the previous page 🔖"
+        ),
+    ):
+        self.limit = limit
+        self.after = decode_cursor(cursor) if cursor else None
+
+    def apply(self, stmt: Select, model, sort: Sort = DEFAULT_SORT) -> Select:
+        column = getattr(model, sort.field)
+        key = tuple_(column, model.id)
+        if self.after is not None:
+            after = self._after(column, sort)
+            stmt = stmt.where(key < after if sort.descending else key > after)
+        return stmt.order_by(*self.ordering(column, model.id, sort)).limit(
+            self.limit + 1
+        )
+
+    @staticmethod
+    def ordering(column, id, sort: Sort = DEFAULT_SORT) -> tuple:
+        """Порядок страницы — и для самой выборки, и для запроса поверх неё."""
+        if sort.descending:
+            return column.desc(), id.desc()
+        return column, id
+
+    def _after(self, column, sort: Sort) -> tuple[Any, UUID]:
+        cursor_sort, value, id = self.after
+        if cursor_sort != str(sort):
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST, "Cursor belongs to another sort order"
+            )
+        try:
+            if column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid cursor") from e
+        return value, id
+
+    def page(
+        self, rows: Sequence, sort: Sort = DEFAULT_SORT
+    ) -> tuple[Sequence, Optional[str]]:
+        if len(rows) <= self.limit:
+            return rows, None
+
+        rows = rows[: self.limit]
+        last = rows[-1]
+        return rows, encode_cursor(sort, getattr(last, sort.field), last.id)
+
+    def __repr__(self) -> str:
+        return f"Pagination(limit={self.limit}, after={self.after})"
+
+
+class RankPagination(Pagination):
+    """
+    Keyset-пагинация результатов поиска по `(score, id)`:
+      - `score` возрастает от лучшего совпадения к худшему
+      - в строках страницы есть `id` и `score`
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(
+            DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Page size 📏"
+        ),
+        cursor: Optional[str] = Query(
+            None, description="`next_cursor` from the previous page 🔖"
+        ),
+    ):
+        self.limit = limit
+        self.after = decode_rank_cursor(cursor) if cursor else None
+
+    def apply(self, stmt: Select, model, score: ColumnElement[float]) -> Select:
+        if self.after is not None:
+            stmt = stmt.where(tuple_(score, model.id) > self.after)
+        return stmt.order_by(*self.ordering(score, model.id)).limit(self.limit + 1)
+
+    @staticmethod
+    def ordering(score, id) -> tuple:
+        return score, id
+
+    def page(self, rows: Sequence) -> tuple[Sequence, Optional[str]]:
+        if len(rows) <= self.limit:
+            return rows, None
+
+        rows = rows[: self.limit]
+        last = rows[-1]
+        return rows, encode_rank_cursor(last.score, last.id)
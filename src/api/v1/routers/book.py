@@ -1,14 +1,52 @@
 import logging
+import zlib
+from typing import AsyncGenerator
 from uuid import UUID
-from fastapi import APIRouter, HTTPException, status, Depends
-from api.v1.dependencies import rate_limiter
-from api.v1.schemas import BookCreate, BookRead, BookUpdate
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, status, Depends
+from fastapi.responses import StreamingResponse
+from api.v1.conditional import (
+    book_version_stmt,
+    collection_version_stmt,
+    is_not_modified,
+    make_version,
+    not_modified_response,
+    version_headers,
+)
+from api.v1.dependencies import (
+    CachedResponse,
+    book_cache_key,
+    publishing_house_cache_key,
+    rate_limiter,
+    response_cache,
+)
+from api.v1.bulk import Item, bulk_openapi, run_bulk, split_found
+from api.v1.expand import BOOK_EXPAND, book_levels, expand_books, expand_query
+from api.v1.filters import BOOK_SORT, BookFilter
+from api.v1.pagination import Pagination, RankPagination, Sort, sort_query
+from api.v1.serialize import BOOK, json_response, regroup, tree_stmt
+from api.v1.schemas import (
+    BookBulkUpdate,
+    BookCreate,
+    BookRead,
+    BookReadFlat,
+    BookReadWithPubs,
+    BookSummaryRead,
+    BookUpdate,
+    BulkItemResult,
+    BulkResult,
+    Page,
+)
 from database.session import SessionManager
-from database.model import Book
+from database.model import Book, BookFile, BookSummary, PublishingHouse
+from database.search import has_words, search_stmt
 from sqlalchemy import insert, select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
+EXPORT_BATCH_SIZE = 1000
+
 book_router = APIRouter(
     prefix="/book", tags=["📚 Book Management"], dependencies=[Depends(rate_limiter)]
 )
@@ -33,42 +71,319 @@ async def create_book(new_book: BookCreate):
 
 @book_router.get(
     "/",
-    response_model=list[BookRead],
+    response_model=Page[BookRead | BookReadWithPubs | BookReadFlat],
     summary="List all books 📚",
-    description="Retrieve a list of all books available in the library. 📖",
+    description="Retrieve a page of books available in the library. "
+    "Filter by `author`, page count and creation time, order with `sort`, "
+    "pass `next_cursor` back as `cursor` to get the next page, "
+    "and `expand=pubs,pubs.files` to include nested records. 📖",
 )
-async def list_books():
-    logger.info("Fetching list of books")
-    async with SessionManager.scoped_session() as session:
-        stmt = select(Book)
-        books = (await session.scalars(stmt)).all()
+async def list_books(
+    request: Request,
+    pagination: Pagination = Depends(),
+    filters: BookFilter = Depends(),
+    sort: Sort = Depends(sort_query(BOOK_SORT)),
+    expand: frozenset[str] = Depends(expand_query(BOOK_EXPAND)),
+):
+    logger.info(
+        "Fetching list of books: %s, %s, sort=%s, expand=%s",
+        pagination,
+        filters,
+        sort,
+        set(expand),
+    )
+    page = pagination.apply(filters.apply(BOOK.select()), Book, sort).subquery()
+    levels = book_levels(expand)
+    stmt = tree_stmt(
+        page, levels, *pagination.ordering(page.c[sort.field], page.c.id, sort)
+    )
+    books = None
+    async with SessionManager.read_session() as session:
+        stamp = await session.execute(
+            collection_version_stmt(Book, PublishingHouse, BookFile)
+        )
+        version = make_version(*stamp.one(), request.url.query)
+        if is_not_modified(request, version):
+            logger.info("Books not modified since %s", version.last_modified)
+            return not_modified_response(version)
 
+        heads, books = regroup((await session.execute(stmt)).all(), levels)
+
+    if books is None:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE)
+    heads, next_cursor = pagination.page(heads, sort)
+    books = books[: len(heads)]
     if not books:
         logger.info("No books found")
-        return []
 
     logger.info("Fetched %s books", len(books))
-    return [BookRead.model_validate(book) for book in books]
+    return json_response(
+        {"items": books, "next_cursor": next_cursor}, version_headers(version)
+    )
+
+
+@book_router.get(
+    "/search",
+    response_model=Page[BookRead | BookReadWithPubs | BookReadFlat],
+    summary="Search books 🔎",
+    description="Full-text search over title, author, description and "
+    "publishing house names, best matches first. "
+    "Pass `next_cursor` back as `cursor` to get the next page. 🔍",
+)
+async def search_books(
+    q: str = Query(..., min_length=1, max_length=256, description="Search query 🔤"),
+    pagination: RankPagination = Depends(),
+    expand: frozenset[str] = Depends(expand_query(BOOK_EXPAND)),
+):
+    if not has_words(q):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Search query has no words")
+
+    logger.info("Searching books for %r: %s", q, pagination)
+    levels = book_levels(expand)
+    books = None
+    async with SessionManager.read_session() as session:
+        stmt, score = search_stmt(session.bind.dialect.name, q, *BOOK.columns)
+        page = pagination.apply(stmt, Book, score).subquery()
+        stmt = tree_stmt(
+            page,
+            levels,
+            *pagination.ordering(page.c.score, page.c.id),
+            extra=[page.c.score],
+        )
+        heads, books = regroup((await session.execute(stmt)).all(), levels)
+
+    if books is None:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE)
+    heads, next_cursor = pagination.page(heads)
+    books = books[: len(heads)]
+
+    logger.info("Found %s books for %r", len(books), q)
+    return json_response({"items": books, "next_cursor": next_cursor})
+
+
+async def export_books(compress: bool) -> AsyncGenerator[bytes, None]:
+    """
+    Построчно выгружает каталог через серверный курсор:
+      - строки читаются пачками по `EXPORT_BATCH_SIZE` без ORM-объектов
+      - издательства и файлы пачки подгружаются двумя запросами
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    exported = 0
+    async with SessionManager.read_session() as session:
+        stmt = (
+            BOOK.select()
+            .order_by(Book.created_at, Book.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        result = await session.stream(stmt)
+        async for rows in result.partitions():
+            books = [BOOK(row) for row in rows]
+            await expand_books(session, books, frozenset(BOOK_EXPAND))
+            chunk = b"".join(orjson.dumps(book) + b"\n" for book in books)
+            exported += len(books)
+            yield compressor.compress(chunk) if compressor else chunk
+
+    if compressor:
+        yield compressor.flush()
+    logger.info("Exported %s books", exported)
+
+
+@book_router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export all books 📦",
+    description="Stream the whole catalogue as newline-delimited JSON, "
+    "optionally gzip-compressed. 🚚",
+)
+async def export_book_catalogue(
+    gzip: bool = Query(False, description="Compress the stream with gzip 🗜️"),
+):
+    logger.info("Starting book export (gzip=%s)", gzip)
+    return StreamingResponse(
+        export_books(gzip),
+        media_type="application/x-ndjson",
+        headers={"Content-Encoding": "gzip"} if gzip else None,
+    )
+
+
+async def insert_books(
+    session: AsyncSession, items: list[Item[BookCreate]]
+) -> tuple[list[BulkItemResult], set[str]]:
+    stmt = insert(Book).returning(Book.id, sort_by_parameter_order=True)
+    ids = (await session.scalars(stmt, [book.model_dump() for _, book in items])).all()
+    results = [
+        BulkItemResult(index=index, id=id, status=status.HTTP_201_CREATED)
+        for (index, _), id in zip(items, ids)
+    ]
+    return results, set()
+
+
+async def update_books(
+    session: AsyncSession, items: list[Item[BookBulkUpdate]]
+) -> tuple[list[BulkItemResult], set[str]]:
+    stmt = select(Book.id).where(Book.id.in_([book.id for _, book in items]))
+    found, missing = split_found(
+        items, set((await session.scalars(stmt)).all()), lambda book: book.id
+    )
+    values = [book.model_dump(exclude_none=True) for _, book in found]
+    if values := [value for value in values if len(value) > 1]:
+        await session.execute(update(Book), values)
+
+    results = [
+        BulkItemResult(index=index, id=book.id, status=status.HTTP_200_OK)
+        for index, book in found
+    ] + [
+        BulkItemResult(index=index, id=book.id, status=status.HTTP_404_NOT_FOUND)
+        for index, book in missing
+    ]
+    return results, {book_cache_key(book.id) for _, book in found}
+
+
+async def delete_books(
+    session: AsyncSession, items: list[Item[UUID]]
+) -> tuple[list[BulkItemResult], set[str]]:
+    ids = [id for _, id in items]
+    pub_ids = (
+        await session.scalars(
+            select(PublishingHouse.id).where(PublishingHouse.book_id.in_(ids))
+        )
+    ).all()
+    stmt = delete(Book).where(Book.id.in_(ids)).returning(Book.id)
+    deleted = set((await session.scalars(stmt)).all())
+
+    results = [
+        BulkItemResult(
+            index=index,
+            id=id,
+            status=status.HTTP_200_OK if id in deleted else status.HTTP_404_NOT_FOUND,
+        )
+        for index, id in items
+    ]
+    cache_keys = {book_cache_key(id) for id in deleted}
+    return results, cache_keys | {publishing_house_cache_key(id) for id in pub_ids}
+
+
+@book_router.post(
+    "/bulk",
+    response_model=BulkResult,
+    summary="Create books in bulk 📚📚",
+    description="Create many books from a JSON array or an NDJSON stream of "
+    "`BookCreate` objects, one transaction per chunk. 🏭",
+    openapi_extra=bulk_openapi(BookCreate.model_json_schema()),
+)
+async def bulk_create_books(request: Request):
+    logger.info("Starting bulk book creation")
+    result = await run_bulk(request, BookCreate, insert_books)
+    logger.info("Bulk created %s books, %s failed", result.succeeded, result.failed)
+    return result
+
+
+@book_router.patch(
+    "/bulk",
+    response_model=BulkResult,
+    summary="Update books in bulk ✏️✏️",
+    description="Update many books from a JSON array or an NDJSON stream of "
+    "`BookUpdate` objects with an `id`. 🛠️",
+    openapi_extra=bulk_openapi(BookBulkUpdate.model_json_schema()),
+)
+async def bulk_update_books(request: Request):
+    logger.info("Starting bulk book update")
+    result = await run_bulk(request, BookBulkUpdate, update_books)
+    logger.info("Bulk updated %s books, %s failed", result.succeeded, result.failed)
+    return result
+
+
+@book_router.delete(
+    "/bulk",
+    response_model=BulkResult,
+    summary="Delete books in bulk 🗑️🗑️",
+    description="Delete many books from a JSON array or an NDJSON stream of IDs. 🛑",
+    openapi_extra=bulk_openapi({"type": "string", "format": "uuid"}),
+)
+async def bulk_delete_books(request: Request):
+    logger.info("Starting bulk book deletion")
+    result = await run_bulk(request, UUID, delete_books)
+    logger.info("Bulk deleted %s books, %s failed", result.succeeded, result.failed)
+    return result
+
+
+@book_router.get(
+    "/{id}/summary",
+    response_model=BookSummaryRead,
+    summary="Get book counters 📊",
+    description="Publishing house and file counts and total file size of a book. "
+    "Read from a summary row kept up to date by the database, "
+    "without loading nested records. ⚡",
+)
+async def get_book_summary(id: UUID, request: Request):
+    logger.info("Fetching summary of book with id: %s", id)
+    summary = None
+    async with SessionManager.read_session() as session:
+        stmt = select(
+            BookSummary.book_id,
+            BookSummary.pub_count,
+            BookSummary.file_count,
+            BookSummary.total_bytes,
+            BookSummary.last_changed,
+        ).where(BookSummary.book_id == id)
+        summary = (await session.execute(stmt)).first()
+
+    if not summary:
+        logger.warning("Summary of book with id %s not found", id)
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    version = make_version(*summary)
+    if is_not_modified(request, version):
+        logger.info("Summary of book with id %s not modified", id)
+        return not_modified_response(version)
+
+    return json_response(summary._asdict(), version_headers(version))
 
 
 @book_router.get(
     "/{id}",
-    response_model=BookRead,
+    response_model=BookRead | BookReadWithPubs | BookReadFlat,
     summary="Get book details 📖",
-    description="Retrieve details of a specific book by its ID. 🔍",
+    description="Retrieve details of a specific book by its ID. "
+    "Nested records are included unless narrowed with `expand`. 🔍",
 )
-async def get_book(id: UUID):
-    logger.info("Fetching book with id: %s", id)
-    async with SessionManager.scoped_session() as session:
-        stmt = select(Book).where(Book.id == id)
-        book = await session.scalar(stmt)
+async def get_book(
+    id: UUID,
+    request: Request,
+    expand: frozenset[str] = Depends(expand_query(BOOK_EXPAND, "pubs,pubs.files")),
+):
+    logger.info("Fetching book with id: %s, expand=%s", id, set(expand))
+    # Кэшируется только полное представление, его и инвалидируют при записи.
+    full = expand == frozenset(BOOK_EXPAND)
+    key = book_cache_key(id) if full else None
+    if key and (raw := await response_cache.get(key)) is not None:
+        logger.info("Book with id %s served from cache", id)
+        return CachedResponse.unpack(raw).to_response(request, hit=True)
+
+    book = None
+    # Промах кэша читается с primary: в кэш не попадёт отставшая реплика.
+    async with SessionManager.read_session(primary=key is not None) as session:
+        if stamp := (await session.execute(book_version_stmt(id))).first():
+            version = make_version(*stamp, ",".join(sorted(expand)))
+            if is_not_modified(request, version):
+                logger.info("Book with id %s not modified", id)
+                return not_modified_response(version, {"X-Cache": "MISS"})
+
+            levels = book_levels(expand)
+            root = BOOK.select().where(Book.id == id).subquery()
+            rows = (await session.execute(tree_stmt(root, levels))).all()
+            _, books = regroup(rows, levels)
+            book = books[0] if books else None
 
     if not book:
         logger.warning("Book with id %s not found", id)
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
     logger.info("Book with id %s found", id)
-    return BookRead.model_validate(book)
+    cached = CachedResponse(orjson.dumps(book), version)
+    if key:
+        await response_cache.set(key, cached.pack())
+    return cached.to_response(request, hit=False)
 
 
 @book_router.patch(
@@ -93,6 +408,8 @@ async def update_book(id: UUID, update_book: BookUpdate):
         logger.warning("Book with id %s not found for update", id)
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
+    await response_cache.delete(book_cache_key(id))
+
     logger.info("Book with id %s updated successfully", id)
     return BookRead.model_validate(book)
 
@@ -106,6 +423,11 @@ async def update_book(id: UUID, update_book: BookUpdate):
 async def delete_book(id: UUID):
     logger.info("Deleting book with id: %s", id)
     async with SessionManager.scoped_session() as session:
+        pub_ids = (
+            await session.scalars(
+                select(PublishingHouse.id).where(PublishingHouse.book_id == id)
+            )
+        ).all()
         stmt = delete(Book).where(Book.id == id).returning(Book.id)
         deleted_id = await session.scalar(stmt)
         await session.commit()
@@ -114,6 +436,10 @@ async def delete_book(id: UUID):
         logger.warning("Book with id %s not found for deletion", id)
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
+    await response_cache.delete(
+        book_cache_key(id), *map(publishing_house_cache_key, pub_ids)
+    )
+
     logger.info("Book with id %s deleted successfully", id)
 
     return {
@@ -1,13 +1,32 @@
 import logging
+import mimetypes
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, UploadFile
-from sqlalchemy import insert
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, status
+from fastapi.responses import FileResponse
+from sqlalchemy import Executable, exists, insert, or_, select
 
-from api.v1.dependencies import rate_limiter
-from api.v1.schemas import BookFileRead
+from api.v1.conditional import (
+    Version,
+    is_not_modified,
+    not_modified_response,
+    version_headers,
+)
+from api.v1.dependencies import (
+    book_cache_key,
+    publishing_house_cache_key,
+    rate_limiter,
+    response_cache,
+)
+from api.v1.jobs import job_queue
+from core.jobs import DONE
+from api.v1.schemas import BookFileRead, BookFileStatus
+from database.mixin import utcnow
 from database.session import SessionManager
-from database.model import BookFile
-from utils.file import FileManager
+from database.model import BookFile, BookFileJob, PublishingHouse
+from utils.file import FileManager, StoredFile
 
 
 logger = logging.getLogger(__name__)
@@ -19,21 +38,198 @@ book_file_router = APIRouter(
 )
 
 
-@book_file_router.post("/{publishing_house_id}")
-async def create_book_file(publishing_house_id: UUID, file: UploadFile):
-    path = await FileManager.reading(file.filename, file)
+async def save_book_file(
+    publishing_house_id: UUID, stored: StoredFile, *statements: Executable
+) -> Optional[BookFile]:
+    """
+    Запись о сохранённом файле и задача его обработки одной транзакцией:
+      - `statements` выполняются в той же транзакции, например удаление загрузки
+      - `None`, если издательства нет: нарушение внешнего ключа откатывается
+        в `scoped_session`, а файл удаляется из хранилища, если на то же
+        содержимое не ссылаются другие записи
+    """
+    book_file = None
     async with SessionManager.scoped_session() as session:
         stmt = (
             insert(BookFile)
             .values(
-                path=str(path),
-                file_type=path.suffix,
-                size=file.size,
+                path=str(stored.path),
+                file_type=stored.path.suffix,
+                size=stored.size,
+                sha256=stored.sha256,
                 pub_id=publishing_house_id,
             )
             .returning(BookFile)
         )
-        pub = await session.scalar(stmt)
+        book_file = await session.scalar(stmt)
+        # Задача коммитится вместе с файлом и не теряется при перезапуске.
+        await session.execute(
+            insert(BookFileJob).values(book_file_id=book_file.id, run_after=utcnow())
+        )
+        for statement in statements:
+            await session.execute(statement)
+        book_id = await session.scalar(
+            select(PublishingHouse.book_id).where(
+                PublishingHouse.id == publishing_house_id
+            )
+        )
         await session.commit()
 
-    return BookFileRead.model_validate(pub)
+    if book_file is None:
+        await discard_stored(stored)
+        return None
+
+    job_queue.notify()
+    await response_cache.delete(
+        publishing_house_cache_key(publishing_house_id), book_cache_key(book_id)
+    )
+    return book_file
+
+
+async def discard_stored(stored: StoredFile) -> None:
+    path = str(stored.path)
+    referenced = True
+    async with SessionManager.scoped_session() as session:
+        referenced = await session.scalar(
+            select(
+                exists().where(or_(BookFile.path == path, BookFile.cover_path == path))
+            )
+        )
+    if not referenced:
+        await FileManager.discard(stored.path)
+        logger.info("Discarded unreferenced file %s", stored.path)
+
+
+@book_file_router.post(
+    "/{publishing_house_id}",
+    response_model=BookFileRead,
+    summary="Upload a book file 📤",
+    description="Store the file and queue its processing: content type, "
+    "page count and cover are filled in later, see `/{id}/status`. "
+    "Large files are better sent in chunks via `/uploads`. ⏳",
+)
+async def create_book_file(publishing_house_id: UUID, file: UploadFile):
+    stored = await FileManager.reading(file.filename, file.file)
+    logger.info("Stored upload %s as %s", file.filename, stored.path)
+    book_file = await save_book_file(publishing_house_id, stored)
+    if book_file is None:
+        logger.warning("Publishing house with id %s not found", publishing_house_id)
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    return BookFileRead.model_validate(book_file)
+
+
+@book_file_router.get(
+    "/{id}/status",
+    response_model=BookFileStatus,
+    summary="Get book file processing status 🔄",
+    description="State of the background processing of an uploaded file "
+    "and what it has found so far. 🔍",
+)
+async def get_book_file_status(id: UUID):
+    row = None
+    # Статус пишет фоновый воркер, а не клиент: реплика может отставать.
+    async with SessionManager.scoped_session() as session:
+        stmt = (
+            select(
+                BookFile.id,
+                BookFileJob.status,
+                BookFileJob.attempts,
+                BookFileJob.error,
+                BookFile.mime_type,
+                BookFile.page_count,
+                BookFile.cover_path,
+            )
+            .outerjoin(BookFileJob, BookFileJob.book_file_id == BookFile.id)
+            .where(BookFile.id == id)
+            .order_by(BookFileJob.created_at.desc())
+            .limit(1)
+        )
+        row = (await session.execute(stmt)).first()
+
+    if row is None:
+        logger.warning("Book file with id %s not found", id)
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    return BookFileStatus(
+        id=row.id,
+        # Задачу удаляют через `JOBS_RETENTION`, а результат остаётся.
+        status=row.status or (DONE if row.mime_type else None),
+        attempts=row.attempts or 0,
+        error=row.error,
+        mime_type=row.mime_type,
+        page_count=row.page_count,
+        has_cover=row.cover_path is not None,
+    )
+
+
+@book_file_router.get(
+    "/{id}/content",
+    response_class=FileResponse,
+    summary="Download a book file 📥",
+    description="Send the stored file as is. Supports `Range`/`If-Range` "
+    "for resumable downloads and partial reads. 📄",
+)
+async def download_book_file(id: UUID, request: Request):
+    book_file = None
+    async with SessionManager.read_session() as session:
+        book_file = await session.scalar(select(BookFile).where(BookFile.id == id))
+
+    path = Path(book_file.path) if book_file else None
+    if path is None or not path.is_file():
+        logger.warning("Book file with id %s not found", id)
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    headers = {}
+    if book_file.sha256:
+        # Файл адресуется по содержимому, поэтому sha256 — сильный ETag.
+        version = Version(
+            etag=f'"{book_file.sha256}"',
+            last_modified=formatdate(path.stat().st_mtime, usegmt=True),
+        )
+        if is_not_modified(request, version):
+            return not_modified_response(version)
+        headers = version_headers(version)
+
+    media_type = book_file.mime_type or mimetypes.guess_type(path.name)[0]
+    return FileResponse(
+        path,
+        media_type=media_type or "application/octet-stream",
+        filename=f"{book_file.id}{book_file.file_type}",
+        headers=headers,
+    )
+
+
+@book_file_router.get(
+    "/{id}/cover",
+    response_class=FileResponse,
+    summary="Download a book file cover 🖼️",
+    description="Cover image extracted by background processing, "
+    "404 until it is done or if the file has none. 📕",
+)
+async def download_book_file_cover(id: UUID, request: Request):
+    cover_path = None
+    async with SessionManager.read_session() as session:
+        cover_path = await session.scalar(
+            select(BookFile.cover_path).where(BookFile.id == id)
+        )
+
+    path = Path(cover_path) if cover_path else None
+    if path is None or not path.is_file():
+        logger.warning("Cover of book file with id %s not found", id)
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    # Путь обложки — её sha256, как и у самого файла.
+    version = Version(
+        etag=f'"{path.stem}"',
+        last_modified=formatdate(path.stat().st_mtime, usegmt=True),
+    )
+    if is_not_modified(request, version):
+        return not_modified_response(version)
+
+    media_type, _ = mimetypes.guess_type(path.name)
+    return FileResponse(
+        path,
+        media_type=media_type or "application/octet-stream",
+        headers=version_headers(version),
+    )
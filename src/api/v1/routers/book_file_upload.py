@@ -0,0 +1,348 @@
+import logging
+from datetime import timedelta
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.v1.dependencies import rate_limiter
+from api.v1.routers.book_file import save_book_file
+from api.v1.schemas import (
+    BookFileRead,
+    BookFileUploadChunkRead,
+    BookFileUploadComplete,
+    BookFileUploadCreate,
+    BookFileUploadRead,
+)
+from core.setting import appSetting
+from database.mixin import utcnow
+from database.model import BookFileUpload, BookFileUploadChunk
+from database.session import SessionManager
+from utils.file import FileManager
+
+logger = logging.getLogger(__name__)
+
+# Сколько недостающих частей перечислять в ответе 409.
+MISSING_LIMIT = 100
+
+# Общий лимит запросов стоит только на открытии и завершении загрузки:
+# файл в 4 ГиБ — это сотни PUT частей, и они не должны выедать корзину.
+book_file_upload_router = APIRouter(
+    prefix="/book-file/uploads",
+    tags=["Book File Management"],
+)
+
+
+def chunk_count(upload: BookFileUpload) -> int:
+    return -(-upload.size // upload.chunk_size)
+
+
+def chunk_span(upload: BookFileUpload, index: int) -> tuple[int, int]:
+    """Смещение и длина части: все части равны, кроме последней."""
+    offset = index * upload.chunk_size
+    return offset, min(upload.chunk_size, upload.size - offset)
+
+
+async def load_upload(
+    session: AsyncSession, id: UUID
+) -> tuple[Optional[BookFileUpload], list[int]]:
+    upload = await session.scalar(select(BookFileUpload).where(BookFileUpload.id == id))
+    if upload is None:
+        return None, []
+    received = await session.scalars(
+        select(BookFileUploadChunk.index)
+        .where(BookFileUploadChunk.upload_id == id)
+        .order_by(BookFileUploadChunk.index)
+    )
+    return upload, list(received)
+
+
+def upload_read(upload: BookFileUpload, received: list[int]) -> BookFileUploadRead:
+    return BookFileUploadRead(
+        id=upload.id,
+        publishing_house_id=upload.pub_id,
+        filename=upload.filename,
+        size=upload.size,
+        chunk_size=upload.chunk_size,
+        chunk_count=chunk_count(upload),
+        received=received,
+    )
+
+
+async def set_completing(id: UUID, completing: bool) -> Optional[BookFileUpload]:
+    """
+    Переключает `completing` условным UPDATE:
+      - из двух параллельных `complete` флаг получает только один
+      - пока он стоит, новые части не принимаются
+    """
+    upload = None
+    async with SessionManager.scoped_session() as session:
+        upload = await session.scalar(
+            update(BookFileUpload)
+            .where(
+                BookFileUpload.id == id, BookFileUpload.completing.is_(not completing)
+            )
+            .values(completing=completing)
+            .returning(BookFileUpload)
+        )
+        await session.commit()
+    return upload
+
+
+async def missing_chunks(upload: BookFileUpload) -> list[int]:
+    """Полноту проверяет `count(*)`, номера частей читаются только при нехватке."""
+    missing = []
+    async with SessionManager.scoped_session() as session:
+        received = await session.scalar(
+            select(func.count()).where(BookFileUploadChunk.upload_id == upload.id)
+        )
+        if received < chunk_count(upload):
+            indexes = await session.scalars(
+                select(BookFileUploadChunk.index).where(
+                    BookFileUploadChunk.upload_id == upload.id
+                )
+            )
+            missing = sorted(set(range(chunk_count(upload))) - set(indexes))
+    return missing
+
+
+async def purge_expired() -> None:
+    """Брошенные загрузки удаляются целиком через `UPLOADTTL` после начала."""
+    ttl = appSetting.STORAGE.UPLOADTTL
+    expired = []
+    async with SessionManager.scoped_session() as session:
+        expired = (
+            await session.scalars(
+                delete(BookFileUpload)
+                .where(BookFileUpload.created_at < utcnow() - timedelta(seconds=ttl))
+                .returning(BookFileUpload.id)
+            )
+        ).all()
+        await session.commit()
+    await FileManager.remove_parts(*expired, older_than=ttl)
+    if expired:
+        logger.info("Purged %s expired uploads", len(expired))
+
+
+@book_file_upload_router.post(
+    "",
+    response_model=BookFileUploadRead,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limiter)],
+    summary="Start a chunked upload 🧩",
+    description="Open a resumable upload of `size` bytes. Send the chunks with "
+    "`PUT /{id}/chunks/{index}` in any order and in parallel, then "
+    "`POST /{id}/complete`. 📤",
+)
+async def create_upload(new_upload: BookFileUploadCreate):
+    max_chunk = appSetting.STORAGE.UPLOADCHUNKSIZE
+    # Частей не больше `UPLOADMAXCHUNKS`: слишком мелкие части укрупняются.
+    min_chunk = -(-new_upload.size // appSetting.STORAGE.UPLOADMAXCHUNKS)
+    if new_upload.size > appSetting.STORAGE.UPLOADMAXSIZE:
+        raise HTTPException(
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            f"File is larger than {appSetting.STORAGE.UPLOADMAXSIZE} bytes",
+        )
+    await purge_expired()
+
+    upload = None
+    async with SessionManager.scoped_session() as session:
+        stmt = (
+            insert(BookFileUpload)
+            .values(
+                filename=new_upload.filename,
+                size=new_upload.size,
+                chunk_size=max(
+                    min(new_upload.chunk_size or max_chunk, max_chunk), min_chunk
+                ),
+                pub_id=new_upload.publishing_house_id,
+            )
+            .returning(BookFileUpload)
+        )
+        upload = await session.scalar(stmt)
+        await session.commit()
+
+    if upload is None:
+        logger.warning(
+            "Publishing house with id %s not found", new_upload.publishing_house_id
+        )
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    await FileManager.create_part(upload.id, upload.size)
+    logger.info(
+        "Started upload %s of %s (%s bytes, %s chunks)",
+        upload.id,
+        upload.filename,
+        upload.size,
+        chunk_count(upload),
+    )
+    return upload_read(upload, [])
+
+
+@book_file_upload_router.get(
+    "/{id}",
+    response_model=BookFileUploadRead,
+    summary="Get chunked upload state 🧩",
+    description="Chunks already received, to resume after a dropped connection. 🔁",
+)
+async def get_upload(id: UUID):
+    upload = None
+    async with SessionManager.scoped_session() as session:
+        upload, received = await load_upload(session, id)
+
+    if upload is None:
+        logger.warning("Upload with id %s not found", id)
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    return upload_read(upload, received)
+
+
+@book_file_upload_router.put(
+    "/{id}/chunks/{index}",
+    response_model=BookFileUploadChunkRead,
+    summary="Upload a chunk 🧩",
+    description="Raw chunk bytes at `index * chunk_size`. Every chunk but the last "
+    "is exactly `chunk_size` bytes. Optional `X-Chunk-SHA256` is verified. "
+    "Re-sending a chunk overwrites it. 📦",
+)
+async def put_chunk(id: UUID, index: int, request: Request):
+    upload = None
+    async with SessionManager.scoped_session() as session:
+        upload = await session.scalar(
+            select(BookFileUpload).where(BookFileUpload.id == id)
+        )
+
+    if upload is None:
+        logger.warning("Upload with id %s not found", id)
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    if upload.completing:
+        raise HTTPException(status.HTTP_409_CONFLICT, "Upload is completing")
+    if not 0 <= index < chunk_count(upload):
+        raise HTTPException(
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            f"Chunk index must be below {chunk_count(upload)}",
+        )
+
+    offset, size = chunk_span(upload, index)
+    # Тело читается потоком и обрывается, как только превысит длину части.
+    data = bytearray()
+    async for piece in request.stream():
+        data += piece
+        if len(data) > size:
+            break
+    if len(data) != size:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            f"Chunk {index} must be {size} bytes",
+        )
+
+    try:
+        sha256 = await FileManager.write_part(
+            upload.id, offset, bytes(data), request.headers.get("x-chunk-sha256")
+        )
+    except FileNotFoundError:
+        # Загрузку уже завершили или отменили, в том числе пока часть ждала
+        # блокировку файла.
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, f"Chunk {index}: {e}")
+
+    async with SessionManager.scoped_session() as session:
+        # Повтор части заменяет запись о ней: одинаково на SQLite и Postgres.
+        await session.execute(
+            delete(BookFileUploadChunk).where(
+                BookFileUploadChunk.upload_id == id,
+                BookFileUploadChunk.index == index,
+            )
+        )
+        await session.execute(
+            insert(BookFileUploadChunk).values(
+                upload_id=id, index=index, size=size, sha256=sha256
+            )
+        )
+        await session.commit()
+
+    logger.info("Received chunk %s of upload %s", index, id)
+    return BookFileUploadChunkRead(index=index, offset=offset, size=size, sha256=sha256)
+
+
+@book_file_upload_router.post(
+    "/{id}/complete",
+    response_model=BookFileRead,
+    dependencies=[Depends(rate_limiter)],
+    summary="Complete a chunked upload ✅",
+    description="Check that all chunks arrived, move the file into storage "
+    "without copying and queue its processing. 📚",
+)
+async def complete_upload(id: UUID, body: Optional[BookFileUploadComplete] = None):
+    upload = await set_completing(id, True)
+    if upload is None:
+        async with SessionManager.scoped_session() as session:
+            upload = await session.scalar(
+                select(BookFileUpload.id).where(BookFileUpload.id == id)
+            )
+        if upload is None:
+            logger.warning("Upload with id %s not found", id)
+            raise HTTPException(status.HTTP_404_NOT_FOUND)
+        raise HTTPException(status.HTTP_409_CONFLICT, "Upload is already completing")
+
+    try:
+        missing = await missing_chunks(upload)
+        if missing:
+            raise HTTPException(
+                status.HTTP_409_CONFLICT,
+                {
+                    "message": "Upload is incomplete",
+                    "missing": missing[:MISSING_LIMIT],
+                    "missing_count": len(missing),
+                },
+            )
+        stored = await FileManager.commit_part(
+            upload.id, upload.filename, body.sha256 if body else None
+        )
+    except FileNotFoundError:
+        # Загрузку отменили, пока шла проверка.
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        await set_completing(id, False)
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(e))
+    except HTTPException:
+        await set_completing(id, False)
+        raise
+
+    # Если издательство удалили, `save_book_file` уберёт и сам файл.
+    book_file = await save_book_file(
+        upload.pub_id, stored, delete(BookFileUpload).where(BookFileUpload.id == id)
+    )
+    if book_file is None:
+        logger.warning("Publishing house with id %s not found", upload.pub_id)
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    logger.info("Completed upload %s as book file %s", id, book_file.id)
+    return BookFileRead.model_validate(book_file)
+
+
+@book_file_upload_router.delete(
+    "/{id}",
+    response_model=dict,
+    summary="Abort a chunked upload 🗑️",
+    description="Drop the upload and the chunks received so far. 🛑",
+)
+async def delete_upload(id: UUID):
+    deleted_id = None
+    async with SessionManager.scoped_session() as session:
+        deleted_id = await session.scalar(
+            delete(BookFileUpload)
+            .where(BookFileUpload.id == id)
+            .returning(BookFileUpload.id)
+        )
+        await session.commit()
+
+    if deleted_id is None:
+        logger.warning("Upload with id %s not found", id)
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    await FileManager.remove_parts(id)
+    logger.info("Aborted upload %s", id)
+    return {"message": "Upload aborted"}
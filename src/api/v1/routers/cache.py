@@ -0,0 +1,19 @@
+import logging
+from fastapi import APIRouter, Depends
+from api.v1.dependencies import rate_limiter, response_cache
+
+logger = logging.getLogger(__name__)
+
+cache_router = APIRouter(
+    prefix="/cache", tags=["🗄️ Cache"], dependencies=[Depends(rate_limiter)]
+)
+
+
+@cache_router.get(
+    "/stats",
+    response_model=dict,
+    summary="Response cache statistics 📊",
+    description="Hit and miss counters of the response cache in this worker. 🎯",
+)
+async def cache_stats():
+    return response_cache.stats()
@@ -1,16 +1,55 @@
 import logging
 from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
-from api.v1.dependencies import rate_limiter
+import orjson
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from api.v1.conditional import (
+    collection_version_stmt,
+    is_not_modified,
+    make_version,
+    not_modified_response,
+    publishing_house_version_stmt,
+    version_headers,
+)
+from api.v1.dependencies import (
+    CachedResponse,
+    book_cache_key,
+    publishing_house_cache_key,
+    rate_limiter,
+    response_cache,
+)
+from api.v1.bulk import Item, bulk_openapi, run_bulk, split_found
+from api.v1.expand import (
+    PUBLISHING_HOUSE_EXPAND,
+    expand_query,
+    publishing_house_levels,
+)
+from api.v1.filters import PUBLISHING_HOUSE_SORT, PublishingHouseFilter
+from api.v1.pagination import Pagination, Sort, sort_query
+from api.v1.serialize import PUBLISHING_HOUSE, json_response, regroup, tree_stmt
 from api.v1.schemas import (
+    BulkItemResult,
+    BulkResult,
+    Page,
+    PublishingHouseBulkCreate,
+    PublishingHouseBulkUpdate,
     PublishingHouseCreate,
     PublishingHouseRead,
+    PublishingHouseReadFlat,
     PublishingHouseUpdate,
 )
 from database.session import SessionManager
 from sqlalchemy import insert, select, update, delete
-from database.model import PublishingHouse
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.model import Book, BookFile, PublishingHouse
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +60,139 @@ publishing_house_router = APIRouter(
 )
 
 
+async def insert_publishing_houses(
+    session: AsyncSession, items: list[Item[PublishingHouseBulkCreate]]
+) -> tuple[list[BulkItemResult], set[str]]:
+    stmt = select(Book.id).where(Book.id.in_([pub.book_id for _, pub in items]))
+    found, missing = split_found(
+        items, set((await session.scalars(stmt)).all()), lambda pub: pub.book_id
+    )
+    results = [
+        BulkItemResult(
+            index=index, status=status.HTTP_404_NOT_FOUND, error="Book not found"
+        )
+        for index, _ in missing
+    ]
+    if found:
+        stmt = insert(PublishingHouse).returning(
+            PublishingHouse.id, sort_by_parameter_order=True
+        )
+        ids = (
+            await session.scalars(stmt, [pub.model_dump() for _, pub in found])
+        ).all()
+        results += [
+            BulkItemResult(index=index, id=id, status=status.HTTP_201_CREATED)
+            for (index, _), id in zip(found, ids)
+        ]
+    return results, {book_cache_key(pub.book_id) for _, pub in found}
+
+
+async def update_publishing_houses(
+    session: AsyncSession, items: list[Item[PublishingHouseBulkUpdate]]
+) -> tuple[list[BulkItemResult], set[str]]:
+    stmt = select(PublishingHouse.id, PublishingHouse.book_id).where(
+        PublishingHouse.id.in_([pub.id for _, pub in items])
+    )
+    parents = dict((await session.execute(stmt)).tuples().all())
+    found, missing = split_found(items, set(parents), lambda pub: pub.id)
+    values = [pub.model_dump(exclude_none=True) for _, pub in found]
+    if values := [value for value in values if len(value) > 1]:
+        await session.execute(update(PublishingHouse), values)
+
+    results = [
+        BulkItemResult(index=index, id=pub.id, status=status.HTTP_200_OK)
+        for index, pub in found
+    ] + [
+        BulkItemResult(index=index, id=pub.id, status=status.HTTP_404_NOT_FOUND)
+        for index, pub in missing
+    ]
+    cache_keys = {publishing_house_cache_key(pub.id) for _, pub in found}
+    return results, cache_keys | {book_cache_key(parents[pub.id]) for _, pub in found}
+
+
+async def delete_publishing_houses(
+    session: AsyncSession, items: list[Item[UUID]]
+) -> tuple[list[BulkItemResult], set[str]]:
+    stmt = (
+        delete(PublishingHouse)
+        .where(PublishingHouse.id.in_([id for _, id in items]))
+        .returning(PublishingHouse.id, PublishingHouse.book_id)
+    )
+    parents = dict((await session.execute(stmt)).tuples().all())
+
+    results = [
+        BulkItemResult(
+            index=index,
+            id=id,
+            status=status.HTTP_200_OK if id in parents else status.HTTP_404_NOT_FOUND,
+        )
+        for index, id in items
+    ]
+    cache_keys = {publishing_house_cache_key(id) for id in parents}
+    return results, cache_keys | {book_cache_key(id) for id in parents.values()}
+
+
+@publishing_house_router.post(
+    "/bulk",
+    response_model=BulkResult,
+    summary="Create publishing houses in bulk 🏢🏢",
+    description="Create many publishing houses from a JSON array or an NDJSON "
+    "stream of `PublishingHouseCreate` objects with a `book_id`. 🏭",
+    openapi_extra=bulk_openapi(PublishingHouseBulkCreate.model_json_schema()),
+)
+async def bulk_create_publishing_houses(request: Request):
+    logger.info("Starting bulk publishing house creation")
+    result = await run_bulk(
+        request, PublishingHouseBulkCreate, insert_publishing_houses
+    )
+    logger.info(
+        "Bulk created %s publishing houses, %s failed",
+        result.succeeded,
+        result.failed,
+    )
+    return result
+
+
+@publishing_house_router.patch(
+    "/bulk",
+    response_model=BulkResult,
+    summary="Update publishing houses in bulk ✏️✏️",
+    description="Update many publishing houses from a JSON array or an NDJSON "
+    "stream of `PublishingHouseUpdate` objects with an `id`. 🛠️",
+    openapi_extra=bulk_openapi(PublishingHouseBulkUpdate.model_json_schema()),
+)
+async def bulk_update_publishing_houses(request: Request):
+    logger.info("Starting bulk publishing house update")
+    result = await run_bulk(
+        request, PublishingHouseBulkUpdate, update_publishing_houses
+    )
+    logger.info(
+        "Bulk updated %s publishing houses, %s failed",
+        result.succeeded,
+        result.failed,
+    )
+    return result
+
+
+@publishing_house_router.delete(
+    "/bulk",
+    response_model=BulkResult,
+    summary="Delete publishing houses in bulk 🗑️🗑️",
+    description="Delete many publishing houses from a JSON array or an NDJSON "
+    "stream of IDs. 🚫",
+    openapi_extra=bulk_openapi({"type": "string", "format": "uuid"}),
+)
+async def bulk_delete_publishing_houses(request: Request):
+    logger.info("Starting bulk publishing house deletion")
+    result = await run_bulk(request, UUID, delete_publishing_houses)
+    logger.info(
+        "Bulk deleted %s publishing houses, %s failed",
+        result.succeeded,
+        result.failed,
+    )
+    return result
+
+
 @publishing_house_router.post(
     "/{book_id}",
     response_model=PublishingHouseRead,
@@ -31,6 +203,7 @@ async def create_publishing_house(
     book_id: UUID, new_publishing_house: PublishingHouseCreate
 ):
     logger.info("Creating publishing house for book_id: %s", book_id)
+    publishing_house = None
     async with SessionManager.scoped_session() as session:
         stmt = (
             insert(PublishingHouse)
@@ -40,51 +213,120 @@ async def create_publishing_house(
         publishing_house = await session.scalar(stmt)
         await session.commit()
 
+    # Нарушение внешнего ключа откатывается в scoped_session.
+    if publishing_house is None:
+        logger.warning("Book with id %s not found for publishing house", book_id)
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    await response_cache.delete(book_cache_key(book_id))
     logger.info("Publishing house created with id: %s", publishing_house.id)
     return PublishingHouseRead.model_validate(publishing_house)
 
 
 @publishing_house_router.get(
     "/",
-    response_model=list[PublishingHouseRead],
+    response_model=Page[PublishingHouseRead | PublishingHouseReadFlat],
     summary="List all publishing houses 🏢",
-    description="Retrieve a list of all registered publishing houses. 📋",
+    description="Retrieve a page of registered publishing houses. "
+    "Filter by `lang`, `book_id`, `file_type` and creation time, "
+    "order with `sort`, pass `next_cursor` back as `cursor` to get the next page, "
+    "and `expand=files` to include book files. 📋",
 )
-async def list_publishing_houses():
-    logger.info("Fetching all publishing houses")
-    async with SessionManager.scoped_session() as session:
-        stmt = select(PublishingHouse)
-        publishing_houses = (await session.scalars(stmt)).all()
+async def list_publishing_houses(
+    request: Request,
+    pagination: Pagination = Depends(),
+    filters: PublishingHouseFilter = Depends(),
+    sort: Sort = Depends(sort_query(PUBLISHING_HOUSE_SORT)),
+    expand: frozenset[str] = Depends(expand_query(PUBLISHING_HOUSE_EXPAND)),
+):
+    logger.info(
+        "Fetching publishing houses: %s, %s, sort=%s, expand=%s",
+        pagination,
+        filters,
+        sort,
+        set(expand),
+    )
+    page = pagination.apply(
+        filters.apply(PUBLISHING_HOUSE.select()), PublishingHouse, sort
+    ).subquery()
+    levels = publishing_house_levels(expand)
+    stmt = tree_stmt(
+        page, levels, *pagination.ordering(page.c[sort.field], page.c.id, sort)
+    )
+    publishing_houses = None
+    async with SessionManager.read_session() as session:
+        stamp = await session.execute(
+            collection_version_stmt(PublishingHouse, BookFile)
+        )
+        version = make_version(*stamp.one(), request.url.query)
+        if is_not_modified(request, version):
+            logger.info(
+                "Publishing houses not modified since %s", version.last_modified
+            )
+            return not_modified_response(version)
+
+        rows = (await session.execute(stmt)).all()
+        heads, publishing_houses = regroup(rows, levels)
 
+    if publishing_houses is None:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE)
+    heads, next_cursor = pagination.page(heads, sort)
+    publishing_houses = publishing_houses[: len(heads)]
     if not publishing_houses:
         logger.info("No publishing houses found")
-        return []
 
     logger.info("Fetched %s publishing houses", len(publishing_houses))
-    return [
-        PublishingHouseRead.model_validate(publishing_house)
-        for publishing_house in publishing_houses
-    ]
+    return json_response(
+        {"items": publishing_houses, "next_cursor": next_cursor},
+        version_headers(version),
+    )
 
 
 @publishing_house_router.get(
     "/{id}",
-    response_model=PublishingHouseRead,
+    response_model=PublishingHouseRead | PublishingHouseReadFlat,
     summary="Get publishing house details 🏛️",
-    description="Retrieve details of a specific publishing house by its ID. 🔍",
+    description="Retrieve details of a specific publishing house by its ID. "
+    "Book files are included unless narrowed with `expand`. 🔍",
 )
-async def get_publishing_house(id: UUID):
-    logger.info("Fetching publishing house with id: %s", id)
-    async with SessionManager.scoped_session() as session:
-        stmt = select(PublishingHouse).where(PublishingHouse.id == id)
-        publishing_house = await session.scalar(stmt)
+async def get_publishing_house(
+    id: UUID,
+    request: Request,
+    expand: frozenset[str] = Depends(expand_query(PUBLISHING_HOUSE_EXPAND, "files")),
+):
+    logger.info("Fetching publishing house with id: %s, expand=%s", id, set(expand))
+    # Кэшируется только полное представление, его и инвалидируют при записи.
+    full = expand == frozenset(PUBLISHING_HOUSE_EXPAND)
+    key = publishing_house_cache_key(id) if full else None
+    if key and (raw := await response_cache.get(key)) is not None:
+        logger.info("Publishing house with id %s served from cache", id)
+        return CachedResponse.unpack(raw).to_response(request, hit=True)
+
+    publishing_house = None
+    # Промах кэша читается с primary: в кэш не попадёт отставшая реплика.
+    async with SessionManager.read_session(primary=key is not None) as session:
+        stamp = await session.execute(publishing_house_version_stmt(id))
+        if stamp := stamp.first():
+            version = make_version(*stamp, ",".join(sorted(expand)))
+            if is_not_modified(request, version):
+                logger.info("Publishing house with id %s not modified", id)
+                return not_modified_response(version, {"X-Cache": "MISS"})
+
+            levels = publishing_house_levels(expand)
+            root = PUBLISHING_HOUSE.select().where(PublishingHouse.id == id).subquery()
+            rows = (await session.execute(tree_stmt(root, levels))).all()
+            _, publishing_houses = regroup(rows, levels)
+            publishing_house = publishing_houses[0] if publishing_houses else None
 
     if not publishing_house:
         logger.warning("Publishing house with id %s not found", id)
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
     logger.info("Publishing house with id %s found", id)
-    return PublishingHouseRead.model_validate(publishing_house)
+    cached = CachedResponse(orjson.dumps(publishing_house), version)
+    if key:
+        await response_cache.set(key, cached.pack())
+    return cached.to_response(request, hit=False)
 
 
 @publishing_house_router.patch(
@@ -100,6 +342,9 @@ async def update_publishing_house(
 ):
     logger.info("Updating publishing house with id: %s", id)
     async with SessionManager.scoped_session() as session:
+        old_book_id = await session.scalar(
+            select(PublishingHouse.book_id).where(PublishingHouse.id == id)
+        )
         stmt = (
             update(PublishingHouse)
             .where(PublishingHouse.id == id)
@@ -113,6 +358,11 @@ async def update_publishing_house(
         logger.warning("Publishing house with id %s not found", id)
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
+    await response_cache.delete(
+        publishing_house_cache_key(id),
+        book_cache_key(old_book_id),
+        book_cache_key(publishing_house.book_id),
+    )
     logger.info("Publishing house with id %s updated successfully", id)
     return PublishingHouseRead.model_validate(publishing_house)
 
@@ -129,15 +379,18 @@ async def delete_publishing_house(id: UUID):
         stmt = (
             delete(PublishingHouse)
             .where(PublishingHouse.id == id)
-            .returning(PublishingHouse.id)
+            .returning(PublishingHouse.id, PublishingHouse.book_id)
         )
-        deleted_id = await session.scalar(stmt)
+        deleted = (await session.execute(stmt)).first()
         await session.commit()
 
-    if not deleted_id:
+    if not deleted:
         logger.warning("Publishing house with id %s not found for deletion", id)
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
+    deleted_id, book_id = deleted
+    await response_cache.delete(publishing_house_cache_key(id), book_cache_key(book_id))
+
     logger.info("Publishing house with id %s deleted successfully", id)
     return {
         "message": "Publishing house successfully deleted. 🏢",
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Annotated, Optional
+from typing import Annotated, Generic, Optional, TypeVar
 from uuid import UUID
-from pydantic import BaseModel, ConfigDict, ByteSize, PlainSerializer
+from pydantic import BaseModel, ConfigDict, ByteSize, Field, PlainSerializer
 
 
 class BaseReadSchemas(BaseModel):
@@ -12,6 +12,32 @@ class BaseReadSchemas(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: int
+    id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    items: list[BulkItemResult]
+
+    @classmethod
+    def from_items(cls, items: list[BulkItemResult]) -> "BulkResult":
+        succeeded = sum(item.status < 400 for item in items)
+        return cls(succeeded=succeeded, failed=len(items) - succeeded, items=items)
+
+
 ###BOOK###
 class BookCreate(BaseModel):
     title: str
@@ -27,10 +53,32 @@ class BookUpdate(BaseModel):
     page_count: Optional[int] = None
 
 
-class BookRead(BookCreate, BaseReadSchemas):
+class BookBulkUpdate(BookUpdate):
+    id: UUID
+
+
+class BookReadFlat(BookCreate, BaseReadSchemas):
+    pass
+
+
+class BookReadWithPubs(BookReadFlat):
+    pubs: list["PublishingHouseReadFlat"]
+
+
+class BookRead(BookReadFlat):
     pubs: list["PublishingHouseRead"]
 
 
+class BookSummaryRead(BaseModel):
+    book_id: UUID
+    pub_count: int
+    file_count: int
+    total_bytes: int
+    last_changed: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 ###PublishingHouse###
 class PublishingHouseCreate(BaseModel):
     name: str
@@ -42,7 +90,19 @@ class PublishingHouseUpdate(BaseModel):
     lang: Optional[str] = None
 
 
-class PublishingHouseRead(PublishingHouseCreate, BaseReadSchemas):
+class PublishingHouseBulkCreate(PublishingHouseCreate):
+    book_id: UUID
+
+
+class PublishingHouseBulkUpdate(PublishingHouseUpdate):
+    id: UUID
+
+
+class PublishingHouseReadFlat(PublishingHouseCreate, BaseReadSchemas):
+    pass
+
+
+class PublishingHouseRead(PublishingHouseReadFlat):
     files: list["BookFileRead"]
 
 
@@ -55,3 +115,44 @@ class BookFileRead(BaseReadSchemas):
             lambda v: v.human_readable(), return_type=str, when_used="json"
         ),
     ]
+    sha256: Optional[str] = None
+    mime_type: Optional[str] = None
+    page_count: Optional[int] = None
+
+
+class BookFileStatus(BaseModel):
+    id: UUID
+    status: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    mime_type: Optional[str] = None
+    page_count: Optional[int] = None
+    has_cover: bool = False
+
+
+class BookFileUploadCreate(BaseModel):
+    publishing_house_id: UUID
+    filename: str = Field(min_length=1, max_length=255)
+    size: int = Field(ge=1)
+    chunk_size: Optional[int] = Field(None, ge=1)
+
+
+class BookFileUploadRead(BaseModel):
+    id: UUID
+    publishing_house_id: UUID
+    filename: str
+    size: int
+    chunk_size: int
+    chunk_count: int
+    received: list[int]
+
+
+class BookFileUploadChunkRead(BaseModel):
+    index: int
+    offset: int
+    size: int
+    sha256: str
+
+
+class BookFileUploadComplete(BaseModel):
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")
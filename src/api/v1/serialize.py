@@ -0,0 +1,159 @@
+from typing import Any, Callable, NamedTuple, Optional, Sequence
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, ByteSize
+from sqlalchemy import Row, Select, Subquery, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.v1.schemas import BookFileRead, BookReadFlat, PublishingHouseReadFlat
+from database.model import Book, BookFile, PublishingHouse
+
+
+class RowMapper:
+    """
+    Строка БД в JSON-готовый словарь без Pydantic:
+      - поля и их порядок берутся из плоской схемы чтения, `select()` выбирает
+        колонки в том же порядке, и строка раскладывается по ним через `zip`
+      - `convert` повторяет сериализаторы схемы для отдельных полей
+      - UUID и datetime оставляются как есть, их кодирует orjson
+    """
+
+    def __init__(
+        self,
+        model,
+        schema: type[BaseModel],
+        convert: Optional[dict[str, Callable[[Any], Any]]] = None,
+    ) -> None:
+        self.model = model
+        self.fields = tuple(schema.model_fields)
+        self.columns = tuple(getattr(model, field) for field in self.fields)
+        self.id_index = self.fields.index("id")
+        self.convert = convert or {}
+
+    def __call__(self, row) -> dict[str, Any]:
+        item = dict(zip(self.fields, row))
+        for field, convert in self.convert.items():
+            item[field] = convert(item[field])
+        return item
+
+    def select(self, *extra):
+        return select(*self.columns, *extra)
+
+
+BOOK = RowMapper(Book, BookReadFlat)
+PUBLISHING_HOUSE = RowMapper(PublishingHouse, PublishingHouseReadFlat)
+BOOK_FILE = RowMapper(
+    BookFile, BookFileRead, {"size": lambda size: ByteSize(size).human_readable()}
+)
+
+
+# Как у `selectinload`: столько id в одном `IN (...)`.
+IN_BATCH = 500
+
+
+async def attach(
+    session: AsyncSession,
+    parents: Sequence[dict[str, Any]],
+    key: str,
+    mapper: RowMapper,
+    parent_id,
+) -> list[dict[str, Any]]:
+    """
+    Дети запросами `parent_id IN (...)`, как `selectinload`:
+      - родители идут пачками по `IN_BATCH`, чтобы не упереться в лимит
+        параметров драйвера
+      - каждому родителю кладётся список `key`, пустой, если детей нет
+      - возвращаются все дети, чтобы так же подгрузить следующий уровень
+    """
+    by_id = {parent["id"]: parent for parent in parents}
+    for parent in parents:
+        parent[key] = []
+
+    ids = list(by_id)
+    children = []
+    for start in range(0, len(ids), IN_BATCH):
+        stmt = (
+            mapper.select(parent_id)
+            .where(parent_id.in_(ids[start : start + IN_BATCH]))
+            .order_by(mapper.model.created_at, mapper.model.id)
+        )
+        for row in await session.execute(stmt):
+            child = mapper(row)
+            by_id[row[-1]][key].append(child)
+            children.append(child)
+    return children
+
+
+class Level(NamedTuple):
+    """Уровень вложенного документа: список `key` у родителя по `parent_id`."""
+
+    mapper: RowMapper
+    key: Optional[str] = None
+    parent_id: Any = None
+
+
+def tree_stmt(
+    root: Subquery, levels: Sequence[Level], *order_by, extra: Sequence = ()
+) -> Select:
+    """
+    Документы целиком одним запросом:
+      - `root` — подзапрос страницы, LIMIT считается по корням, а не по строкам JOIN
+      - уровни присоединяются LEFT JOIN цепочкой, корни без детей не теряются
+      - `order_by` задаёт порядок корней, дети идут по `(created_at, id)`
+      - `extra` — колонки после всех уровней, например ранг для курсора
+    """
+    stmt = select(*(root.c[field] for field in levels[0].mapper.fields))
+    parent_id = root.c.id
+    order = list(order_by)
+    for level in levels[1:]:
+        model = level.mapper.model
+        stmt = stmt.add_columns(*level.mapper.columns).outerjoin(
+            model, level.parent_id == parent_id
+        )
+        parent_id = model.id
+        order += [model.created_at, model.id]
+    return stmt.add_columns(*extra).order_by(*order)
+
+
+def regroup(
+    rows: Sequence[Row], levels: Sequence[Level]
+) -> tuple[list[Row], list[dict[str, Any]]]:
+    """
+    Собирает плоский результат `tree_stmt` обратно в дерево:
+      - колонки строки идут уровнями подряд, узел узнаётся по `id`
+      - пустая сторона LEFT JOIN (`id` = NULL) обрывает ветку
+      - возвращает первую строку каждого корня (для курсора) и сами документы
+    """
+    seen: list[dict[Any, dict[str, Any]]] = [{} for _ in levels]
+    heads, roots = [], []
+    for row in rows:
+        parent = None
+        start = 0
+        for depth, level in enumerate(levels):
+            end = start + len(level.mapper.fields)
+            part = row[start:end]
+            start = end
+            id = part[level.mapper.id_index]
+            if id is None:
+                break
+
+            node = seen[depth].get(id)
+            if node is None:
+                node = seen[depth][id] = level.mapper(part)
+                if depth + 1 < len(levels):
+                    node[levels[depth + 1].key] = []
+                if parent is None:
+                    heads.append(row)
+                    roots.append(node)
+                else:
+                    parent[level.key].append(node)
+            parent = node
+    return heads, roots
+
+
+def json_response(content: Any, headers: Optional[dict[str, str]] = None) -> Response:
+    """Готовый JSON: FastAPI не валидирует его повторно по `response_model`."""
+    return Response(
+        orjson.dumps(content), media_type="application/json", headers=headers
+    )
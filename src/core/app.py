@@ -1,15 +1,23 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 import logging
 import random
 import uuid
 from fastapi import FastAPI, Request, status
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.gzip import GZipMiddleware
 import uvloop
+from api.v1.dependencies import rate_limit_backend, response_cache
+from api.v1.jobs import job_queue
 from database.session import SessionManager
+from database.mixin import set_id_generator
 from database.model import CoreModel
-from core.logger import configure_logging
+import database.summary  # noqa: F401 — триггеры счётчиков книг
+import database.version  # noqa: F401 — триггеры версий списков
+from core.compression import CompressionMiddleware
+from core.context import REQUEST_ID_HEADER, RequestContextMiddleware
+from core.logger import configure_logging, stop_logging
+from core.metrics import MetricsMiddleware, flush_periodically, metrics
 from core.setting import appSetting
 
 
@@ -25,12 +33,51 @@ async def lifespan(app: FastAPI):
         appSetting.LOGGER.BACKUPCOUNT,
         True,
         appSetting.LOGGER.BLACKSET,
+        appSetting.LOGGER.QUEUESIZE,
+        appSetting.LOGGER.QUEUEPOLICY,
+        # Несколько воркеров не должны ротировать один и тот же файл.
+        appSetting.LOGGER.PERPROCESS or appSetting.API.WORKERS > 1,
+        appSetting.LOGGER.FORMAT == "json",
     )
-    await SessionManager(appSetting.DATABASE.URL).init_db(CoreModel.metadata)
+    set_id_generator(appSetting.DATABASE.IDVERSION)
+    await SessionManager(
+        appSetting.DATABASE.URL,
+        pragmas=appSetting.DATABASE.PRAGMAS,
+        replicas=appSetting.DATABASE.REPLICAS,
+        strategy=appSetting.DATABASE.REPLICASTRATEGY,
+        sticky_seconds=appSetting.DATABASE.STICKYSECONDS,
+        **appSetting.DATABASE.ENGINEOPTIONS,
+    ).init_db(CoreModel.metadata)
+    tasks = []
+    if appSetting.METRICS.ENABLED:
+        tasks.append(
+            asyncio.create_task(
+                flush_periodically(metrics, appSetting.METRICS.INTERVAL)
+            )
+        )
+    if appSetting.DATABASE.REPLICAS:
+        tasks.append(
+            asyncio.create_task(
+                SessionManager.monitor_replicas(appSetting.DATABASE.REPLICACHECK)
+            )
+        )
+    if appSetting.JOBS.ENABLED:
+        await job_queue.start()
     LOG.info("start")
     yield
     LOG.info("stop")
+    if appSetting.JOBS.ENABLED:
+        await job_queue.stop()
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    if appSetting.METRICS.ENABLED:
+        metrics.remove_snapshot()
     await SessionManager.close()
+    await rate_limit_backend.close()
+    await response_cache.close()
+    stop_logging()
 
 
 def create_app() -> FastAPI:
@@ -50,8 +97,13 @@ def create_app() -> FastAPI:
             "🐱‍💻 Our server cats are already working on a fix! Please be patient... 🛠️",
         ]
 
-        error_id = str(uuid.uuid4())
-        LOG.error(f"Unhandled error {error_id}: {exc}", exc_info=True)
+        # Обработчик работает снаружи middleware, поэтому ID берётся из scope.
+        error_id = getattr(request.state, "request_id", None) or str(uuid.uuid4())
+        LOG.error(
+            f"Unhandled error {error_id}: {exc}",
+            exc_info=True,
+            extra={"request_id": error_id},
+        )
 
         return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -60,15 +112,36 @@ def create_app() -> FastAPI:
                 "error_id": error_id,
                 "message": random.choice(messages),
             },
+            headers={REQUEST_ID_HEADER: error_id},
         )
 
-    app.add_middleware(GZipMiddleware)
+    if appSetting.METRICS.ENABLED:
+
+        @app.get("/metrics", include_in_schema=False)
+        async def prometheus_metrics():
+            return PlainTextResponse(
+                await asyncio.to_thread(metrics.collect, metrics.snapshot()),
+                media_type="text/plain; version=0.0.4",
+            )
+
+    app.add_middleware(
+        CompressionMiddleware,
+        encodings=appSetting.COMPRESSION.ENCODINGLIST,
+        mime_types=appSetting.COMPRESSION.MIMESET,
+        min_size=appSetting.COMPRESSION.MINSIZE,
+        thread_size=appSetting.COMPRESSION.THREADSIZE,
+        levels=appSetting.COMPRESSION.LEVELS,
+    )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[REQUEST_ID_HEADER],
     )
+    if appSetting.METRICS.ENABLED:
+        app.add_middleware(MetricsMiddleware, registry=metrics)
+    app.add_middleware(RequestContextMiddleware)
 
     return app
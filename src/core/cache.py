@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+LOG = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """
+    Кэш готовых тел ответов (bytes) с TTL:
+      - `get` считает попадания и промахи
+      - `delete` используется для инвалидации при записи
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.time) -> None:
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> bytes | None:
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    @abstractmethod
+    async def _get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes) -> None: ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None: ...
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """LRU на `max_entries` записей внутри процесса."""
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(ttl, clock)
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    async def _get(self, key: str) -> bytes | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires = entry
+        if expires <= self.clock():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        self.entries[key] = (value, self.clock() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self.entries.clear()
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Общий для всех воркеров кэш в файле SQLite:
+      - инвалидация в одном воркере видна остальным
+      - протухшие записи удаляются раз в `purge_every` записей
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        path: str | Path,
+        purge_every: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(ttl, clock)
+        self.path = Path(path)
+        self.purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            LOG.debug("Opening response cache: %s", self.path)
+            self._conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+        return self._conn
+
+    def _execute(self, sql: str, *params) -> list[tuple]:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    async def _get(self, key: str) -> bytes | None:
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT value FROM response_cache WHERE key = ? AND expires > ?",
+            key,
+            self.clock(),
+        )
+        return rows[0][0] if rows else None
+
+    async def set(self, key: str, value: bytes) -> None:
+        now = self.clock()
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO response_cache (key, value, expires) "
+            "VALUES (?, ?, ?)",
+            key,
+            value,
+            now + self.ttl,
+        )
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            await asyncio.to_thread(
+                self._execute, "DELETE FROM response_cache WHERE expires <= ?", now
+            )
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            placeholders = ", ".join("?" * len(keys))
+            await asyncio.to_thread(
+                self._execute,
+                f"DELETE FROM response_cache WHERE key IN ({placeholders})",
+                *keys,
+            )
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM response_cache")
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
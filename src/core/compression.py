@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import zlib
+from typing import Callable, Iterable, Optional, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - зависимость необязательная
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - зависимость необязательная
+    zstandard = None
+
+LOG = logging.getLogger(__name__)
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _gzip(level: int) -> Compressor:
+    return zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+
+def _zstd(level: int) -> Compressor:
+    return zstandard.ZstdCompressor(level=level).compressobj()
+
+
+COMPRESSORS: dict[str, Callable[[int], Compressor]] = {"gzip": _gzip}
+if brotli is not None:
+    COMPRESSORS["br"] = _BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = _zstd
+
+
+def negotiate(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """
+    Выбор кодировки по `Accept-Encoding`:
+      - побеждает наибольший q, при равенстве — порядок `available`
+      - `q=0` запрещает кодировку, `*` задаёт q для неперечисленных
+    """
+    weights: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for name in available:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов с учётом содержимого:
+      - сжимаются только типы из `mime_types` (`text/` — префикс)
+      - пропускаются ответы меньше `min_size`, частичные (206)
+        и уже закодированные (`Content-Encoding`)
+      - тела от `thread_size` байт сжимаются в потоке, а не в event loop
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Iterable[str] = ("gzip",),
+        mime_types: Iterable[str] = ("text/", "application/json"),
+        min_size: int = 500,
+        thread_size: int = 256 * 2**10,
+        levels: Optional[dict[str, int]] = None,
+    ) -> None:
+        self.app = app
+        self.encodings = [name for name in encodings if name in COMPRESSORS]
+        self.mime_types = set(mime_types)
+        self.min_size = min_size
+        self.thread_size = thread_size
+        self.levels = {"gzip": 6, "br": 4, "zstd": 3} | (levels or {})
+        if missing := set(encodings) - set(self.encodings):
+            LOG.info("Compression encodings not available: %s", sorted(missing))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compressible(self, headers: Headers, status: int) -> bool:
+        if status != 200 or "content-encoding" in headers:
+            return False
+        if "content-range" in headers:
+            return False
+        mime = headers.get("content-type", "").split(";")[0].strip().lower()
+        return any(
+            mime == allowed or (allowed.endswith("/") and mime.startswith(allowed))
+            for allowed in self.mime_types
+        )
+
+
+class _CompressionResponder:
+    def __init__(
+        self, middleware: CompressionMiddleware, encoding: str, send: Send
+    ) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = not self.middleware.compressible(
+                headers, message["status"]
+            )
+            if not self.passthrough:
+                MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self._begin(start, message)
+            return
+
+        if self.compressor is None:
+            await self._send(message)
+            return
+
+        await self._send_compressed(message)
+
+    async def _begin(self, start: Message, message: Message) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.passthrough or (not more_body and len(body) < self.middleware.min_size):
+            await self._send(start)
+            await self._send(message)
+            return
+
+        self.compressor = COMPRESSORS[self.encoding](
+            self.middleware.levels[self.encoding]
+        )
+        headers = MutableHeaders(scope=start)
+        headers["Content-Encoding"] = self.encoding
+        if more_body:
+            del headers["Content-Length"]
+            await self._send(start)
+            await self._send_compressed(message)
+            return
+
+        compressed = await self._compress(body, finish=True)
+        headers["Content-Length"] = str(len(compressed))
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _send_compressed(self, message: Message) -> None:
+        more_body = message.get("more_body", False)
+        compressed = await self._compress(message.get("body", b""), not more_body)
+        if compressed or not more_body:
+            await self._send(
+                {
+                    "type": "http.response.body",
+                    "body": compressed,
+                    "more_body": more_body,
+                }
+            )
+
+    async def _compress(self, body: bytes, finish: bool) -> bytes:
+        if len(body) >= self.middleware.thread_size:
+            return await asyncio.to_thread(self._run, body, finish)
+        return self._run(body, finish)
+
+    def _run(self, body: bytes, finish: bool) -> bytes:
+        data = self.compressor.compress(body)
+        return data + self.compressor.flush() if finish else data
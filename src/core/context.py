@@ -0,0 +1,114 @@
+import logging
+import math
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LOG = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+MAX_REQUEST_ID_LENGTH = 128
+CLIENT_COOKIE = "client_id"
+MAX_CLIENT_ID_LENGTH = 64
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+scope_var: ContextVar[Optional[Scope]] = ContextVar("scope", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+def current_client() -> Optional[str]:
+    """Токен клиента из cookie `client_id`: за одним адресом бывает много клиентов."""
+    scope = scope_var.get()
+    return scope["state"].get("client_id") if scope else None
+
+
+def issue_client(max_age: float) -> Optional[str]:
+    """
+    Токен клиента, чтобы после записи он читал свои данные:
+      - присланный в cookie остаётся, иначе выдаётся новый
+      - ответ продлевает cookie на `max_age` секунд
+    """
+    scope = scope_var.get()
+    if scope is None:
+        return None
+    state = scope["state"]
+    state["client_id"] = state.get("client_id") or uuid.uuid4().hex
+    state["client_max_age"] = max_age
+    return state["client_id"]
+
+
+def current_route() -> Optional[str]:
+    """Шаблон пути (`/V1/book/{id}`), как только роутер нашёл маршрут."""
+    scope = scope_var.get()
+    route = scope.get("route") if scope else None
+    return getattr(route, "path", None)
+
+
+class RequestContextMiddleware:
+    """
+    Контекст запроса для логов:
+      - ID берётся из `X-Request-ID` или генерируется и возвращается в ответе
+      - по завершении пишется запись с маршрутом, статусом и длительностью
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        request_id = headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        request_id = request_id[:MAX_REQUEST_ID_LENGTH]
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        # Токен возвращается в Set-Cookie, поэтому чужие символы отбрасываются.
+        client_id = cookie_parser(headers.get("cookie", "")).get(CLIENT_COOKIE, "")
+        state["client_id"] = (
+            client_id
+            if client_id.isalnum() and len(client_id) <= MAX_CLIENT_ID_LENGTH
+            else None
+        )
+        request_id_token = request_id_var.set(request_id)
+        scope_token = scope_var.set(scope)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = MutableHeaders(scope=message)
+                response_headers[REQUEST_ID_HEADER] = request_id
+                if max_age := state.get("client_max_age"):
+                    response_headers.append(
+                        "Set-Cookie",
+                        f"{CLIENT_COOKIE}={state['client_id']}; "
+                        f"Max-Age={math.ceil(max_age)}; Path=/; HttpOnly; SameSite=Lax",
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            LOG.info(
+                "%s %s %s %.1fms",
+                scope["method"],
+                scope["path"],
+                status,
+                latency_ms,
+                extra={"status": status, "latency_ms": round(latency_ms, 3)},
+            )
+            scope_var.reset(scope_token)
+            request_id_var.reset(request_id_token)
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import delete, or_, select, update
+
+from database.mixin import utcnow
+from database.session import SessionManager
+
+LOG = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Очередь задач в таблице БД с исполнением внутри процесса API:
+      - задачи переживают перезапуск, `running` с истёкшей арендой берётся снова
+      - воркеры — asyncio-задачи, тяжёлая работа уходит в пул процессов
+      - ошибка откладывает задачу с экспоненциальной паузой, после
+        `max_attempts` попыток задача остаётся `failed` с текстом ошибки
+      - завершённые задачи удаляются через `retention` секунд
+    """
+
+    def __init__(
+        self,
+        model,
+        handler: Callable[["JobQueue", Any], Awaitable[None]],
+        workers: int,
+        processes: Optional[int],
+        max_attempts: int,
+        backoff: float,
+        timeout: float,
+        poll_interval: float,
+        retention: float,
+    ) -> None:
+        self.model = model
+        self.handler = handler
+        self.workers = workers
+        self.processes = processes
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._pruned_at = float("-inf")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: fork процесса с потоками aiosqlite и логгера небезопасен.
+            self._pool = ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def run_in_pool(self, func: Callable[..., Any], *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    def notify(self) -> None:
+        """Будит воркеры сразу после коммита новой задачи, не дожидаясь опроса."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{n}")
+            for n in range(self.workers)
+        ]
+        LOG.info("Job queue started with %s workers", self.workers)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        if self._pool is not None:
+            # Прерванные задачи вернутся в работу по истечении аренды.
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        LOG.info("Job queue stopped")
+
+    async def _worker(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.drain()
+                await self.prune()
+            except Exception as e:
+                LOG.error("Job worker error: %s", e, exc_info=True)
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+
+    async def drain(self) -> int:
+        """Выполняет готовые задачи, пока они есть; возвращает их число."""
+        done = 0
+        while await self.run_next():
+            done += 1
+        return done
+
+    async def prune(self) -> int:
+        """
+        Удаляет задачи, завершённые больше `retention` секунд назад:
+          - `run_after` у них — время завершения, поиск идёт по индексу статуса
+          - не чаще раза в `retention / 100`, а не на каждом опросе воркеров
+        """
+        now = asyncio.get_running_loop().time()
+        if now - self._pruned_at < self.retention / 100:
+            return 0
+        self._pruned_at = now
+
+        model = self.model
+        pruned = 0
+        async with SessionManager.scoped_session() as session:
+            pruned = (
+                await session.execute(
+                    delete(model).where(
+                        model.status.in_((DONE, FAILED)),
+                        model.run_after < utcnow() - timedelta(seconds=self.retention),
+                    )
+                )
+            ).rowcount
+            await session.commit()
+        if pruned:
+            LOG.info("Pruned %s finished jobs", pruned)
+        return pruned
+
+    async def claim(self):
+        """
+        Берёт одну готовую задачу и продлевает аренду:
+          - условие на статус в UPDATE не даёт двум воркерам взять одну задачу
+          - на Postgres подзапрос пропускает строки, занятые другими процессами
+        """
+        model = self.model
+        now = utcnow()
+        next_id = (
+            select(model.id)
+            .where(model.status.in_((PENDING, RUNNING)), model.run_after <= now)
+            .order_by(model.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        job = None
+        async with SessionManager.scoped_session() as session:
+            job = await session.scalar(
+                update(model)
+                .where(
+                    model.id == next_id,
+                    or_(model.status == PENDING, model.run_after <= now),
+                )
+                .values(
+                    status=RUNNING,
+                    attempts=model.attempts + 1,
+                    run_after=now + timedelta(seconds=self.timeout),
+                )
+                .returning(model)
+            )
+            await session.commit()
+        return job
+
+    async def run_next(self) -> bool:
+        job = await self.claim()
+        if job is None:
+            return False
+
+        if job.attempts > self.max_attempts:
+            # Задача исчерпала попытки, пока её процесс падал.
+            await self.finish(job, FAILED, job.error or "Worker lost")
+            return True
+
+        LOG.info("Running job %s (attempt %s)", job.id, job.attempts)
+        try:
+            await asyncio.wait_for(self.handler(self, job), self.timeout)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job.attempts >= self.max_attempts:
+                LOG.error("Job %s failed: %s", job.id, error)
+                await self.finish(job, FAILED, error)
+            else:
+                delay = self.backoff * 2 ** (job.attempts - 1)
+                LOG.warning("Job %s failed, retry in %ss: %s", job.id, delay, error)
+                await self.finish(job, PENDING, error, delay)
+            return True
+
+        LOG.info("Job %s done", job.id)
+        await self.finish(job, DONE)
+        return True
+
+    async def finish(
+        self, job, status: str, error: Optional[str] = None, delay: float = 0
+    ) -> None:
+        async with SessionManager.scoped_session() as session:
+            await session.execute(
+                update(self.model)
+                .where(self.model.id == job.id)
+                .values(
+                    status=status,
+                    error=error,
+                    run_after=utcnow() + timedelta(seconds=delay),
+                )
+            )
+            await session.commit()
@@ -1,11 +1,17 @@
 import gzip
 import logging
 import os
+import queue
 import shutil
-from logging.handlers import RotatingFileHandler
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Literal, Optional
 
 import colorlog
+import orjson
+
+from core.context import current_request_id, current_route
 
 
 class BlacklistFilter(logging.Filter):
@@ -17,8 +23,63 @@ class BlacklistFilter(logging.Filter):
         return record.name not in self.blacklist
 
 
+class ContextFilter(logging.Filter):
+    """
+    Добавляет к записи `request_id` и `route` текущего запроса:
+      - уже заполненные поля не трогаются — запись из очереди
+        сохраняет контекст потока, в котором была создана
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = current_request_id() or "-"
+        if not hasattr(record, "route"):
+            record.route = current_route()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись для сборщика логов."""
+
+    FIELDS = ("request_id", "route", "status", "latency_ms")
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "location": f"{record.filename}:{record.lineno}",
+        }
+        for field in self.FIELDS:
+            if (value := getattr(record, field, None)) is not None:
+                payload[field] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(payload, default=str).decode()
+
+
 class ZipRotatingFileHandler(RotatingFileHandler):
+    """
+    Ротация со сжатием бэкапов в gzip:
+      - при `compress_in_background` сжатие уходит в отдельный поток,
+        и запись в лог не ждёт gzip всего файла
+      - следующая ротация дожидается предыдущего сжатия, чтобы не затереть бэкап
+    """
+
+    _compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-gzip")
+
+    def __init__(self, *args, compress_in_background: bool = False, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.compress_in_background = compress_in_background
+        self._pending: Optional[Future] = None
+
     def doRollover(self) -> None:
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
         if self.stream:
             self.stream.close()
             self.stream = None
@@ -40,12 +101,49 @@ class ZipRotatingFileHandler(RotatingFileHandler):
 
     def _rotate(self, src: str, dst: str) -> None:
         self.rotate(src, dst)
-        with open(dst, "rb") as fsrc, gzip.open(dst + ".gz", "wb") as fdst:
+        if self.compress_in_background:
+            self._pending = self._compressor.submit(self._compress, dst)
+        else:
+            self._compress(dst)
+
+    @staticmethod
+    def _compress(path: str) -> None:
+        with open(path, "rb") as fsrc, gzip.open(path + ".gz", "wb") as fdst:
             shutil.copyfileobj(fsrc, fdst)
-        os.remove(dst)
+        os.remove(path)
 
+    def close(self) -> None:
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+        super().close()
 
-def setup_console_logging(level: int | str) -> None:
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    `QueueHandler` с ограниченной очередью:
+      - `drop` — при переполнении запись отбрасывается и учитывается в `dropped`
+      - `block` — вызывающий поток ждёт свободного места
+    """
+
+    def __init__(
+        self, log_queue: queue.Queue, policy: Literal["drop", "block"] = "drop"
+    ) -> None:
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def create_console_handler(level: int | str) -> logging.Handler:
     console_handler = colorlog.StreamHandler()
     console_handler.setLevel(level)
     console_formatter = colorlog.ColoredFormatter(
@@ -62,18 +160,32 @@ def setup_console_logging(level: int | str) -> None:
         },
     )
     console_handler.setFormatter(console_formatter)
-    logging.root.addHandler(console_handler)
+    console_handler.addFilter(ContextFilter())
+    return console_handler
 
 
-def setup_file_logging(
+def log_path(logs_folder: Path, per_process: bool = False) -> Path:
+    """
+    Путь к файлу лога:
+      - `message.log` для одного процесса
+      - `message.<pid>.log` для воркеров, чтобы каждый ротировал только свой файл
+    """
+    name = f"message.{os.getpid()}.log" if per_process else "message.log"
+    return logs_folder / name
+
+
+def create_file_handler(
     level: int | str,
     max_bytes: int = 10**6,
     backup_count: int = 5,
     delay: bool = True,
-) -> None:
+    compress_in_background: bool = False,
+    per_process: bool = False,
+    json_format: bool = False,
+) -> logging.Handler:
     logs_folder = Path("logs").resolve()
     logs_folder.mkdir(exist_ok=True)
-    log_file = (logs_folder / "message").with_suffix(".log")
+    log_file = log_path(logs_folder, per_process)
     file_handler = ZipRotatingFileHandler(
         filename=log_file,
         mode="a",
@@ -81,14 +193,99 @@ def setup_file_logging(
         backupCount=backup_count,
         encoding="utf-8",
         delay=delay,
+        compress_in_background=compress_in_background,
     )
     file_handler.setLevel(level)
-    file_formatter = logging.Formatter(
-        "%(asctime)s - [%(levelname)-8s] - PID: %(process)d - "
-        "%(name)s|%(funcName)s - %(message)s - %(filename)s:%(lineno)d"
+    file_formatter = (
+        JsonFormatter()
+        if json_format
+        else logging.Formatter(
+            "%(asctime)s - [%(levelname)-8s] - PID: %(process)d - "
+            "RID: %(request_id)s - %(name)s|%(funcName)s - %(message)s - "
+            "%(filename)s:%(lineno)d"
+        )
     )
     file_handler.setFormatter(file_formatter)
-    logging.root.addHandler(file_handler)
+    file_handler.addFilter(ContextFilter())
+    return file_handler
+
+
+def setup_console_logging(level: int | str) -> None:
+    logging.root.addHandler(create_console_handler(level))
+
+
+def setup_file_logging(
+    level: int | str,
+    max_bytes: int = 10**6,
+    backup_count: int = 5,
+    delay: bool = True,
+    per_process: bool = False,
+    json_format: bool = False,
+) -> None:
+    logging.root.addHandler(
+        create_file_handler(
+            level,
+            max_bytes,
+            backup_count,
+            delay,
+            per_process=per_process,
+            json_format=json_format,
+        )
+    )
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_queue_logging(
+    level: int | str,
+    max_bytes: int = 10**6,
+    backup_count: int = 5,
+    delay: bool = True,
+    queue_size: int = 10_000,
+    policy: Literal["drop", "block"] = "drop",
+    per_process: bool = False,
+    json_format: bool = False,
+) -> DroppingQueueHandler:
+    """
+    Логирование через очередь:
+      - в корневом логгере только `DroppingQueueHandler`
+      - консоль и файл обслуживает `QueueListener` в фоновом потоке
+    """
+    global _listener
+    stop_logging()
+
+    queue_handler = DroppingQueueHandler(queue.Queue(queue_size), policy)
+    # Контекст запроса есть только в потоке, который пишет в очередь.
+    queue_handler.addFilter(ContextFilter())
+    _listener = QueueListener(
+        queue_handler.queue,
+        create_console_handler(level),
+        create_file_handler(
+            level, max_bytes, backup_count, delay, True, per_process, json_format
+        ),
+        respect_handler_level=True,
+    )
+    _listener.start()
+    logging.root.addHandler(queue_handler)
+    return queue_handler
+
+
+def stop_logging() -> None:
+    """Дописывает очередь и закрывает обработчики фонового потока."""
+    global _listener
+    if _listener is None:
+        return
+
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    for handler in logging.root.handlers[:]:
+        if isinstance(handler, DroppingQueueHandler):
+            logging.root.removeHandler(handler)
+            if handler.dropped:
+                logging.root.warning("Dropped %s log records", handler.dropped)
+    _listener = None
 
 
 def configure_logging(
@@ -97,16 +294,36 @@ def configure_logging(
     backup_count: int = 5,
     delay: bool = True,
     blacklist: set[str] = set(),
+    queue_size: int = 0,
+    policy: Literal["drop", "block"] = "drop",
+    per_process: bool = False,
+    json_format: bool = False,
 ) -> None:
     """
     Общая конфигурация логирования:
       - Логирование с полными данными в файл
       - Простое и цветное логирование в консоль
+      - При `queue_size > 0` обработчики работают в фоновом потоке
+      - При `per_process` у каждого процесса свой файл с PID в имени
+      - При `json_format` файл пишется построчным JSON
     """
     logging.root.setLevel(logging.NOTSET)
 
     for i in blacklist:
         logging.getLogger(i).setLevel(logging.WARNING)
 
+    if queue_size > 0:
+        setup_queue_logging(
+            level,
+            max_bytes,
+            backup_count,
+            delay,
+            queue_size,
+            policy,
+            per_process,
+            json_format,
+        )
+        return
+
     setup_console_logging(level)
-    setup_file_logging(level, max_bytes, backup_count, delay)
+    setup_file_logging(level, max_bytes, backup_count, delay, per_process, json_format)
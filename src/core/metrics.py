@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.setting import appSetting
+
+LOG = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+COUNTERS = {
+    "http_requests_total": "HTTP requests by method, route and status.",
+    "db_queries_total": "SQL statements executed.",
+}
+HISTOGRAMS = {
+    "http_request_duration_seconds": ("HTTP request latency.", LATENCY_BUCKETS),
+    "db_query_duration_seconds": ("SQL statement execution time.", LATENCY_BUCKETS),
+    "db_request_duration_seconds": ("SQL time per HTTP request.", LATENCY_BUCKETS),
+    "db_request_queries": ("SQL statements per HTTP request.", COUNT_BUCKETS),
+}
+GAUGES = {
+    "db_pool_size": "Connections kept in the pool.",
+    "db_pool_checked_out": "Connections currently checked out.",
+    "db_pool_overflow": "Connections opened over the pool size.",
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class RequestStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.seconds = 0.0
+
+
+request_stats_var: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def _labels(**labels: Any) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    Метрики процесса в формате Prometheus:
+      - счётчики и гистограммы копятся в памяти воркера
+      - каждый воркер сбрасывает снимок в `folder/<pid>.json`,
+        `/metrics` суммирует снимки всех живых воркеров
+      - снимки старше `stale_after` секунд считаются от мёртвых воркеров
+    """
+
+    def __init__(self, folder: str | Path, stale_after: float = 300) -> None:
+        self.folder = Path(folder)
+        self.stale_after = stale_after
+        self.counters: dict[str, dict[Labels, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self.histograms: dict[str, dict[Labels, list[float]]] = defaultdict(dict)
+        self.engines: list[Engine] = []
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        self.counters[name][_labels(**labels)] += value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        _, buckets = HISTOGRAMS[name]
+        # Счётчики корзин (без накопления), затем сумма и количество.
+        series = self.histograms[name].setdefault(
+            _labels(**labels), [0] * (len(buckets) + 1) + [0.0, 0]
+        )
+        series[bisect_left(buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def gauges(self) -> dict[str, dict[Labels, float]]:
+        gauges: dict[str, dict[Labels, float]] = defaultdict(dict)
+        for engine in self.engines:
+            pool = engine.pool
+            labels = _labels(engine=engine.url.render_as_string(hide_password=True))
+            for name, method in (
+                ("db_pool_size", "size"),
+                ("db_pool_checked_out", "checkedout"),
+                ("db_pool_overflow", "overflow"),
+            ):
+                # У StaticPool и NullPool нет счётчиков очереди.
+                if callable(getattr(pool, method, None)):
+                    gauges[name][labels] = getattr(pool, method)()
+        return gauges
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Копия метрик для записи в файл:
+          - вызывается в потоке event loop, который пополняет словари,
+            поэтому в пул потоков уходит только копия
+          - ряды гистограмм копируются: их счётчики меняются на месте
+        """
+
+        def dump(metrics: dict[str, dict[Labels, Any]]) -> dict[str, list]:
+            return {
+                name: [
+                    [list(labels), list(value) if isinstance(value, list) else value]
+                    for labels, value in series.items()
+                ]
+                for name, series in metrics.items()
+            }
+
+        return {
+            "counters": dump(self.counters),
+            "histograms": dump(self.histograms),
+            "gauges": dump(self.gauges()),
+        }
+
+    def write_snapshot(self, snapshot: Optional[dict[str, Any]] = None) -> None:
+        """Пишет готовый `snapshot()`; без него снимает копию сам, вне event loop."""
+        snapshot = self.snapshot() if snapshot is None else snapshot
+        self.folder.mkdir(parents=True, exist_ok=True)
+        path = self.folder / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(orjson.dumps(snapshot))
+        os.replace(tmp, path)
+
+    def remove_snapshot(self) -> None:
+        (self.folder / f"{os.getpid()}.json").unlink(missing_ok=True)
+
+    def read_snapshots(self) -> Iterable[dict[str, Any]]:
+        now = time.time()
+        for path in self.folder.glob("*.json"):
+            try:
+                if now - path.stat().st_mtime > self.stale_after:
+                    continue
+                yield orjson.loads(path.read_bytes())
+            except (OSError, orjson.JSONDecodeError):
+                LOG.warning("Skipping unreadable metrics snapshot %s", path)
+
+    def collect(self, snapshot: Optional[dict[str, Any]] = None) -> str:
+        """Сбрасывает свой снимок, суммирует все снимки и отдаёт текст."""
+        self.write_snapshot(snapshot)
+        return render(merge(self.read_snapshots()))
+
+
+def merge(snapshots: Iterable[dict[str, Any]]) -> dict[str, dict[str, dict]]:
+    merged: dict[str, dict[str, dict]] = {
+        kind: defaultdict(dict) for kind in ("counters", "histograms", "gauges")
+    }
+    for snapshot in snapshots:
+        for kind, metrics in snapshot.items():
+            for name, series in metrics.items():
+                target = merged[kind][name]
+                for labels, value in series:
+                    key = tuple(tuple(pair) for pair in labels)
+                    if kind == "histograms":
+                        current = target.get(key, [0] * len(value))
+                        target[key] = [a + b for a, b in zip(current, value)]
+                    else:
+                        target[key] = target.get(key, 0) + value
+    return merged
+
+
+def _format_labels(labels: Labels, **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def render(merged: dict[str, dict[str, dict]]) -> str:
+    lines = []
+    for name, help in COUNTERS.items():
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+        for labels, value in merged["counters"].get(name, {}).items():
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for name, (help, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+        for labels, series in merged["histograms"].get(name, {}).items():
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), series[:-2]):
+                cumulative += count
+                le = _format_labels(labels, le=str(bound))
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {series[-2]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {series[-1]}")
+
+    for name, help in GAUGES.items():
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+        for labels, value in merged["gauges"].get(name, {}).items():
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def instrument_engine(engine: Engine, registry: MetricsRegistry) -> None:
+    """
+    Хуки `before/after_cursor_execute`:
+      - время каждого запроса идёт в гистограмму
+      - число и суммарное время запросов копятся в статистике текущего HTTP-запроса
+      - начало запроса хранится по курсору и снимается и при ошибке
+        (`handle_error`), иначе упавшие запросы копились бы в `conn.info`
+    """
+    registry.engines.append(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_start", {})[id(cursor)] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop(id(cursor))
+        registry.inc("db_queries_total")
+        registry.observe("db_query_duration_seconds", elapsed)
+        if stats := request_stats_var.get():
+            stats.queries += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # Курсор упавшего запроса есть только в контексте выполнения.
+        execution = context.execution_context
+        if context.connection is not None and execution is not None:
+            started = context.connection.info.get("query_start", {})
+            started.pop(id(execution.cursor), None)
+
+
+class MetricsMiddleware:
+    """Задержка, статус и SQL-статистика по шаблону маршрута."""
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats_var.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_stats_var.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            self.registry.inc(
+                "http_requests_total", method=method, route=route, status=status
+            )
+            self.registry.observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - start,
+                method=method,
+                route=route,
+            )
+            self.registry.observe("db_request_queries", stats.queries, route=route)
+            self.registry.observe(
+                "db_request_duration_seconds", stats.seconds, route=route
+            )
+
+
+async def flush_periodically(registry: MetricsRegistry, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(registry.write_snapshot, registry.snapshot())
+        except OSError as e:
+            LOG.warning("Failed to write metrics snapshot: %s", e)
+        except Exception as e:
+            # Задача сброса не должна тихо умирать до конца жизни процесса.
+            LOG.error("Metrics flush failed: %s", e, exc_info=True)
+
+
+metrics = MetricsRegistry(
+    appSetting.METRICS.FOLDER, stale_after=appSetting.METRICS.INTERVAL * 4
+)
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import math
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+LOG = logging.getLogger(__name__)
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int
+    retry_after: int
+
+
+class TokenBucket:
+    """
+    Token bucket на `limit` запросов за `period` секунд:
+      - ёмкость ведра `limit`, пополнение `limit / period` токенов в секунду
+      - состояние ключа — пара (токены, время последнего обновления)
+    """
+
+    def __init__(self, limit: int, period: float) -> None:
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+
+    def refill(self, tokens: float, updated: float, now: float) -> float:
+        return min(self.limit, tokens + (now - updated) * self.rate)
+
+    def take(
+        self, state: tuple[float, float] | None, now: float
+    ) -> tuple[tuple[float, float], RateLimitResult]:
+        tokens = self.limit if state is None else self.refill(*state, now)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        result = RateLimitResult(
+            allowed=allowed,
+            limit=self.limit,
+            remaining=int(tokens),
+            reset=math.ceil(now + (self.limit - tokens) / self.rate),
+            retry_after=0 if allowed else math.ceil((1 - tokens) / self.rate),
+        )
+        return (tokens, now), result
+
+    def expired(self, updated: float, now: float) -> bool:
+        """Ведро, простоявшее `period`, снова полное — хранить его незачем."""
+        return now - updated >= self.period
+
+
+class RateLimitBackend(ABC):
+    def __init__(
+        self, limit: int, period: float, clock: Callable[[], float] = time.time
+    ) -> None:
+        self.bucket = TokenBucket(limit, period)
+        self.clock = clock
+
+    @abstractmethod
+    async def hit(self, key: str) -> RateLimitResult: ...
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Хранилище внутри процесса:
+      - LRU на `max_keys` ключей, самый давний ключ вытесняется первым
+      - простоявшие `period` ключи удаляются при каждом обращении
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        period: float,
+        max_keys: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(limit, period, clock)
+        self.max_keys = max_keys
+        self.buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+    async def hit(self, key: str) -> RateLimitResult:
+        now = self.clock()
+        state, result = self.bucket.take(self.buckets.pop(key, None), now)
+        self.buckets[key] = state
+        self._evict(now)
+        return result
+
+    def _evict(self, now: float) -> None:
+        # Ключи упорядочены по времени обновления: протухшие всегда в начале.
+        while self.buckets:
+            key, (_, updated) = next(iter(self.buckets.items()))
+            if len(self.buckets) <= self.max_keys and not self.bucket.expired(
+                updated, now
+            ):
+                break
+            del self.buckets[key]
+
+
+class SQLiteBackend(RateLimitBackend):
+    """
+    Общее для всех воркеров хранилище в файле SQLite:
+      - чтение и запись ведра идут в одной транзакции `BEGIN IMMEDIATE`
+      - протухшие ключи удаляются раз в `purge_every` обращений
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        period: float,
+        path: str | Path,
+        purge_every: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(limit, period, clock)
+        self.path = Path(path)
+        self.purge_every = purge_every
+        self._hits = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            LOG.debug("Opening rate limit store: %s", self.path)
+            self._conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+        return self._conn
+
+    def _hit(self, key: str) -> RateLimitResult:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = self.clock()
+                row = conn.execute(
+                    "SELECT tokens, updated FROM rate_limit WHERE key = ?", (key,)
+                ).fetchone()
+                state, result = self.bucket.take(row, now)
+                conn.execute(
+                    "INSERT INTO rate_limit (key, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE "
+                    "SET tokens = excluded.tokens, updated = excluded.updated",
+                    (key, *state),
+                )
+                self._hits += 1
+                if self._hits % self.purge_every == 0:
+                    conn.execute(
+                        "DELETE FROM rate_limit WHERE updated <= ?",
+                        (now - self.bucket.period,),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return result
+
+    async def hit(self, key: str) -> RateLimitResult:
+        return await asyncio.to_thread(self._hit, key)
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
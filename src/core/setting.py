@@ -1,3 +1,5 @@
+from typing import Any, Literal
+
 from pydantic import ByteSize
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from sqlalchemy import URL
@@ -21,9 +23,65 @@ class DataBaseSetting(BasaSetting):
     PORT: str | None = None
     DATABASENAME: str
 
+    POOLSIZE: int = 5
+    MAXOVERFLOW: int = 10
+    POOLTIMEOUT: float = 30
+    POOLRECYCLE: int = 1800
+    PREPING: bool = True
+    QUERYCACHE: int = 500
+    CONNECTARGS: dict[str, Any] = {}
+
+    JOURNALMODE: str = "WAL"
+    SYNCHRONOUS: str = "NORMAL"
+    BUSYTIMEOUT: int = 5000
+    MMAPSIZE: ByteSize = ByteSize(256 * 2**20)
+    CACHESIZE: int = -64_000
+    FOREIGNKEYS: bool = True
+
+    IDVERSION: Literal["uuid7", "uuid4"] = "uuid7"
+
+    REPLICAS: list[str] = []
+    REPLICASTRATEGY: Literal["roundrobin", "leastbusy"] = "roundrobin"
+    REPLICACHECK: int = 10
+    STICKYSECONDS: float = 5
+
+    @property
+    def ISSQLITE(self) -> bool:
+        return "sqlite" in self.DRIVERNAME
+
+    @property
+    def ENGINEOPTIONS(self) -> dict[str, Any]:
+        options = {
+            "pool_pre_ping": self.PREPING,
+            "query_cache_size": self.QUERYCACHE,
+            "connect_args": self.CONNECTARGS,
+        }
+        # SQLite в памяти живёт на одном соединении StaticPool: очереди нет.
+        if self.ISSQLITE and self.DATABASENAME in ("", ":memory:"):
+            return options
+        return options | {
+            "pool_size": self.POOLSIZE,
+            "max_overflow": self.MAXOVERFLOW,
+            "pool_timeout": self.POOLTIMEOUT,
+            "pool_recycle": self.POOLRECYCLE,
+        }
+
+    @property
+    def PRAGMAS(self) -> dict[str, str | int]:
+        if not self.ISSQLITE:
+            return {}
+        return {
+            "journal_mode": self.JOURNALMODE,
+            "synchronous": self.SYNCHRONOUS,
+            "busy_timeout": self.BUSYTIMEOUT,
+            "mmap_size": int(self.MMAPSIZE),
+            "cache_size": self.CACHESIZE,
+            "foreign_keys": "ON" if self.FOREIGNKEYS else "OFF",
+        }
+
     @property
     def URL(self) -> URL:
-        if "sqlite" in self.DRIVERNAME:
+        if self.ISSQLITE:
             return URL.create(drivername=self.DRIVERNAME, database=self.DATABASENAME)
         elif all([self.USERNAME, self.PASSWORD, self.HOST, self.PORT]):
             return URL.create(
@@ -42,6 +100,10 @@ class LoggerSetting(BasaSetting):
     MAXBYTES: ByteSize
     BACKUPCOUNT: int
     BLACKLIST: str
+    QUEUESIZE: int = 10_000
+    QUEUEPOLICY: Literal["drop", "block"] = "drop"
+    PERPROCESS: bool = False
+    FORMAT: Literal["text", "json"] = "text"
 
     @property
     def BLACKSET(self) -> set[str]:
@@ -54,12 +116,100 @@ class APISetting(BasaSetting):
     WORKERS: int
 
 
+class RateLimitSetting(BasaSetting):
+    model_config = SettingsConfigDict(env_prefix="RATELIMIT_")
+
+    LIMIT: int = 100
+    PERIOD: int = 60
+    BACKEND: Literal["memory", "sqlite"] = "memory"
+    MAXKEYS: int = 10_000
+    FILE: str = "ratelimit.db"
+
+
+class CacheSetting(BasaSetting):
+    model_config = SettingsConfigDict(env_prefix="CACHE_")
+
+    TTL: int = 300
+    BACKEND: Literal["memory", "sqlite"] = "memory"
+    MAXENTRIES: int = 10_000
+    FILE: str = "cache.db"
+
+
+class StorageSetting(BasaSetting):
+    model_config = SettingsConfigDict(env_prefix="STORAGE_")
+
+    FOLDER: str = "storage"
+    CHUNKSIZE: ByteSize = ByteSize(2**20)
+    UPLOADCHUNKSIZE: ByteSize = ByteSize(8 * 2**20)
+    UPLOADMAXSIZE: ByteSize = ByteSize(4 * 2**30)
+    UPLOADMAXCHUNKS: int = 10_000
+    UPLOADTTL: int = 24 * 3600
+
+
+class CompressionSetting(BasaSetting):
+    model_config = SettingsConfigDict(env_prefix="COMPRESSION_")
+
+    ENCODINGS: str = "br,zstd,gzip"
+    MIMETYPES: str = (
+        "text/,application/json,application/x-ndjson,"
+        "application/xml,application/javascript,image/svg+xml"
+    )
+    MINSIZE: ByteSize = ByteSize(500)
+    THREADSIZE: ByteSize = ByteSize(256 * 2**10)
+    GZIPLEVEL: int = 6
+    BROTLILEVEL: int = 4
+    ZSTDLEVEL: int = 3
+
+    @property
+    def ENCODINGLIST(self) -> list[str]:
+        return [name for name in self.ENCODINGS.replace(" ", "").split(",") if name]
+
+    @property
+    def MIMESET(self) -> set[str]:
+        return set(self.MIMETYPES.replace(" ", "").split(","))
+
+    @property
+    def LEVELS(self) -> dict[str, int]:
+        return {
+            "gzip": self.GZIPLEVEL,
+            "br": self.BROTLILEVEL,
+            "zstd": self.ZSTDLEVEL,
+        }
+
+
+class MetricsSetting(BasaSetting):
+    model_config = SettingsConfigDict(env_prefix="METRICS_")
+
+    ENABLED: bool = True
+    FOLDER: str = "metrics"
+    INTERVAL: int = 15
+
+
+class JobsSetting(BasaSetting):
+    model_config = SettingsConfigDict(env_prefix="JOBS_")
+
+    ENABLED: bool = True
+    WORKERS: int = 4
+    PROCESSES: int | None = None
+    MAXATTEMPTS: int = 5
+    BACKOFF: float = 2.0
+    TIMEOUT: float = 300
+    POLLINTERVAL: float = 5
+    RETENTION: float = 7 * 24 * 3600
+
+
 class AppSetting(BasaSetting):
     DEVELOPMENT: bool
 
     API: APISetting
     LOGGER: LoggerSetting
     DATABASE: DataBaseSetting
+    RATELIMIT: RateLimitSetting = RateLimitSetting()
+    CACHE: CacheSetting = CacheSetting()
+    STORAGE: StorageSetting = StorageSetting()
+    COMPRESSION: CompressionSetting = CompressionSetting()
+    METRICS: MetricsSetting = MetricsSetting()
+    JOBS: JobsSetting = JobsSetting()
 
 
 appSetting = AppSetting()
@@ -1,25 +1,77 @@
+import secrets
+import threading
+import time
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime
+from typing import Callable, Literal
 
 from sqlalchemy import UUID, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.sql import func
+
+IdVersion = Literal["uuid7", "uuid4"]
+
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_counter = 0
+
+
+def utcnow() -> datetime:
+    """Текущее время UTC без tzinfo, с микросекундами."""
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def uuid7() -> uuid.UUID:
+    """
+    UUIDv7 (RFC 9562):
+      - старшие 48 бит — миллисекунды Unix, новые ключи дописываются в конец индекса
+      - 12 бит счётчика держат порядок внутри миллисекунды и при откате часов
+    """
+    global _uuid7_last_ms, _uuid7_counter
+    with _uuid7_lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _uuid7_last_ms:
+            # Старший бит счётчика свободен — запас на всплеск в той же миллисекунде.
+            _uuid7_last_ms, _uuid7_counter = ms, secrets.randbits(11)
+        else:
+            _uuid7_counter += 1
+            if _uuid7_counter > 0xFFF:
+                _uuid7_last_ms, _uuid7_counter = _uuid7_last_ms + 1, 0
+        ms, counter = _uuid7_last_ms, _uuid7_counter
+
+    value = ms << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | secrets.randbits(62)
+    return uuid.UUID(int=value)
+
+
+ID_GENERATORS: dict[IdVersion, Callable[[], uuid.UUID]] = {
+    "uuid7": uuid7,
+    "uuid4": uuid.uuid4,
+}
+_id_generator = uuid7
+
+
+def set_id_generator(version: IdVersion) -> None:
+    global _id_generator
+    _id_generator = ID_GENERATORS[version]
+
+
+def new_id() -> uuid.UUID:
+    return _id_generator()
 
 
 class TimestampMixin:
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=func.now(), nullable=False
+        DateTime, default=utcnow, nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=func.now(), onupdate=func.now(), nullable=False
+        DateTime, default=utcnow, onupdate=utcnow, nullable=False
     )
 
 
 class UUIDMixin:
+    # Первичный ключ уже уникален и индексирован — отдельный UNIQUE не нужен.
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        default=new_id,
         nullable=False,
     )
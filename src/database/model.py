@@ -1,7 +1,16 @@
 import re
+from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import (
     DeclarativeBase,
@@ -30,6 +39,14 @@ class CoreModel(DeclarativeBase, AsyncAttrs):
 class Book(CoreModel, UUIDMixin, TimestampMixin):
     """Модель книги."""
 
+    __table_args__ = (
+        Index("ix_book_created_at_id", "created_at", "id"),
+        Index("ix_book_updated_at_id", "updated_at", "id"),
+        Index("ix_book_title_id", "title", "id"),
+        Index("ix_book_author_created_at_id", "author", "created_at", "id"),
+        Index("ix_book_page_count", "page_count"),
+    )
+
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     author: Mapped[str] = mapped_column(String(255), nullable=False)
     desc: Mapped[str | None] = mapped_column(String, nullable=True)
@@ -45,6 +62,14 @@ class Book(CoreModel, UUIDMixin, TimestampMixin):
 class PublishingHouse(CoreModel, UUIDMixin, TimestampMixin):
     """Модель издательства."""
 
+    __table_args__ = (
+        Index("ix_publishing_house_created_at_id", "created_at", "id"),
+        Index("ix_publishing_house_updated_at_id", "updated_at", "id"),
+        Index("ix_publishing_house_name_id", "name", "id"),
+        Index("ix_publishing_house_book_id", "book_id"),
+        Index("ix_publishing_house_lang_created_at_id", "lang", "created_at", "id"),
+    )
+
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     lang: Mapped[str] = mapped_column(String(50), nullable=False)
 
@@ -63,11 +88,91 @@ class PublishingHouse(CoreModel, UUIDMixin, TimestampMixin):
 class BookFile(CoreModel, UUIDMixin, TimestampMixin):
     """Модель файла книги."""
 
+    __table_args__ = (Index("ix_book_file_pub_id_file_type", "pub_id", "file_type"),)
+
     path: Mapped[str] = mapped_column(String(1024), nullable=False)
     file_type: Mapped[str] = mapped_column(String(50), nullable=False)
-    size: Mapped[int] = mapped_column(Integer(), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Заполняются фоновой обработкой после загрузки, см. `BookFileJob`.
+    mime_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    page_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    cover_path: Mapped[str | None] = mapped_column(String(1024), nullable=True)
 
     pub_id: Mapped[UUID] = mapped_column(
         ForeignKey("publishing_house.id", ondelete="CASCADE"), nullable=False
     )
     pub: Mapped["PublishingHouse"] = relationship(back_populates="files")
+
+
+class BookSummary(CoreModel):
+    """Счётчики книги, их ведут триггеры из `database.summary`."""
+
+    book_id: Mapped[UUID] = mapped_column(
+        ForeignKey("book.id", ondelete="CASCADE"), primary_key=True
+    )
+    pub_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    file_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_changed: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class CollectionVersion(CoreModel):
+    """Версия таблицы для ETag списков, её ведут триггеры из `database.version`."""
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class BookFileJob(CoreModel, UUIDMixin, TimestampMixin):
+    """
+    Задача фоновой обработки файла книги:
+      - `pending` ждёт `run_after`, `running` держит аренду до `run_after`
+      - просроченная аренда значит, что процесс упал, задача берётся снова
+    """
+
+    __table_args__ = (
+        Index("ix_book_file_job_status_run_after", "status", "run_after"),
+        Index("ix_book_file_job_book_file_id", "book_file_id"),
+    )
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    run_after: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
+
+    book_file_id: Mapped[UUID] = mapped_column(
+        ForeignKey("book_file.id", ondelete="CASCADE"), nullable=False
+    )
+
+
+class BookFileUpload(CoreModel, UUIDMixin, TimestampMixin):
+    """
+    Загрузка файла по частям:
+      - части пишутся сразу в файл `FileManager.part_path` по своим смещениям
+      - `completing` ставится до подсчёта хэша: новые части больше не принимаются
+      - после завершения строка удаляется, остаётся обычный `BookFile`
+    """
+
+    __table_args__ = (Index("ix_book_file_upload_created_at", "created_at"),)
+
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    chunk_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    completing: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+
+    pub_id: Mapped[UUID] = mapped_column(
+        ForeignKey("publishing_house.id", ondelete="CASCADE"), nullable=False
+    )
+
+
+class BookFileUploadChunk(CoreModel):
+    """Принятая часть загрузки с её SHA-256."""
+
+    upload_id: Mapped[UUID] = mapped_column(
+        ForeignKey("book_file_upload.id", ondelete="CASCADE"), primary_key=True
+    )
+    index: Mapped[int] = mapped_column(Integer, primary_key=True)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
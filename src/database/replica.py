@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import Callable, Literal, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+LOG = logging.getLogger(__name__)
+
+Strategy = Literal["roundrobin", "leastbusy"]
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.session_factory = async_sessionmaker(
+            engine, autoflush=False, expire_on_commit=False
+        )
+        self.healthy = True
+        self.in_flight = 0
+
+    def __repr__(self) -> str:
+        return f"Replica({self.engine.url.render_as_string(hide_password=True)})"
+
+
+class ReplicaSet:
+    """
+    Выбор реплики для чтения:
+      - `roundrobin` по кругу, `leastbusy` — с наименьшим числом открытых сессий
+      - нездоровые реплики пропускаются, без здоровых читаем с primary
+      - клиент, недавно писавший, `sticky_seconds` читает с primary,
+        чтобы видеть свои записи несмотря на лаг репликации
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[AsyncEngine],
+        strategy: Strategy = "roundrobin",
+        sticky_seconds: float = 5.0,
+        max_keys: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.replicas = [Replica(engine) for engine in engines]
+        self.strategy = strategy
+        self.sticky_seconds = sticky_seconds
+        self.max_keys = max_keys
+        self.clock = clock
+        self._turn = count()
+        self._writes: OrderedDict[str, float] = OrderedDict()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def mark_write(self, key: Optional[str]) -> None:
+        if key is None or not self.replicas:
+            return
+        self._writes.pop(key, None)
+        self._writes[key] = self.clock()
+        while len(self._writes) > self.max_keys:
+            self._writes.popitem(last=False)
+
+    def is_sticky(self, key: Optional[str]) -> bool:
+        written = self._writes.get(key) if key is not None else None
+        return written is not None and self.clock() - written < self.sticky_seconds
+
+    def choose(self, key: Optional[str] = None) -> Optional[Replica]:
+        """Реплика для чтения или `None`, если читать надо с primary."""
+        if self.is_sticky(key):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.strategy == "leastbusy":
+            return min(healthy, key=lambda replica: replica.in_flight)
+        return healthy[next(self._turn) % len(healthy)]
+
+    async def check(self, timeout: float = 2.0) -> None:
+        for replica in self.replicas:
+            try:
+                async with asyncio.timeout(timeout):
+                    async with replica.engine.connect() as conn:
+                        await conn.execute(text("SELECT 1"))
+                healthy = True
+            except Exception as e:
+                LOG.debug("Replica %s health check failed: %s", replica, e)
+                healthy = False
+            if healthy != replica.healthy:
+                LOG.warning(
+                    "Replica %s is %s", replica, "healthy" if healthy else "down"
+                )
+            replica.healthy = healthy
+
+    async def monitor(self, interval: float) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    async def close(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
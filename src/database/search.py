@@ -0,0 +1,248 @@
+import re
+
+from sqlalchemy import (
+    DDL,
+    ColumnElement,
+    Select,
+    column,
+    event,
+    func,
+    literal_column,
+    select,
+    table,
+)
+
+from database.model import Book, CoreModel
+
+# SQLite: FTS5-таблица, синхронизируется триггерами. rowid книги меняется
+# при пересоздании таблицы, поэтому ключ индекса — свой INTEGER PRIMARY KEY
+# из `book_search_key`, привязанный к id книги.
+SQLITE_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS book_search_key (
+        id INTEGER PRIMARY KEY,
+        book_id CHAR(32) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS book_search USING fts5(
+        title, author, "desc", pubs, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_insert AFTER INSERT ON book BEGIN
+        INSERT INTO book_search_key (book_id) VALUES (new.id);
+        INSERT INTO book_search (rowid, title, author, "desc", pubs)
+        VALUES (
+            (SELECT id FROM book_search_key WHERE book_id = new.id),
+            new.title, new.author, coalesce(new."desc", ''), ''
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_update
+    AFTER UPDATE OF title, author, "desc" ON book BEGIN
+        UPDATE book_search
+        SET title = new.title, author = new.author, "desc" = coalesce(new."desc", '')
+        WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_delete AFTER DELETE ON book BEGIN
+        DELETE FROM book_search
+        WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = old.id);
+        DELETE FROM book_search_key WHERE book_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_pub_insert
+    AFTER INSERT ON publishing_house BEGIN
+        UPDATE book_search SET pubs = (
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = new.book_id
+        ) WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = new.book_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_pub_update
+    AFTER UPDATE OF name, book_id ON publishing_house BEGIN
+        UPDATE book_search SET pubs = coalesce((
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = old.book_id
+        ), '') WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = old.book_id);
+        UPDATE book_search SET pubs = (
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = new.book_id
+        ) WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = new.book_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_search_pub_delete
+    AFTER DELETE ON publishing_house BEGIN
+        UPDATE book_search SET pubs = coalesce((
+            SELECT group_concat(name, ' ') FROM publishing_house
+            WHERE book_id = old.book_id
+        ), '') WHERE rowid = (SELECT id FROM book_search_key WHERE book_id = old.book_id);
+    END
+    """,
+    """
+    INSERT INTO book_search_key (book_id)
+    SELECT id FROM book WHERE id NOT IN (SELECT book_id FROM book_search_key)
+    """,
+    """
+    INSERT INTO book_search (rowid, title, author, "desc", pubs)
+    SELECT book_search_key.id, title, author, coalesce("desc", ''), coalesce((
+        SELECT group_concat(name, ' ') FROM publishing_house
+        WHERE book_id = book.id
+    ), '')
+    FROM book JOIN book_search_key ON book_search_key.book_id = book.id
+    WHERE book_search_key.id NOT IN (SELECT rowid FROM book_search)
+    """,
+)
+
+# Триггеры и таблицы SQLite-поиска: триггеры с прежним телом не заменяются
+# через IF NOT EXISTS, поэтому при смене схемы удаляются явно.
+SQLITE_DROP = (
+    "DROP TRIGGER IF EXISTS book_search_insert",
+    "DROP TRIGGER IF EXISTS book_search_update",
+    "DROP TRIGGER IF EXISTS book_search_delete",
+    "DROP TRIGGER IF EXISTS book_search_pub_insert",
+    "DROP TRIGGER IF EXISTS book_search_pub_update",
+    "DROP TRIGGER IF EXISTS book_search_pub_delete",
+    "DROP TABLE IF EXISTS book_search",
+    "DROP TABLE IF EXISTS book_search_key",
+)
+
+# Postgres: tsvector с весами и GIN-индекс, пересчёт функцией из триггеров.
+POSTGRES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS book_search (
+        book_id UUID PRIMARY KEY REFERENCES book (id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_book_search_document
+    ON book_search USING GIN (document)
+    """,
+    """
+    CREATE OR REPLACE FUNCTION book_search_refresh(target UUID) RETURNS void AS $$
+        INSERT INTO book_search (book_id, document)
+        SELECT book.id,
+            setweight(to_tsvector('simple', book.title), 'A')
+            || setweight(to_tsvector('simple', book.author), 'A')
+            || setweight(to_tsvector('simple', coalesce(string_agg(pub.name, ' '), '')), 'B')
+            || setweight(to_tsvector('simple', coalesce(book."desc", '')), 'C')
+        FROM book LEFT JOIN publishing_house AS pub ON pub.book_id = book.id
+        WHERE book.id = target
+        GROUP BY book.id
+        ON CONFLICT (book_id) DO UPDATE SET document = excluded.document
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION book_search_book_trigger() RETURNS trigger AS $$
+    BEGIN
+        PERFORM book_search_refresh(NEW.id);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION book_search_pub_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM book_search_refresh(OLD.book_id);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM book_search_refresh(NEW.book_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE TRIGGER book_search_book
+    AFTER INSERT OR UPDATE OF title, author, "desc" ON book
+    FOR EACH ROW EXECUTE FUNCTION book_search_book_trigger()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER book_search_pub
+    AFTER INSERT OR UPDATE OF name, book_id OR DELETE ON publishing_house
+    FOR EACH ROW EXECUTE FUNCTION book_search_pub_trigger()
+    """,
+    """
+    SELECT book_search_refresh(id) FROM book
+    WHERE id NOT IN (SELECT book_id FROM book_search)
+    """,
+)
+
+DROP_DDL = {
+    "sqlite": SQLITE_DROP,
+    "postgresql": ("DROP TABLE IF EXISTS book_search",),
+}
+
+for dialect, statements in (("sqlite", SQLITE_DDL), ("postgresql", POSTGRES_DDL)):
+    for statement in statements:
+        event.listen(
+            CoreModel.metadata,
+            "after_create",
+            DDL(statement).execute_if(dialect=dialect),
+        )
+    for statement in DROP_DDL[dialect]:
+        event.listen(
+            CoreModel.metadata,
+            "before_drop",
+            DDL(statement).execute_if(dialect=dialect),
+        )
+
+
+book_search = table(
+    "book_search", column("rowid"), column("book_id"), column("document")
+)
+book_search_key = table("book_search_key", column("id"), column("book_id"))
+
+
+def fts5_query(q: str) -> str:
+    """
+    Запрос пользователя в безопасный синтаксис FTS5:
+      - каждое слово в кавычках, слова объединяются через AND
+      - последнее слово ищется по префиксу, чтобы работал поиск по мере ввода
+    """
+    words = [f'"{word}"' for word in re.findall(r"\w+", q)]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+def has_words(q: str) -> bool:
+    return re.search(r"\w", q) is not None
+
+
+def search_stmt(dialect: str, q: str, *columns) -> tuple[Select, ColumnElement[float]]:
+    """
+    Выборка книг по запросу и выражение ранга:
+      - `columns` — что выбирать из `book`, по умолчанию модель целиком
+      - ранг возрастает от лучшего совпадения к худшему на обеих СУБД
+      - title и author весят больше издательств, описание — меньше всех
+    """
+    columns = columns or (Book,)
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery("simple", q)
+        score = -func.ts_rank(book_search.c.document, query)
+        stmt = (
+            select(*columns, score.label("score"))
+            .select_from(Book)
+            .join(book_search, book_search.c.book_id == Book.id)
+            .where(book_search.c.document.op("@@")(query))
+        )
+        return stmt, score
+
+    score = func.bm25(literal_column("book_search"), 10.0, 10.0, 1.0, 5.0)
+    stmt = (
+        select(*columns, score.label("score"))
+        .select_from(Book)
+        .join(book_search_key, book_search_key.c.book_id == Book.id)
+        .join(book_search, book_search.c.rowid == book_search_key.c.id)
+        .where(literal_column("book_search").op("MATCH")(fts5_query(q)))
+    )
+    return stmt, score
@@ -1,18 +1,45 @@
 import asyncio
 import logging
 from contextlib import asynccontextmanager
+from typing import Optional, Sequence
 
-from sqlalchemy import MetaData
+from sqlalchemy import Engine, MetaData, event
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_scoped_session,
     async_sessionmaker,
     create_async_engine,
 )
 
+from core.context import current_client, current_request_id, issue_client
+from core.metrics import instrument_engine, metrics
+from database.replica import Replica, ReplicaSet, Strategy
+
 LOG = logging.getLogger(__name__)
 
 
+def set_sqlite_pragmas(engine: Engine, pragmas: dict[str, str | int]) -> None:
+    """
+    PRAGMA для каждого нового соединения SQLite:
+      - WAL и `synchronous=NORMAL` дают читателям не ждать писателя
+      - `busy_timeout` ждёт блокировку вместо ошибки "database is locked"
+    """
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+        LOG.debug("Applied SQLite pragmas: %s", pragmas)
+
+
+def mark_committed(session) -> None:
+    session.info["committed"] = True
+
+
 class SessionManager:
     _instance = None
 
@@ -23,9 +50,24 @@ class SessionManager:
             logging.getLogger("sqlalchemy.engine").propagate = False
         return cls._instance
 
-    def __init(self, url: str = "sqlite+aiosqlite:///:memory:", **kwargs):
+    def __init(
+        self,
+        url: str = "sqlite+aiosqlite:///:memory:",
+        pragmas: Optional[dict[str, str | int]] = None,
+        replicas: Sequence[str] = (),
+        strategy: Strategy = "roundrobin",
+        sticky_seconds: float = 5.0,
+        **kwargs,
+    ):
         LOG.debug("Initializing with DB URL: %s", url)
-        self.async_engine = create_async_engine(url, future=True, **kwargs)
+        self.async_engine = self._create_engine(url, pragmas, **kwargs)
+        self.replicas = ReplicaSet(
+            [self._create_engine(replica, pragmas, **kwargs) for replica in replicas],
+            strategy,
+            sticky_seconds,
+        )
+        if self.replicas:
+            LOG.debug("Read replicas: %s", self.replicas.replicas)
         self.async_session_factory = async_sessionmaker(
             self.async_engine, autoflush=False, expire_on_commit=False
         )
@@ -33,27 +75,96 @@ class SessionManager:
             self.async_session_factory, scopefunc=lambda: asyncio.current_task()
         )
 
+    @staticmethod
+    def _create_engine(
+        url: str, pragmas: Optional[dict[str, str | int]], **kwargs
+    ) -> AsyncEngine:
+        engine = create_async_engine(url, future=True, **kwargs)
+        if pragmas:
+            set_sqlite_pragmas(engine.sync_engine, pragmas)
+        instrument_engine(engine.sync_engine, metrics)
+        return engine
+
     @classmethod
     @asynccontextmanager
-    async def scoped_session(cls):
+    async def scoped_session(cls, reraise: bool = False):
+        """
+        Сессия чтения-записи на primary:
+          - ошибка откатывает транзакцию и по умолчанию гасится
+          - `reraise=True` пробрасывает её дальше, например для повтора задачи
+          - после коммита клиент `sticky_seconds` читает с primary
+        """
         session: AsyncSession = cls._instance.scoped_factory()
-        LOG.debug("Session created: %s", session)
+        session.info["request_id"] = current_request_id()
+        event.listen(session.sync_session, "after_commit", mark_committed)
+        LOG.debug(
+            "Session created: %s (request %s)", session, session.info["request_id"]
+        )
         try:
             yield session
         except Exception as e:
             LOG.warning("Session error: %s", e, exc_info=True)
             await session.rollback()
+            if reraise:
+                raise
         finally:
             await cls._instance.scoped_factory.remove()
+            replicas = cls._instance.replicas
+            if replicas and session.info.get("committed"):
+                replicas.mark_write(issue_client(replicas.sticky_seconds))
             LOG.debug("Session removed: %s", session)
 
+    @classmethod
+    @asynccontextmanager
+    async def read_session(cls, primary: bool = False):
+        """
+        Сессия только для чтения:
+          - на реплике, выбранной `ReplicaSet`, либо на primary
+          - `primary=True` для данных, что пойдут в общий кэш: отставшая
+            реплика не должна попасть туда на весь TTL
+          - ошибка соединения с репликой выводит её из ротации до проверки
+        """
+        replica: Optional[Replica] = (
+            None if primary else cls._instance.replicas.choose(current_client())
+        )
+        factory = (
+            replica.session_factory if replica else cls._instance.async_session_factory
+        )
+        session: AsyncSession = factory()
+        session.info["request_id"] = current_request_id()
+        LOG.debug(
+            "Read session created: %s on %s (request %s)",
+            session,
+            replica or "primary",
+            session.info["request_id"],
+        )
+        if replica:
+            replica.in_flight += 1
+        try:
+            yield session
+        except Exception as e:
+            LOG.warning("Read session error: %s", e, exc_info=True)
+            await session.rollback()
+            if replica and isinstance(e, (OperationalError, InterfaceError)):
+                replica.healthy = False
+        finally:
+            if replica:
+                replica.in_flight -= 1
+            await session.close()
+            LOG.debug("Read session closed: %s", session)
+
     @classmethod
     async def init_db(cls, metadata: MetaData) -> None:
         LOG.info("Initializing database")
         async with cls._instance.async_engine.begin() as conn:
             await conn.run_sync(metadata.create_all)
 
+    @classmethod
+    async def monitor_replicas(cls, interval: float) -> None:
+        await cls._instance.replicas.monitor(interval)
+
     @classmethod
     async def close(cls) -> None:
         LOG.debug("Closing database connection")
         await cls._instance.async_engine.dispose()
+        await cls._instance.replicas.close()
@@ -0,0 +1,257 @@
+from sqlalchemy import DDL, event
+
+from database.model import CoreModel
+
+# SQLite: счётчики меняются на разницу, без пересчёта по всем детям.
+# Каскадное удаление издательства вычитает его файлы в BEFORE DELETE,
+# а триггеры каскадно удалённых файлов издательство уже не находят.
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+SQLITE_FILE_BOOK = "(SELECT book_id FROM publishing_house WHERE id = {}.pub_id)"
+
+SQLITE_DDL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS book_summary_book_insert
+    AFTER INSERT ON book BEGIN
+        INSERT INTO book_summary
+            (book_id, pub_count, file_count, total_bytes, last_changed)
+        VALUES (new.id, 0, 0, 0, new.updated_at);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_summary_book_update
+    AFTER UPDATE ON book BEGIN
+        UPDATE book_summary SET last_changed = new.updated_at
+        WHERE book_id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_summary_pub_insert
+    AFTER INSERT ON publishing_house BEGIN
+        UPDATE book_summary
+        SET pub_count = pub_count + 1, last_changed = new.updated_at
+        WHERE book_id = new.book_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS book_summary_pub_delete
+    BEFORE DELETE ON publishing_house BEGIN
+        UPDATE book_summary SET
+            pub_count = pub_count - 1,
+            file_count = file_count
+                - (SELECT count(*) FROM book_file WHERE pub_id = old.id),
+            total_bytes = total_bytes
+                - (SELECT coalesce(sum(size), 0) FROM book_file WHERE pub_id = old.id),
+            last_changed = {SQLITE_NOW}
+        WHERE book_id = old.book_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_summary_pub_update
+    AFTER UPDATE ON publishing_house BEGIN
+        UPDATE book_summary SET
+            pub_count = pub_count - 1,
+            file_count = file_count
+                - (SELECT count(*) FROM book_file WHERE pub_id = new.id),
+            total_bytes = total_bytes
+                - (SELECT coalesce(sum(size), 0) FROM book_file WHERE pub_id = new.id)
+        WHERE book_id = old.book_id;
+        UPDATE book_summary SET
+            pub_count = pub_count + 1,
+            file_count = file_count
+                + (SELECT count(*) FROM book_file WHERE pub_id = new.id),
+            total_bytes = total_bytes
+                + (SELECT coalesce(sum(size), 0) FROM book_file WHERE pub_id = new.id),
+            last_changed = new.updated_at
+        WHERE book_id = new.book_id;
+        UPDATE book_summary SET last_changed = new.updated_at
+        WHERE book_id = old.book_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS book_summary_file_insert
+    AFTER INSERT ON book_file BEGIN
+        UPDATE book_summary SET
+            file_count = file_count + 1,
+            total_bytes = total_bytes + new.size,
+            last_changed = new.updated_at
+        WHERE book_id = {SQLITE_FILE_BOOK.format("new")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS book_summary_file_delete
+    AFTER DELETE ON book_file BEGIN
+        UPDATE book_summary SET
+            file_count = file_count - 1,
+            total_bytes = total_bytes - old.size,
+            last_changed = {SQLITE_NOW}
+        WHERE book_id = {SQLITE_FILE_BOOK.format("old")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS book_summary_file_update
+    AFTER UPDATE ON book_file BEGIN
+        UPDATE book_summary SET
+            file_count = file_count - 1, total_bytes = total_bytes - old.size
+        WHERE book_id = {SQLITE_FILE_BOOK.format("old")};
+        UPDATE book_summary SET
+            file_count = file_count + 1,
+            total_bytes = total_bytes + new.size,
+            last_changed = new.updated_at
+        WHERE book_id = {SQLITE_FILE_BOOK.format("new")};
+    END
+    """,
+    """
+    INSERT INTO book_summary
+        (book_id, pub_count, file_count, total_bytes, last_changed)
+    SELECT book.id,
+        (SELECT count(*) FROM publishing_house AS pub WHERE pub.book_id = book.id),
+        (SELECT count(*) FROM book_file AS file
+            JOIN publishing_house AS pub ON pub.id = file.pub_id
+            WHERE pub.book_id = book.id),
+        (SELECT coalesce(sum(file.size), 0) FROM book_file AS file
+            JOIN publishing_house AS pub ON pub.id = file.pub_id
+            WHERE pub.book_id = book.id),
+        book.updated_at
+    FROM book WHERE book.id NOT IN (SELECT book_id FROM book_summary)
+    """,
+)
+
+SQLITE_DROP_DDL = tuple(
+    f"DROP TRIGGER IF EXISTS book_summary_{name}"
+    for name in (
+        "book_insert",
+        "book_update",
+        "pub_insert",
+        "pub_delete",
+        "pub_update",
+        "file_insert",
+        "file_delete",
+        "file_update",
+    )
+)
+
+# Postgres: та же схема на plpgsql, разница считается одной функцией.
+POSTGRES_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION book_summary_add(
+        target UUID, pubs INTEGER, files BIGINT, bytes BIGINT, changed TIMESTAMP
+    ) RETURNS void AS $$
+        UPDATE book_summary SET
+            pub_count = pub_count + pubs,
+            file_count = file_count + files,
+            total_bytes = total_bytes + bytes,
+            last_changed = changed
+        WHERE book_id = target
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION book_summary_book_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO book_summary
+                (book_id, pub_count, file_count, total_bytes, last_changed)
+            VALUES (NEW.id, 0, 0, 0, NEW.updated_at);
+        ELSE
+            PERFORM book_summary_add(NEW.id, 0, 0, 0, NEW.updated_at);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION book_summary_pub_trigger() RETURNS trigger AS $$
+    DECLARE
+        files BIGINT;
+        bytes BIGINT;
+        now_utc TIMESTAMP := now() AT TIME ZONE 'utc';
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM book_summary_add(NEW.book_id, 1, 0, 0, NEW.updated_at);
+            RETURN NULL;
+        END IF;
+
+        SELECT count(*), coalesce(sum(size), 0) INTO files, bytes
+        FROM book_file WHERE pub_id = OLD.id;
+        IF TG_OP = 'DELETE' THEN
+            PERFORM book_summary_add(OLD.book_id, -1, -files, -bytes, now_utc);
+            RETURN OLD;
+        END IF;
+
+        PERFORM book_summary_add(OLD.book_id, -1, -files, -bytes, NEW.updated_at);
+        PERFORM book_summary_add(NEW.book_id, 1, files, bytes, NEW.updated_at);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION book_summary_file_trigger() RETURNS trigger AS $$
+    DECLARE
+        target UUID;
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            SELECT book_id INTO target FROM publishing_house WHERE id = OLD.pub_id;
+            PERFORM book_summary_add(
+                target, 0, -1, -OLD.size, now() AT TIME ZONE 'utc'
+            );
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            SELECT book_id INTO target FROM publishing_house WHERE id = NEW.pub_id;
+            PERFORM book_summary_add(target, 0, 1, NEW.size, NEW.updated_at);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE TRIGGER book_summary_book
+    AFTER INSERT OR UPDATE ON book
+    FOR EACH ROW EXECUTE FUNCTION book_summary_book_trigger()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER book_summary_pub_delete
+    BEFORE DELETE ON publishing_house
+    FOR EACH ROW EXECUTE FUNCTION book_summary_pub_trigger()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER book_summary_pub
+    AFTER INSERT OR UPDATE ON publishing_house
+    FOR EACH ROW EXECUTE FUNCTION book_summary_pub_trigger()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER book_summary_file
+    AFTER INSERT OR UPDATE OR DELETE ON book_file
+    FOR EACH ROW EXECUTE FUNCTION book_summary_file_trigger()
+    """,
+    SQLITE_DDL[-1],
+)
+
+POSTGRES_DROP_DDL = (
+    "DROP TRIGGER IF EXISTS book_summary_book ON book",
+    "DROP TRIGGER IF EXISTS book_summary_pub_delete ON publishing_house",
+    "DROP TRIGGER IF EXISTS book_summary_pub ON publishing_house",
+    "DROP TRIGGER IF EXISTS book_summary_file ON book_file",
+    "DROP FUNCTION IF EXISTS book_summary_book_trigger()",
+    "DROP FUNCTION IF EXISTS book_summary_pub_trigger()",
+    "DROP FUNCTION IF EXISTS book_summary_file_trigger()",
+    "DROP FUNCTION IF EXISTS book_summary_add(UUID, INTEGER, BIGINT, BIGINT, TIMESTAMP)",
+)
+
+DDL_BY_DIALECT = {
+    "sqlite": (SQLITE_DDL, SQLITE_DROP_DDL),
+    "postgresql": (POSTGRES_DDL, POSTGRES_DROP_DDL),
+}
+
+for dialect, (statements, drops) in DDL_BY_DIALECT.items():
+    for statement in statements:
+        # `DDL` подставляет контекст через `%`, формат `strftime` экранируется.
+        event.listen(
+            CoreModel.metadata,
+            "after_create",
+            DDL(statement.replace("%", "%%")).execute_if(dialect=dialect),
+        )
+    for statement in drops:
+        event.listen(
+            CoreModel.metadata,
+            "before_drop",
+            DDL(statement).execute_if(dialect=dialect),
+        )
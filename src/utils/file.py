@@ -1,20 +1,184 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import tempfile
+import time
 import aiofiles
 from pathlib import Path
-from typing import AsyncGenerator, BinaryIO
+from typing import AsyncGenerator, BinaryIO, NamedTuple
+from uuid import UUID
+
+from core.setting import appSetting
+
+
+class StoredFile(NamedTuple):
+    path: Path
+    size: int
+    sha256: str
 
 
 class FileManager:
-    TEMP_FOLDER = Path("temp").resolve()
-    CHUNK_SIZE = 4096
+    STORAGE_FOLDER = Path(appSetting.STORAGE.FOLDER).resolve()
+    CHUNK_SIZE = appSetting.STORAGE.CHUNKSIZE
+
+    @classmethod
+    def content_path(cls, sha256: str, suffix: str) -> Path:
+        return cls.STORAGE_FOLDER / sha256[:2] / sha256[2:4] / (sha256 + suffix)
+
+    @classmethod
+    async def reading(cls, name: str, file: BinaryIO) -> StoredFile:
+        """
+        Сохраняет загрузку в контентно-адресуемое хранилище:
+          - копирование и SHA-256 идут одним циклом в одном потоке
+          - файл пишется во временный и атомарно переименовывается
+          - одинаковое содержимое хранится один раз
+        """
+        return await asyncio.to_thread(cls._store, Path(name).suffix.lower(), file)
+
+    @classmethod
+    def _store(cls, suffix: str, file: BinaryIO) -> StoredFile:
+        temp_folder = cls.STORAGE_FOLDER / "tmp"
+        temp_folder.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, temp_path = tempfile.mkstemp(dir=temp_folder)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                buffer = memoryview(bytearray(cls.CHUNK_SIZE))
+                while read := file.readinto(buffer):
+                    digest.update(buffer[:read])
+                    f.write(buffer[:read])
+                    size += read
+                f.flush()
+                os.fsync(f.fileno())
+
+            path = cls._place(temp_path, digest.hexdigest(), suffix)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return StoredFile(path, size, digest.hexdigest())
+
+    @classmethod
+    def _place(cls, temp_path: str | Path, sha256: str, suffix: str) -> Path:
+        """Переименовывает готовый файл на место по содержимому, без копирования."""
+        path = cls.content_path(sha256, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, path)
+        return path
+
+    @classmethod
+    def part_path(cls, upload_id: UUID) -> Path:
+        return cls.STORAGE_FOLDER / "uploads" / f"{upload_id}.part"
 
     @classmethod
-    async def reading(cls, name: str, file: BinaryIO):
-        cls.TEMP_FOLDER.mkdir(exist_ok=True)
-        async with aiofiles.open(cls.TEMP_FOLDER / name, "wb") as f:
-            while chunk := await file.read(cls.CHUNK_SIZE):
-                await f.write(chunk)
+    async def create_part(cls, upload_id: UUID, size: int) -> None:
+        """Файл загрузки по частям создаётся сразу нужного размера."""
 
-        return cls.TEMP_FOLDER / name
+        def create() -> None:
+            path = cls.part_path(upload_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as f:
+                f.truncate(size)
+
+        await asyncio.to_thread(create)
+
+    @classmethod
+    async def write_part(
+        cls, upload_id: UUID, offset: int, data: bytes, sha256: str | None = None
+    ) -> str:
+        """
+        Пишет часть по её смещению и возвращает её SHA-256:
+          - сумма сверяется с `sha256` клиента до записи, иначе `ValueError`
+            и принятая ранее копия части не портится
+          - `pwrite` на своём дескрипторе, части можно слать параллельно
+          - `fsync` до ответа: подтверждённая часть переживёт падение сервера
+          - разделяемая блокировка против `commit_part`: в уже перенесённый
+            в хранилище файл запись не попадёт, будет `FileNotFoundError`
+        """
+
+        def write() -> str:
+            digest = hashlib.sha256(data).hexdigest()
+            if sha256 is not None and digest != sha256.lower():
+                raise ValueError(f"SHA-256 mismatch: got {digest}")
+            path = cls.part_path(upload_id)
+            fd = os.open(path, os.O_WRONLY)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+                # Файл могли забрать между open и flock: дескриптор смотрит уже
+                # на файл хранилища, а по пути его больше нет.
+                if not os.path.samestat(os.fstat(fd), os.stat(path)):
+                    raise FileNotFoundError(path)
+                view, position = memoryview(data), offset
+                while view:
+                    written = os.pwrite(fd, view, position)
+                    view, position = view[written:], position + written
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            return digest
+
+        return await asyncio.to_thread(write)
+
+    @classmethod
+    async def commit_part(
+        cls, upload_id: UUID, name: str, sha256: str | None = None
+    ) -> StoredFile:
+        """
+        Собранный файл переносится в хранилище переименованием:
+          - SHA-256 всего файла считается одним чтением, записи заново нет
+          - исключительная блокировка ждёт начатые `write_part` и держится
+            до переименования, так что хэш совпадает с содержимым
+          - при несовпадении с `sha256` клиента файл остаётся на месте
+            и бросается `ValueError`
+        """
+
+        def commit() -> StoredFile:
+            path = cls.part_path(upload_id)
+            digest = hashlib.sha256()
+            size = 0
+            with open(path, "rb") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                buffer = memoryview(bytearray(cls.CHUNK_SIZE))
+                while read := f.readinto(buffer):
+                    digest.update(buffer[:read])
+                    size += read
+                if sha256 is not None and digest.hexdigest() != sha256.lower():
+                    raise ValueError(f"SHA-256 mismatch: got {digest.hexdigest()}")
+                stored = cls._place(path, digest.hexdigest(), Path(name).suffix.lower())
+            return StoredFile(stored, size, digest.hexdigest())
+
+        return await asyncio.to_thread(commit)
+
+    @classmethod
+    async def remove_parts(cls, *upload_ids: UUID, older_than: float = 0) -> None:
+        """Удаляет файлы загрузок по id или все, не менявшиеся `older_than` секунд."""
+
+        def remove() -> None:
+            paths = [cls.part_path(upload_id) for upload_id in upload_ids]
+            if older_than:
+                cutoff = time.time() - older_than
+                folder = cls.STORAGE_FOLDER / "uploads"
+                paths += [
+                    path
+                    for path in folder.glob("*.part")
+                    if path.stat().st_mtime < cutoff
+                ]
+            for path in paths:
+                path.unlink(missing_ok=True)
+
+        await asyncio.to_thread(remove)
+
+    @classmethod
+    async def discard(cls, path: str | Path) -> None:
+        """Удаляет файл хранилища, на который не сослалась ни одна запись."""
+        await asyncio.to_thread(Path(path).unlink, missing_ok=True)
 
     @classmethod
     async def writing(cls, path: str) -> AsyncGenerator[bytes, None]:
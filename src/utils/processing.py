@@ -0,0 +1,147 @@
+import mmap
+import posixpath
+import re
+import zipfile
+from pathlib import Path
+from typing import NamedTuple, Optional
+from xml.etree import ElementTree
+
+# Сигнатуры по первым байтам, порядок важен: ZIP проверяется после EPUB.
+SIGNATURES = (
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"AT&TFORM", "image/vnd.djvu"),
+    (0, b"PK\x03\x04", "application/zip"),
+    (60, b"BOOKMOBI", "application/x-mobipocket-ebook"),
+    (0, b"{\\rtf", "application/rtf"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/msword"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF8", "image/gif"),
+)
+HEAD_SIZE = 4096
+
+PDF_PAGE = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+PDF_COUNT = re.compile(rb"/Type\s*/Pages\b[^>]*?/Count\s+(\d+)")
+DJVU_PAGE = re.compile(rb"FORM.{4}DJVU", re.DOTALL)
+
+OPF_NS = {"opf": "http://www.idpf.org/2007/opf"}
+CONTAINER_NS = {"c": "urn:oasis:names:tc:opendocument:xmlns:container"}
+
+
+class FileInfo(NamedTuple):
+    mime_type: str
+    page_count: Optional[int]
+    cover: Optional[bytes]
+    cover_suffix: str
+
+
+def zip_mimetype(head: bytes) -> Optional[str]:
+    """Содержимое первого файла архива, если это несжатый `mimetype` (OCF)."""
+    size = int.from_bytes(head[18:22], "little")
+    name_size = int.from_bytes(head[26:28], "little")
+    extra_size = int.from_bytes(head[28:30], "little")
+    if head[30 : 30 + name_size] != b"mimetype" or head[8:10] != b"\0\0":
+        return None
+    start = 30 + name_size + extra_size
+    return head[start : start + size].decode("ascii", "replace").strip() or None
+
+
+def sniff_mime(head: bytes) -> str:
+    """
+    MIME по содержимому, а не по имени файла:
+      - бинарные форматы узнаются по сигнатуре
+      - EPUB — ZIP, первым файлом которого лежит `mimetype`
+      - FB2 — XML с корнем `FictionBook`, прочий UTF-8 считается текстом
+    """
+    for offset, magic, mime_type in SIGNATURES:
+        if head[offset : offset + len(magic)] == magic:
+            if mime_type == "application/zip":
+                return zip_mimetype(head) or mime_type
+            return mime_type
+
+    text = head.lstrip(b"\xef\xbb\xbf").lstrip()
+    if text.startswith(b"<?xml") and b"<FictionBook" in head:
+        return "application/x-fictionbook+xml"
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # Многобайтный символ мог обрезаться на границе прочитанного.
+        if e.start < len(head) - 3:
+            return "application/octet-stream"
+    return "text/plain"
+
+
+def count_pages(path: Path, mime_type: str) -> Optional[int]:
+    """
+    Число страниц без сторонних библиотек:
+      - PDF: объекты `/Type /Page`, иначе `/Count` корня дерева страниц;
+        в сжатых потоках объектов (PDF 1.5+) их не видно — тогда `None`
+      - DjVu: число `FORM:DJVU` в многостраничном документе
+      - у EPUB и FB2 вёрстка плавающая, страниц нет
+    """
+    if mime_type not in ("application/pdf", "image/vnd.djvu"):
+        return None
+    if path.stat().st_size == 0:
+        return None
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        if mime_type == "image/vnd.djvu":
+            return sum(1 for _ in DJVU_PAGE.finditer(m)) or None
+        if pages := sum(1 for _ in PDF_PAGE.finditer(m)):
+            return pages
+        counts = [int(match.group(1)) for match in PDF_COUNT.finditer(m)]
+        return max(counts, default=0) or None
+
+
+def epub_cover(path: Path) -> tuple[Optional[bytes], str]:
+    """
+    Обложка EPUB как есть, без перекодирования:
+      - EPUB 3: элемент манифеста со свойством `cover-image`
+      - EPUB 2: `<meta name="cover">` ссылается на id элемента манифеста
+    """
+    with zipfile.ZipFile(path) as book:
+        container = ElementTree.fromstring(book.read("META-INF/container.xml"))
+        rootfile = container.find(".//c:rootfile", CONTAINER_NS)
+        if rootfile is None:
+            return None, ""
+        opf_path = rootfile.get("full-path", "")
+        opf = ElementTree.fromstring(book.read(opf_path))
+
+        items = opf.findall(".//opf:manifest/opf:item", OPF_NS)
+        cover = next(
+            (
+                item
+                for item in items
+                if "cover-image" in item.get("properties", "").split()
+            ),
+            None,
+        )
+        if cover is None:
+            meta = opf.find(".//opf:metadata/opf:meta[@name='cover']", OPF_NS)
+            cover_id = meta.get("content") if meta is not None else None
+            cover = next((item for item in items if item.get("id") == cover_id), None)
+        if cover is None or not cover.get("href"):
+            return None, ""
+
+        href = posixpath.normpath(
+            posixpath.join(posixpath.dirname(opf_path), cover.get("href"))
+        )
+        return book.read(href), Path(href).suffix.lower()
+
+
+def inspect_file(path: str) -> FileInfo:
+    """
+    Разбор сохранённого файла, выполняется в пуле процессов:
+      - тип определяется по содержимому, имя загрузки не используется
+      - обложка возвращается байтами, сохраняет её вызывающая сторона
+    """
+    file_path = Path(path)
+    with open(file_path, "rb") as f:
+        mime_type = sniff_mime(f.read(HEAD_SIZE))
+
+    cover, cover_suffix = None, ""
+    if mime_type == "application/epub+zip":
+        try:
+            cover, cover_suffix = epub_cover(file_path)
+        except (KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+            pass
+    return FileInfo(mime_type, count_pages(file_path, mime_type), cover, cover_suffix)
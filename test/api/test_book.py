@@ -1,7 +1,14 @@
+from datetime import UTC, datetime, timedelta, timezone
+
+import orjson
 import pytest
 from httpx import AsyncClient
 from fastapi import status
+from sqlalchemy import event, text
+from api.v1 import serialize
+from api.v1.dependencies import response_cache
 from api.v1.schemas import BookCreate
+from database.session import SessionManager
 
 
 @pytest.fixture(scope="session")
@@ -14,11 +21,24 @@ def book():
     )
 
 
+@pytest.fixture
+def statements():
+    engine = SessionManager._instance.async_engine.sync_engine
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield captured
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.mark.asyncio
 async def test_list_books_empty(client: AsyncClient):
     response = await client.get("/V1/book/")
     assert response.status_code == status.HTTP_200_OK
-    assert response.json() == []
+    assert response.json() == {"items": [], "next_cursor": None}
 
 
 @pytest.mark.asyncio
@@ -55,13 +75,211 @@ async def test_list_books(client: AsyncClient, book: BookCreate):
     response = await client.get("/V1/book/")
     assert response.status_code == status.HTTP_200_OK
 
-    data = response.json()
+    data = response.json()["items"]
     assert data[0]["title"] == book.title
     assert data[0]["author"] == book.author
     assert data[0]["desc"] == book.desc
     assert data[0]["page_count"] == book.page_count
 
 
+@pytest.mark.asyncio
+async def test_list_books_cursor_pagination(client: AsyncClient, book: BookCreate):
+    for _ in range(3):
+        await client.post("/V1/book/", json=book.model_dump())
+
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        response = await client.get("/V1/book/", params=params)
+        assert response.status_code == status.HTTP_200_OK
+
+        page = response.json()
+        assert len(page["items"]) <= 2
+        ids.extend(item["id"] for item in page["items"])
+        if not (cursor := page["next_cursor"]):
+            break
+
+    total = await client.get("/V1/book/", params={"limit": 500})
+    assert ids == [item["id"] for item in total.json()["items"]]
+    assert len(ids) == len(set(ids)) >= 4
+
+
+@pytest.mark.asyncio
+async def test_list_books_invalid_cursor(client: AsyncClient):
+    response = await client.get("/V1/book/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_list_books_filter_and_sort(client: AsyncClient):
+    for title, pages in (("Beta", 120), ("Alpha", 80), ("Gamma", 300), ("Delta", 150)):
+        await client.post(
+            "/V1/book/",
+            json={"title": title, "author": "Sorter", "desc": "", "page_count": pages},
+        )
+
+    params = {"author": "Sorter", "min_pages": 100, "sort": "-title", "limit": 2}
+    first = await client.get("/V1/book/", params=params)
+    assert first.status_code == status.HTTP_200_OK
+    second = await client.get(
+        "/V1/book/", params=params | {"cursor": first.json()["next_cursor"]}
+    )
+    titles = [item["title"] for item in first.json()["items"] + second.json()["items"]]
+    assert titles == ["Gamma", "Delta", "Beta"]
+    assert second.json()["next_cursor"] is None
+
+    other = await client.get(
+        "/V1/book/",
+        params={"sort": "title", "cursor": first.json()["next_cursor"]},
+    )
+    assert other.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_list_books_created_range_with_offset(client: AsyncClient):
+    response = await client.post(
+        "/V1/book/",
+        json={"title": "Offset", "author": "Offset", "desc": "", "page_count": 1},
+    )
+    created_at = datetime.fromisoformat(response.json()["created_at"])
+    kyiv = timezone(timedelta(hours=3))
+
+    async def titles(**params: datetime) -> list[str]:
+        query = {"author": "Offset"} | {
+            name: value.isoformat() for name, value in params.items()
+        }
+        response = await client.get("/V1/book/", params=query)
+        return [item["title"] for item in response.json()["items"]]
+
+    # Те же моменты времени, записанные в UTC+3.
+    local = created_at.replace(tzinfo=UTC).astimezone(kyiv)
+    assert await titles(created_after=local) == ["Offset"]
+    assert await titles(created_after=local + timedelta(seconds=1)) == []
+    assert await titles(created_before=local + timedelta(seconds=1)) == ["Offset"]
+
+
+@pytest.mark.asyncio
+async def test_list_books_unknown_sort(client: AsyncClient):
+    response = await client.get("/V1/book/", params={"sort": "desc"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_list_books_expand(client: AsyncClient, book: BookCreate, statements):
+    create_response = await client.post("/V1/book/", json=book.model_dump())
+    book_id = create_response.json()["id"]
+    await client.post(
+        f"/V1/publishing-house/{book_id}", json={"name": "Piter", "lang": "ru"}
+    )
+
+    async def fetch(expand: str | None) -> dict:
+        params = {"limit": 500} | ({"expand": expand} if expand is not None else {})
+        statements.clear()
+        response = await client.get("/V1/book/", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        return next(b for b in response.json()["items"] if b["id"] == book_id)
+
+    assert "pubs" not in await fetch(None)
+    assert len(statements) == 2
+
+    item = await fetch("pubs")
+    assert item["pubs"][0]["name"] == "Piter"
+    assert "files" not in item["pubs"][0]
+    assert len(statements) == 2
+
+    item = await fetch("pubs.files")
+    assert item["pubs"][0]["files"] == []
+    assert len(statements) == 2
+
+    statements.clear()
+    response = await client.get(f"/V1/book/{book_id}", params={"expand": "pubs"})
+    assert response.json()["pubs"][0]["name"] == "Piter"
+    assert len(statements) == 2
+
+    response = await client.get("/V1/book/", params={"expand": "authors"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_list_books_expand_pages_by_book(client: AsyncClient):
+    for i in range(3):
+        created = await client.post(
+            "/V1/book/",
+            json={"title": f"Tree {i}", "author": "Tree", "desc": "", "page_count": 1},
+        )
+        for name in ("A", "B", "C"):
+            await client.post(
+                f"/V1/publishing-house/{created.json()['id']}",
+                json={"name": name, "lang": "en"},
+            )
+
+    params = {"author": "Tree", "limit": 2, "expand": "pubs", "sort": "title"}
+    first = await client.get("/V1/book/", params=params)
+    second = await client.get(
+        "/V1/book/", params=params | {"cursor": first.json()["next_cursor"]}
+    )
+
+    books = first.json()["items"] + second.json()["items"]
+    assert [book["title"] for book in books] == ["Tree 0", "Tree 1", "Tree 2"]
+    assert all(
+        [pub["name"] for pub in book["pubs"]] == ["A", "B", "C"] for book in books
+    )
+    assert second.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_book_expand(client: AsyncClient, book: BookCreate):
+    create_response = await client.post("/V1/book/", json=book.model_dump())
+    book_id = create_response.json()["id"]
+
+    full = await client.get(f"/V1/book/{book_id}")
+    assert full.json()["pubs"] == []
+
+    flat = await client.get(f"/V1/book/{book_id}", params={"expand": ""})
+    assert "pubs" not in flat.json()
+    assert flat.headers["x-cache"] == "MISS"
+    assert flat.headers["etag"] != full.headers["etag"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("gzip", [False, True])
+async def test_export_books(client: AsyncClient, book: BookCreate, gzip: bool):
+    await client.post("/V1/book/", json=book.model_dump())
+
+    response = await client.get(
+        "/V1/book/export",
+        params={"gzip": gzip},
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert (response.headers.get("content-encoding") == "gzip") is gzip
+
+    books = [orjson.loads(line) for line in response.text.splitlines()]
+    listed = await client.get("/V1/book/", params={"limit": 500})
+    assert [b["id"] for b in books] == [b["id"] for b in listed.json()["items"]]
+    assert books[0]["title"] == book.title
+
+
+@pytest.mark.asyncio
+async def test_get_book_expand_in_batches(
+    client: AsyncClient, book: BookCreate, monkeypatch
+):
+    monkeypatch.setattr(serialize, "IN_BATCH", 1)
+    create_response = await client.post("/V1/book/", json=book.model_dump())
+    book_id = create_response.json()["id"]
+    for name in ("O'Reilly", "Manning"):
+        await client.post(
+            f"/V1/publishing-house/{book_id}", json={"name": name, "lang": "en"}
+        )
+
+    response = await client.get(f"/V1/book/{book_id}")
+    assert sorted(pub["name"] for pub in response.json()["pubs"]) == [
+        "Manning",
+        "O'Reilly",
+    ]
+
+
 @pytest.mark.asyncio
 async def test_get_book(client: AsyncClient, book: BookCreate):
     create_response = await client.post("/V1/book/", json=book.model_dump())
@@ -78,6 +296,91 @@ async def test_get_book(client: AsyncClient, book: BookCreate):
     assert data["page_count"] == book.page_count
 
 
+@pytest.mark.asyncio
+async def test_get_book_cache_invalidation(client: AsyncClient, book: BookCreate):
+    create_response = await client.post("/V1/book/", json=book.model_dump())
+    book_id = create_response.json()["id"]
+
+    first = await client.get(f"/V1/book/{book_id}")
+    second = await client.get(f"/V1/book/{book_id}")
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert first.json() == second.json()
+
+    await client.patch(f"/V1/book/{book_id}", json={"title": "New title"})
+    response = await client.get(f"/V1/book/{book_id}")
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["title"] == "New title"
+
+    await client.post(
+        f"/V1/publishing-house/{book_id}", json={"name": "O'Reilly", "lang": "en"}
+    )
+    response = await client.get(f"/V1/book/{book_id}")
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["pubs"][0]["name"] == "O'Reilly"
+
+
+@pytest.mark.asyncio
+async def test_get_book_conditional(client: AsyncClient, book: BookCreate):
+    create_response = await client.post("/V1/book/", json=book.model_dump())
+    book_id = create_response.json()["id"]
+
+    response = await client.get(f"/V1/book/{book_id}")
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert "last-modified" in response.headers
+
+    for _ in range(2):
+        response = await client.get(
+            f"/V1/book/{book_id}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["etag"] == etag
+        await response_cache.clear()
+
+    await client.post(
+        f"/V1/publishing-house/{book_id}", json={"name": "Packt", "lang": "en"}
+    )
+    response = await client.get(f"/V1/book/{book_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_list_books_conditional(client: AsyncClient, book: BookCreate):
+    response = await client.get("/V1/book/")
+    etag = response.headers["etag"]
+
+    response = await client.get("/V1/book/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = await client.get(
+        "/V1/book/", params={"limit": 1}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    await client.post("/V1/book/", json=book.model_dump())
+    response = await client.get("/V1/book/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_list_books_version_follows_children(
+    client: AsyncClient, book: BookCreate
+):
+    book_id = (await client.post("/V1/book/", json=book.model_dump())).json()["id"]
+    etags = [(await client.get("/V1/book/")).headers["etag"]]
+
+    pub = await client.post(
+        f"/V1/publishing-house/{book_id}", json={"name": "Ace", "lang": "en"}
+    )
+    etags.append((await client.get("/V1/book/")).headers["etag"])
+    await client.delete(f"/V1/publishing-house/{pub.json()['id']}")
+    etags.append((await client.get("/V1/book/")).headers["etag"])
+
+    assert len(set(etags)) == 3
+
+
 @pytest.mark.asyncio
 async def test_update_book(client: AsyncClient, book: BookCreate):
     create_response = await client.post("/V1/book/", json=book.model_dump())
@@ -108,3 +411,65 @@ async def test_delete_book(client: AsyncClient, book: BookCreate):
 
     response = await client.delete(f"/V1/book/{book_id}")
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_search_books(client: AsyncClient):
+    async def create(title: str, desc: str) -> str:
+        response = await client.post(
+            "/V1/book/",
+            json={"title": title, "author": "Searcher", "desc": desc, "page_count": 1},
+        )
+        return response.json()["id"]
+
+    in_desc = await create("Mountains", "a zephyrine tale")
+    in_title = await create("Zephyrine Winds", "weather")
+    in_pub = await create("Oceans", "water")
+    await client.post(
+        f"/V1/publishing-house/{in_pub}", json={"name": "Zephyrine Press", "lang": "en"}
+    )
+
+    response = await client.get("/V1/book/search", params={"q": "zephyr"})
+    assert response.status_code == status.HTTP_200_OK
+    ids = [item["id"] for item in response.json()["items"]]
+    assert ids == [in_title, in_pub, in_desc]
+
+    first = await client.get("/V1/book/search", params={"q": "zephyrine", "limit": 2})
+    cursor = first.json()["next_cursor"]
+    second = await client.get(
+        "/V1/book/search", params={"q": "zephyrine", "limit": 2, "cursor": cursor}
+    )
+    paged = [item["id"] for item in first.json()["items"] + second.json()["items"]]
+    assert paged == ids
+    assert second.json()["next_cursor"] is None
+
+    await client.patch(f"/V1/book/{in_title}", json={"title": "Calm Winds"})
+    await client.delete(f"/V1/book/{in_pub}")
+    response = await client.get("/V1/book/search", params={"q": "zephyrine"})
+    assert [item["id"] for item in response.json()["items"]] == [in_desc]
+
+
+@pytest.mark.asyncio
+async def test_search_books_after_rowid_change(client: AsyncClient):
+    response = await client.post(
+        "/V1/book/",
+        json={"title": "Quixotic", "author": "Searcher", "desc": "", "page_count": 1},
+    )
+    book_id = response.json()["id"]
+    # rowid меняется, когда SQLite пересоздаёт таблицу или делает VACUUM.
+    async with SessionManager.scoped_session() as session:
+        await session.execute(text("UPDATE book SET rowid = rowid + 100000"))
+        await session.commit()
+
+    response = await client.get("/V1/book/search", params={"q": "quixotic"})
+    assert [item["id"] for item in response.json()["items"]] == [book_id]
+
+    await client.patch(f"/V1/book/{book_id}", json={"title": "Stoic"})
+    response = await client.get("/V1/book/search", params={"q": "stoic"})
+    assert [item["id"] for item in response.json()["items"]] == [book_id]
+
+
+@pytest.mark.asyncio
+async def test_search_books_invalid_query(client: AsyncClient):
+    response = await client.get("/V1/book/search", params={"q": '"*'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
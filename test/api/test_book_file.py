@@ -0,0 +1,444 @@
+import hashlib
+import io
+import zipfile
+from uuid import UUID, uuid4
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import status
+
+from api.v1.jobs import job_queue
+from api.v1.schemas import BookRead, PublishingHouseRead
+from core.setting import appSetting
+from database.session import SessionManager
+from database.model import Book, BookFileUpload, PublishingHouse
+from utils.file import FileManager
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(FileManager, "STORAGE_FOLDER", tmp_path)
+    return tmp_path
+
+
+@pytest_asyncio.fixture
+async def publishing_house_id(client: AsyncClient) -> str:
+    book = await client.post(
+        "/V1/book/",
+        json={"title": "Files", "author": "Files", "desc": "files", "page_count": 1},
+    )
+    pub = await client.post(
+        f"/V1/publishing-house/{book.json()['id']}",
+        json={"name": "No Starch", "lang": "en"},
+    )
+    return pub.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_create_book_file(client: AsyncClient, storage, publishing_house_id: str):
+    content = b"%PDF-1.7" + b"x" * 4096
+
+    response = await client.post(
+        f"/V1/book-file/{publishing_house_id}",
+        files={"file": ("book.pdf", content, "application/pdf")},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    data = response.json()
+    assert data["file_type"] == ".pdf"
+    assert data["size"] == "4.0KiB"
+    assert data["sha256"] == hashlib.sha256(content).hexdigest()
+    assert len(list(storage.rglob("*.pdf"))) == 1
+
+
+@pytest_asyncio.fixture
+async def book_file(client: AsyncClient, storage, publishing_house_id: str) -> dict:
+    content = bytes(range(256)) * 64
+    response = await client.post(
+        f"/V1/book-file/{publishing_house_id}",
+        files={"file": ("book.epub", content, "application/epub+zip")},
+    )
+    return response.json() | {"content": content}
+
+
+@pytest.mark.asyncio
+async def test_download_book_file(client: AsyncClient, book_file: dict):
+    response = await client.get(
+        f"/V1/book-file/{book_file['id']}/content",
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == book_file["content"]
+    assert response.headers["content-type"] == "application/epub+zip"
+    assert response.headers["content-length"] == str(len(book_file["content"]))
+    assert response.headers["etag"] == f'"{book_file["sha256"]}"'
+    assert response.headers["accept-ranges"] == "bytes"
+
+    response = await client.get(
+        f"/V1/book-file/{book_file['id']}/content",
+        headers={"If-None-Match": f'"{book_file["sha256"]}"'},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_download_book_file_range(client: AsyncClient, book_file: dict):
+    url = f"/V1/book-file/{book_file['id']}/content"
+    size = len(book_file["content"])
+
+    response = await client.get(
+        url, headers={"Range": "bytes=100-199", "Accept-Encoding": "identity"}
+    )
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == book_file["content"][100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{size}"
+    assert response.headers["content-length"] == "100"
+
+    response = await client.get(
+        url,
+        headers={
+            "Range": "bytes=100-199",
+            "If-Range": '"stale"',
+            "Accept-Encoding": "identity",
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == book_file["content"]
+
+    response = await client.get(url, headers={"Range": f"bytes={size}-"})
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+
+@pytest.mark.asyncio
+async def test_download_book_file_not_found(client: AsyncClient):
+    response = await client.get(
+        "/V1/book-file/00000000-0000-0000-0000-000000000000/content"
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_download_book_file_database_error(
+    client: AsyncClient, book_file: dict, monkeypatch
+):
+    async def scalar(*args, **kwargs):
+        raise OperationalError("SELECT", {}, Exception("database is locked"))
+
+    # `read_session` глотает ошибку, ответ как у ненайденного файла.
+    monkeypatch.setattr(AsyncSession, "scalar", scalar)
+    response = await client.get(f"/V1/book-file/{book_file['id']}/content")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_create_book_file_missing_publishing_house(client: AsyncClient, storage):
+    response = await client.post(
+        "/V1/book-file/00000000-0000-0000-0000-000000000000",
+        files={"file": ("book.pdf", b"%PDF-1.7", "application/pdf")},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    # Файл без записи о нём не остаётся в хранилище.
+    assert list(storage.rglob("*.pdf")) == []
+
+
+@pytest.mark.asyncio
+async def test_list_publishing_houses_by_file_type(
+    client: AsyncClient, book_file: dict, publishing_house_id: str
+):
+    response = await client.get(
+        "/V1/publishing-house/", params={"file_type": "epub", "lang": "en"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert publishing_house_id in [item["id"] for item in response.json()["items"]]
+
+    response = await client.get("/V1/publishing-house/", params={"file_type": "djvu"})
+    assert response.json()["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_read_endpoints_match_schemas(
+    client: AsyncClient, session, book_file: dict, publishing_house_id: str
+):
+    pub = await session.get(PublishingHouse, UUID(publishing_house_id))
+    book = await session.get(Book, pub.book_id)
+
+    response = await client.get(f"/V1/book/{book.id}")
+    assert response.json() == BookRead.model_validate(book).model_dump(mode="json")
+
+    response = await client.get(
+        "/V1/publishing-house/", params={"book_id": str(book.id), "expand": "files"}
+    )
+    assert response.json()["items"] == [
+        PublishingHouseRead.model_validate(pub).model_dump(mode="json")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_book_summary(
+    client: AsyncClient, session, book_file: dict, publishing_house_id: str
+):
+    pub = await session.get(PublishingHouse, UUID(publishing_house_id))
+    other = await client.post(
+        f"/V1/publishing-house/{pub.book_id}", json={"name": "Empty", "lang": "de"}
+    )
+
+    response = await client.get(f"/V1/book/{pub.book_id}/summary")
+    assert response.status_code == status.HTTP_200_OK
+    summary = response.json()
+    assert summary["pub_count"] == 2
+    assert summary["file_count"] == 1
+    assert summary["total_bytes"] == len(book_file["content"])
+
+    response = await client.get(
+        f"/V1/book/{pub.book_id}/summary",
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # Каскад удаляет файлы издательства вместе с ним.
+    await client.delete(f"/V1/publishing-house/{publishing_house_id}")
+    response = await client.get(f"/V1/book/{pub.book_id}/summary")
+    assert response.json() | {"last_changed": None} == {
+        "book_id": str(pub.book_id),
+        "pub_count": 1,
+        "file_count": 0,
+        "total_bytes": 0,
+        "last_changed": None,
+    }
+
+    await client.delete(f"/V1/publishing-house/{other.json()['id']}")
+    await client.delete(f"/V1/book/{pub.book_id}")
+    response = await client.get(f"/V1/book/{pub.book_id}/summary")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def epub_with_cover(cover: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as book:
+        book.writestr(zipfile.ZipInfo("mimetype"), "application/epub+zip")
+        book.writestr(
+            "META-INF/container.xml",
+            '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="OEBPS/content.opf"/></rootfiles>'
+            "</container>",
+        )
+        book.writestr(
+            "OEBPS/content.opf",
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0"><manifest>'
+            '<item id="c" href="images/cover.png" properties="cover-image"/>'
+            "</manifest></package>",
+        )
+        book.writestr("OEBPS/images/cover.png", cover)
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_book_file_processing(
+    client: AsyncClient, storage, publishing_house_id: str
+):
+    cover = b"\x89PNG\r\n\x1a\n" + b"cover" * 100
+    # Имя врёт о типе: обработка смотрит только на содержимое.
+    response = await client.post(
+        f"/V1/book-file/{publishing_house_id}",
+        files={"file": ("book.txt", epub_with_cover(cover), "text/plain")},
+    )
+    file_id = response.json()["id"]
+
+    response = await client.get(f"/V1/book-file/{file_id}/status")
+    assert response.json()["status"] == "pending"
+
+    try:
+        assert await job_queue.drain() >= 1
+    finally:
+        await job_queue.stop()
+
+    response = await client.get(f"/V1/book-file/{file_id}/status")
+    assert response.json() == {
+        "id": file_id,
+        "status": "done",
+        "attempts": 1,
+        "error": None,
+        "mime_type": "application/epub+zip",
+        "page_count": None,
+        "has_cover": True,
+    }
+
+    response = await client.get(f"/V1/book-file/{file_id}/cover")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == cover
+    assert response.headers["content-type"] == "image/png"
+
+    response = await client.get(
+        f"/V1/book-file/{file_id}/content", headers={"Accept-Encoding": "identity"}
+    )
+    assert response.headers["content-type"] == "application/epub+zip"
+
+
+@pytest.mark.asyncio
+async def test_book_file_status_not_found(client: AsyncClient):
+    response = await client.get(f"/V1/book-file/{uuid4()}/status")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload(client: AsyncClient, storage, publishing_house_id: str):
+    content = bytes(range(256)) * 40
+    response = await client.post(
+        "/V1/book-file/uploads",
+        json={
+            "publishing_house_id": publishing_house_id,
+            "filename": "scan.pdf",
+            "size": len(content),
+            "chunk_size": 4096,
+        },
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert "X-RateLimit-Remaining" in response.headers
+    upload = response.json()
+    assert (upload["chunk_count"], upload["received"]) == (3, [])
+    url = f"/V1/book-file/uploads/{upload['id']}"
+
+    def chunk(index: int) -> bytes:
+        return content[index * 4096 : (index + 1) * 4096]
+
+    response = await client.put(
+        f"{url}/chunks/0",
+        content=chunk(0),
+        headers={"X-Chunk-SHA256": hashlib.sha256(b"other").hexdigest()},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    response = await client.put(f"{url}/chunks/1", content=chunk(1)[:-1])
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    # Части идут в любом порядке. Параллельно их здесь не шлём: тестовая база
+    # в памяти живёт на одном соединении, и транзакции запросов смешались бы.
+    responses = [
+        await client.put(
+            f"{url}/chunks/{index}",
+            content=chunk(index),
+            headers={"X-Chunk-SHA256": hashlib.sha256(chunk(index)).hexdigest()},
+        )
+        for index in (2, 0)
+    ]
+    assert [response.json()["offset"] for response in responses] == [8192, 0]
+    # Части не расходуют общий лимит запросов.
+    assert "X-RateLimit-Remaining" not in responses[0].headers
+    assert responses[0].json()["size"] == len(content) - 8192
+
+    assert (await client.get(url)).json()["received"] == [0, 2]
+    response = await client.post(f"{url}/complete")
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["detail"]["missing"] == [1]
+    assert response.json()["detail"]["missing_count"] == 1
+
+    await client.put(f"{url}/chunks/1", content=chunk(1))
+    response = await client.post(
+        f"{url}/complete", json={"sha256": hashlib.sha256(b"other").hexdigest()}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = await client.post(
+        f"{url}/complete", json={"sha256": hashlib.sha256(content).hexdigest()}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    book_file = response.json()
+    assert book_file["file_type"] == ".pdf"
+    assert book_file["sha256"] == hashlib.sha256(content).hexdigest()
+
+    response = await client.get(
+        f"/V1/book-file/{book_file['id']}/content",
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert response.content == content
+    assert (await client.get(url)).status_code == status.HTTP_404_NOT_FOUND
+    assert list(storage.glob("uploads/*")) == []
+
+    response = await client.get(f"/V1/book-file/{book_file['id']}/status")
+    assert response.json()["status"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_chunk_count_is_capped(
+    client: AsyncClient, storage, publishing_house_id: str
+):
+    max_chunks = appSetting.STORAGE.UPLOADMAXCHUNKS
+    response = await client.post(
+        "/V1/book-file/uploads",
+        json={
+            "publishing_house_id": publishing_house_id,
+            "filename": "scan.pdf",
+            "size": 2 * max_chunks,
+            "chunk_size": 1,
+        },
+    )
+    upload = response.json()
+    assert (upload["chunk_size"], upload["chunk_count"]) == (2, max_chunks)
+
+    response = await client.post(f"/V1/book-file/uploads/{upload['id']}/complete")
+    detail = response.json()["detail"]
+    assert detail["missing"] == list(range(100))
+    assert detail["missing_count"] == max_chunks
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_is_locked_while_completing(
+    client: AsyncClient, storage, publishing_house_id: str
+):
+    response = await client.post(
+        "/V1/book-file/uploads",
+        json={
+            "publishing_house_id": publishing_house_id,
+            "filename": "scan.pdf",
+            "size": 10,
+        },
+    )
+    upload_id = UUID(response.json()["id"])
+    url = f"/V1/book-file/uploads/{upload_id}"
+    # Так выглядит загрузка, чей `complete` сейчас считает хэш.
+    async with SessionManager.scoped_session() as session:
+        await session.execute(
+            update(BookFileUpload)
+            .where(BookFileUpload.id == upload_id)
+            .values(completing=True)
+        )
+        await session.commit()
+
+    response = await client.put(f"{url}/chunks/0", content=b"x" * 10)
+    assert response.status_code == status.HTTP_409_CONFLICT
+    response = await client.post(f"{url}/complete")
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["detail"] == "Upload is already completing"
+
+
+@pytest.mark.asyncio
+async def test_abort_chunked_upload(
+    client: AsyncClient, storage, publishing_house_id: str
+):
+    response = await client.post(
+        "/V1/book-file/uploads",
+        json={
+            "publishing_house_id": publishing_house_id,
+            "filename": "scan.djvu",
+            "size": 10,
+        },
+    )
+    url = f"/V1/book-file/uploads/{response.json()['id']}"
+    assert list(storage.glob("uploads/*.part"))
+
+    response = await client.put(f"{url}/chunks/1", content=b"x")
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+    assert (await client.delete(url)).status_code == status.HTTP_200_OK
+    assert list(storage.glob("uploads/*.part")) == []
+    response = await client.put(f"{url}/chunks/0", content=b"x" * 10)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = await client.post(
+        "/V1/book-file/uploads",
+        json={"publishing_house_id": str(uuid4()), "filename": "a.pdf", "size": 1},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,106 @@
+import orjson
+import pytest
+from httpx import AsyncClient
+from fastapi import status
+
+MISSING_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def book_payload(i: int) -> dict:
+    return {"title": f"Bulk {i}", "author": "Bulk", "desc": "bulk", "page_count": i}
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_books_json(client: AsyncClient):
+    payload = [book_payload(1), {"title": "no author"}, book_payload(2)]
+
+    response = await client.post("/V1/book/bulk", json=payload)
+    assert response.status_code == status.HTTP_200_OK
+
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (2, 1)
+    assert [item["status"] for item in data["items"]] == [201, 422, 201]
+
+    book = await client.get(f"/V1/book/{data['items'][2]['id']}")
+    assert book.json()["title"] == "Bulk 2"
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_books_ndjson(client: AsyncClient):
+    body = b"\n".join(orjson.dumps(book_payload(i)) for i in range(5)) + b"\nnot json"
+
+    response = await client.post(
+        "/V1/book/bulk",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    data = response.json()
+    assert [item["status"] for item in data["items"]] == [201] * 5 + [422]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_books_rejects_non_array(client: AsyncClient):
+    response = await client.post("/V1/book/bulk", json=book_payload(1))
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_and_delete_books(client: AsyncClient):
+    created = await client.post(
+        "/V1/book/bulk", json=[book_payload(1), book_payload(2)]
+    )
+    ids = [item["id"] for item in created.json()["items"]]
+
+    response = await client.patch(
+        "/V1/book/bulk",
+        json=[
+            {"id": ids[0], "title": "Renamed"},
+            {"id": ids[1], "page_count": 99},
+            {"id": MISSING_ID, "title": "Ghost"},
+        ],
+    )
+    assert [item["status"] for item in response.json()["items"]] == [200, 200, 404]
+
+    first = (await client.get(f"/V1/book/{ids[0]}")).json()
+    second = (await client.get(f"/V1/book/{ids[1]}")).json()
+    assert (first["title"], second["page_count"]) == ("Renamed", 99)
+
+    response = await client.request("DELETE", "/V1/book/bulk", json=[*ids, MISSING_ID])
+    assert [item["status"] for item in response.json()["items"]] == [200, 200, 404]
+
+    response = await client.get(f"/V1/book/{ids[0]}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_bulk_publishing_houses(client: AsyncClient):
+    created = await client.post("/V1/book/bulk", json=[book_payload(1)])
+    book_id = created.json()["items"][0]["id"]
+    await client.get(f"/V1/book/{book_id}")
+
+    response = await client.post(
+        "/V1/publishing-house/bulk",
+        json=[
+            {"book_id": book_id, "name": "Manning", "lang": "en"},
+            {"book_id": MISSING_ID, "name": "Ghost", "lang": "en"},
+            {"book_id": book_id, "name": "Piter", "lang": "ru"},
+        ],
+    )
+    items = response.json()["items"]
+    assert [item["status"] for item in items] == [201, 404, 201]
+
+    book = (await client.get(f"/V1/book/{book_id}")).json()
+    assert {pub["name"] for pub in book["pubs"]} == {"Manning", "Piter"}
+
+    response = await client.patch(
+        "/V1/publishing-house/bulk", json=[{"id": items[0]["id"], "lang": "uk"}]
+    )
+    assert response.json()["succeeded"] == 1
+
+    response = await client.request(
+        "DELETE", "/V1/publishing-house/bulk", json=[items[2]["id"]]
+    )
+    assert response.json()["succeeded"] == 1
+
+    book = (await client.get(f"/V1/book/{book_id}")).json()
+    assert [(pub["name"], pub["lang"]) for pub in book["pubs"]] == [("Manning", "uk")]
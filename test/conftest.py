@@ -1,18 +1,42 @@
 import sys
 from pathlib import Path
 from httpx import AsyncClient, ASGITransport
+import pytest
 import pytest_asyncio
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
 
+from api.v1 import dependencies
+from core.ratelimit import MemoryBackend
+from core.setting import appSetting
 from database.session import SessionManager
 from database.model import CoreModel
 from main import app
 
+# Весь прогон идёт с одного адреса — лимит по умолчанию набирается за секунды.
+dependencies.rate_limit_backend = MemoryBackend(limit=100_000, period=60)
+
+
+class FakeClock:
+    """Часы для `clock=` у лимитов, кэша и реплик: время двигают руками."""
+
+    def __init__(self, now: float = 1_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
 
 @pytest_asyncio.fixture(scope="session", autouse=True)
 async def init_db():
-    await SessionManager("sqlite+aiosqlite:///:memory:").init_db(CoreModel.metadata)
+    await SessionManager(
+        "sqlite+aiosqlite:///:memory:", pragmas=appSetting.DATABASE.PRAGMAS
+    ).init_db(CoreModel.metadata)
     yield
     await SessionManager.close()
 
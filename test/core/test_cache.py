@@ -0,0 +1,46 @@
+import pytest
+
+from core.cache import MemoryCache, SQLiteCache
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_ttl_and_stats(clock):
+    cache = MemoryCache(ttl=10, clock=clock)
+
+    assert await cache.get("book:1") is None
+    await cache.set("book:1", b"{}")
+    assert await cache.get("book:1") == b"{}"
+
+    clock.now += 10
+    assert await cache.get("book:1") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_ratio": 1 / 3}
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used(clock):
+    cache = MemoryCache(ttl=10, max_entries=2, clock=clock)
+
+    await cache.set("a", b"a")
+    await cache.set("b", b"b")
+    await cache.get("a")
+    await cache.set("c", b"c")
+
+    assert len(cache) == 2
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"a"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_is_shared(tmp_path, clock):
+    path = tmp_path / "cache.db"
+    writer = SQLiteCache(ttl=10, path=path, clock=clock)
+    reader = SQLiteCache(ttl=10, path=path, clock=clock)
+
+    await writer.set("book:1", b"{}")
+    assert await reader.get("book:1") == b"{}"
+
+    await writer.delete("book:1")
+    assert await reader.get("book:1") is None
+
+    await writer.close()
+    await reader.close()
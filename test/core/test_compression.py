@@ -0,0 +1,114 @@
+import gzip
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from core.compression import CompressionMiddleware, negotiate
+
+TEXT = "library " * 200
+
+
+async def text(request):
+    return PlainTextResponse(TEXT)
+
+
+async def small(request):
+    return PlainTextResponse("tiny")
+
+
+async def epub(request):
+    return Response(b"PK" * 1000, media_type="application/epub+zip")
+
+
+async def stream(request):
+    async def lines():
+        for _ in range(10):
+            yield TEXT.encode()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def partial(request):
+    return PlainTextResponse(
+        TEXT, status_code=206, headers={"Content-Range": "bytes 0-1599/3200"}
+    )
+
+
+async def encoded(request):
+    return Response(
+        gzip.compress(TEXT.encode()),
+        media_type="text/plain",
+        headers={"Content-Encoding": "gzip"},
+    )
+
+
+def make_client(**kwargs) -> AsyncClient:
+    app = Starlette(
+        routes=[
+            Route(f"/{endpoint.__name__}", endpoint)
+            for endpoint in (text, small, epub, stream, partial, encoded)
+        ]
+    )
+    app.add_middleware(CompressionMiddleware, **kwargs)
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("gzip, br", "br"),
+        ("gzip;q=1, br;q=0.5", "gzip"),
+        ("br;q=0, gzip;q=0.1", "gzip"),
+        ("*", "br"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert negotiate(accept, ["br", "gzip"]) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("thread_size", [0, 2**20])
+async def test_compress_allowed_type(thread_size):
+    async with make_client(thread_size=thread_size) as client:
+        response = await client.get("/text", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(TEXT)
+    assert response.text == TEXT
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "path, encoding",
+    [("/small", None), ("/epub", None), ("/partial", None), ("/encoded", "gzip")],
+)
+async def test_skip(path, encoding):
+    async with make_client() as client:
+        response = await client.get(path, headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers.get("content-encoding") == encoding
+
+
+@pytest.mark.asyncio
+async def test_skip_without_accept_encoding():
+    async with make_client() as client:
+        response = await client.get("/text", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text == TEXT
+
+
+@pytest.mark.asyncio
+async def test_compress_stream():
+    async with make_client(mime_types=["application/x-ndjson"]) as client:
+        response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == TEXT * 10
@@ -0,0 +1,66 @@
+import logging
+from io import StringIO
+
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from core.context import REQUEST_ID_HEADER
+from core.logger import ContextFilter, JsonFormatter
+
+
+@pytest.fixture
+def json_records():
+    stream = StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    handler.addFilter(ContextFilter())
+    loggers = [logging.getLogger("core.context"), logging.getLogger("database.session")]
+    for logger in loggers:
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+
+    yield lambda: [orjson.loads(line) for line in stream.getvalue().splitlines()]
+
+    for logger in loggers:
+        logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+
+
+@pytest.mark.asyncio
+async def test_request_id_generated(client: AsyncClient):
+    response = await client.get("/V1/book/")
+
+    assert len(response.headers[REQUEST_ID_HEADER]) == 32
+
+
+@pytest.mark.asyncio
+async def test_request_id_in_logs(client: AsyncClient, json_records):
+    response = await client.get(
+        "/V1/book/00000000-0000-0000-0000-000000000000",
+        headers={REQUEST_ID_HEADER: "trace-me"},
+    )
+    assert response.headers[REQUEST_ID_HEADER] == "trace-me"
+
+    records = json_records()
+    session_records = [r for r in records if r["logger"] == "database.session"]
+    assert session_records
+    assert {r["request_id"] for r in session_records} == {"trace-me"}
+
+    (access,) = [r for r in records if r["logger"] == "core.context"]
+    assert access["request_id"] == "trace-me"
+    assert access["route"] == "/V1/book/{id}"
+    assert access["status"] == 404
+    assert access["latency_ms"] > 0
+
+
+def test_json_formatter_outside_request():
+    record = logging.LogRecord("test", logging.INFO, "app.py", 1, "hi %s", ("x",), None)
+    ContextFilter().filter(record)
+
+    payload = orjson.loads(JsonFormatter().format(record))
+
+    assert payload["message"] == "hi x"
+    assert payload["level"] == "INFO"
+    assert payload["request_id"] == "-"
+    assert "route" not in payload
@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import OperationalError
+
+from api.v1.jobs import process_book_file
+from core.jobs import DONE, FAILED, PENDING, RUNNING, JobQueue
+from database.mixin import utcnow
+from database.model import Book, BookFile, BookFileJob, PublishingHouse
+from database.session import SessionManager
+from utils.processing import FileInfo
+
+
+def make_queue(handler, **options) -> JobQueue:
+    return JobQueue(
+        BookFileJob,
+        handler,
+        **{
+            "workers": 1,
+            "processes": 1,
+            "max_attempts": 2,
+            "backoff": 60,
+            "timeout": 30,
+            "poll_interval": 1,
+            "retention": 3600,
+        }
+        | options,
+    )
+
+
+async def noop(queue, job):
+    pass
+
+
+async def fail(queue, job):
+    raise RuntimeError("no pages")
+
+
+@pytest_asyncio.fixture
+async def job_id():
+    # Очередь общая на всю сессию тестов: чужие готовые задачи убираются заранее.
+    await make_queue(noop).drain()
+
+    async with SessionManager.scoped_session() as session:
+        book = Book(title="Jobs", author="Jobs")
+        pub = PublishingHouse(name="Jobs", lang="en", book=book)
+        book_file = BookFile(path="missing.pdf", file_type=".pdf", size=1, pub=pub)
+        session.add_all([book, pub, book_file])
+        await session.flush()
+        job = BookFileJob(book_file_id=book_file.id, run_after=utcnow())
+        session.add(job)
+        await session.commit()
+    return job.id
+
+
+async def load(id) -> BookFileJob:
+    async with SessionManager.scoped_session() as session:
+        return await session.scalar(select(BookFileJob).where(BookFileJob.id == id))
+
+
+@pytest.mark.asyncio
+async def test_job_retries_with_backoff(job_id):
+    queue = make_queue(fail)
+
+    assert await queue.run_next()
+    job = await load(job_id)
+    assert (job.status, job.attempts, job.error) == (
+        PENDING,
+        1,
+        "RuntimeError: no pages",
+    )
+    assert job.run_after > utcnow() + timedelta(seconds=50)
+    # Пауза ещё не прошла.
+    assert not await queue.run_next()
+
+    queue.backoff = 0
+    async with SessionManager.scoped_session() as session:
+        await session.execute(
+            update(BookFileJob)
+            .where(BookFileJob.id == job_id)
+            .values(run_after=utcnow())
+        )
+        await session.commit()
+    assert await queue.drain() == 1
+    job = await load(job_id)
+    assert (job.status, job.attempts) == (FAILED, 2)
+
+
+@pytest.mark.asyncio
+async def test_job_with_expired_lease_is_taken_again(job_id):
+    calls = []
+
+    async def record(queue, job):
+        calls.append(job.id)
+
+    # Так выглядит задача, чей процесс упал посреди работы.
+    async with SessionManager.scoped_session() as session:
+        await session.execute(
+            update(BookFileJob)
+            .where(BookFileJob.id == job_id)
+            .values(status=RUNNING, attempts=1, run_after=utcnow() - timedelta(1))
+        )
+        await session.commit()
+
+    assert await make_queue(record).drain() == 1
+    assert calls == [job_id]
+    assert (await load(job_id)).attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_handler_write_is_retried(job_id):
+    queue = make_queue(process_book_file)
+
+    async def inspect(func, path):
+        return FileInfo("application/pdf", 3, None, "")
+
+    queue.run_in_pool = inspect
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE book_file SET"):
+            raise OperationalError(statement, None, Exception("disk I/O error"))
+
+    engine = SessionManager._instance.async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        assert await queue.run_next()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    job = await load(job_id)
+    assert (job.status, job.attempts) == (PENDING, 1)
+    assert job.error.startswith("OperationalError")
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_are_pruned(job_id):
+    queue = make_queue(noop)
+    assert await queue.drain() == 1
+    assert await queue.prune() == 0
+    assert (await load(job_id)).status == DONE
+
+    async with SessionManager.scoped_session() as session:
+        await session.execute(
+            update(BookFileJob)
+            .where(BookFileJob.id == job_id)
+            .values(run_after=utcnow() - timedelta(hours=2))
+        )
+        await session.commit()
+    # Следующая чистка этой очереди не раньше чем через `retention / 100`.
+    assert await queue.prune() == 0
+    assert await make_queue(noop).prune() == 1
+    assert await load(job_id) is None
@@ -1,12 +1,15 @@
 import os
 import gzip
 import logging
+import queue
 import pytest
 from pathlib import Path
 from io import StringIO
 from core.logger import (
+    DroppingQueueHandler,
     ZipRotatingFileHandler,
     configure_logging,
+    stop_logging,
     BlacklistFilter,
 )
 
@@ -46,6 +49,35 @@ def test_zip_rotating_file_handler_rollover(zip_rotating_file_handler):
         assert log_message in backup_content
 
 
+def test_zip_rotating_file_handler_background(tmp_path):
+    log_file = tmp_path / "test.log"
+    handler = ZipRotatingFileHandler(
+        filename=log_file, maxBytes=10, backupCount=2, compress_in_background=True
+    )
+
+    for i in range(3):
+        handler.emit(logging.LogRecord("test", logging.DEBUG, "", 0, f"m{i}", [], None))
+        handler.doRollover()
+    handler.close()
+
+    assert not (tmp_path / "test.log.1").exists()
+    with gzip.open(f"{log_file}.1.gz", "rb") as f:
+        assert "m2" in f.read().decode("utf-8")
+    with gzip.open(f"{log_file}.2.gz", "rb") as f:
+        assert "m1" in f.read().decode("utf-8")
+
+
+def test_dropping_queue_handler():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    record = logging.LogRecord("test", logging.INFO, "", 0, "message", [], None)
+
+    handler.emit(record)
+    handler.emit(record)
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+
 @pytest.fixture
 def blacklist_filter():
     blacklist = {"blacklisted_logger"}
@@ -97,3 +129,39 @@ def test_file_logging(configure_logging_fixture):
 
     if os.path.exists(log_file):
         os.remove(log_file)
+
+
+def test_queue_logging():
+    log_file = Path("logs") / "message.log"
+    log_message = "Queued log message"
+
+    configure_logging(level=logging.DEBUG, queue_size=100)
+    try:
+        assert any(isinstance(h, DroppingQueueHandler) for h in logging.root.handlers)
+        logging.info(log_message)
+    finally:
+        stop_logging()
+
+    with open(log_file, "r", encoding="utf-8") as f:
+        assert log_message in f.read()
+    assert not any(isinstance(h, DroppingQueueHandler) for h in logging.root.handlers)
+
+    if os.path.exists(log_file):
+        os.remove(log_file)
+
+
+def test_per_process_file_logging():
+    log_file = Path("logs") / f"message.{os.getpid()}.log"
+    log_message = "Per-process log message"
+
+    configure_logging(level=logging.DEBUG, per_process=True)
+    try:
+        logging.info(log_message)
+    finally:
+        logging.root.handlers.clear()
+
+    with open(log_file, "r", encoding="utf-8") as f:
+        assert log_message in f.read()
+
+    if os.path.exists(log_file):
+        os.remove(log_file)
@@ -0,0 +1,141 @@
+import asyncio
+import os
+
+import orjson
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.metrics import (
+    MetricsRegistry,
+    flush_periodically,
+    instrument_engine,
+    merge,
+    metrics,
+    render,
+)
+
+
+def test_histogram_buckets(tmp_path):
+    registry = MetricsRegistry(tmp_path)
+    registry.observe("db_request_queries", 0, route="/a")
+    registry.observe("db_request_queries", 3, route="/a")
+    registry.observe("db_request_queries", 500, route="/a")
+
+    text = render(merge([registry.snapshot()]))
+
+    assert 'db_request_queries_bucket{route="/a",le="0"} 1' in text
+    assert 'db_request_queries_bucket{route="/a",le="3"} 2' in text
+    assert 'db_request_queries_bucket{route="/a",le="100"} 2' in text
+    assert 'db_request_queries_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'db_request_queries_count{route="/a"} 3' in text
+
+
+def test_snapshot_is_a_copy(tmp_path):
+    registry = MetricsRegistry(tmp_path)
+    registry.observe("db_request_queries", 1, route="/a")
+
+    snapshot = registry.snapshot()
+    registry.observe("db_request_queries", 1, route="/a")
+    registry.inc("db_queries_total")
+
+    assert snapshot["histograms"]["db_request_queries"][0][1][-1] == 1
+    assert "db_queries_total" not in snapshot["counters"]
+
+
+@pytest.mark.asyncio
+async def test_flush_survives_errors(tmp_path):
+    registry = MetricsRegistry(tmp_path)
+    calls = []
+
+    def write_snapshot(snapshot):
+        calls.append(snapshot)
+        if len(calls) == 1:
+            raise RuntimeError("dictionary changed size during iteration")
+
+    registry.write_snapshot = write_snapshot
+    task = asyncio.create_task(flush_periodically(registry, 0.001))
+    async with asyncio.timeout(5):
+        while len(calls) < 2:
+            await asyncio.sleep(0.001)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+def test_aggregate_workers(tmp_path):
+    registry = MetricsRegistry(tmp_path)
+    registry.inc("http_requests_total", method="GET", route="/a", status=200)
+    registry.observe("http_request_duration_seconds", 0.02, method="GET", route="/a")
+
+    other = {
+        "counters": {
+            "http_requests_total": [
+                [[["method", "GET"], ["route", "/a"], ["status", "200"]], 2]
+            ]
+        },
+        "histograms": {
+            "http_request_duration_seconds": [
+                [
+                    [["method", "GET"], ["route", "/a"]],
+                    [0] * 7 + [1] + [0] * 5 + [0.5, 1],
+                ]
+            ]
+        },
+        "gauges": {},
+    }
+    (tmp_path / f"{os.getpid() + 1}.json").write_bytes(orjson.dumps(other))
+
+    text = registry.collect()
+
+    assert 'http_requests_total{method="GET",route="/a",status="200"} 3' in text
+    labels = 'method="GET",route="/a"'
+    assert f"http_request_duration_seconds_count{{{labels}}} 2" in text
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+
+
+def test_skip_stale_snapshots(tmp_path):
+    registry = MetricsRegistry(tmp_path, stale_after=60)
+    stale = tmp_path / "1.json"
+    stale.write_bytes(
+        orjson.dumps({"counters": {"db_queries_total": [[[], 5]]}, "histograms": {}})
+    )
+    os.utime(stale, (0, 0))
+
+    assert "db_queries_total 5" not in registry.collect()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "folder", tmp_path)
+
+    await client.get("/V1/book/")
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_requests_total{method="GET",route="/V1/book/",status="200"}' in text
+    assert 'db_request_queries_count{route="/V1/book/"}' in text
+    assert "db_queries_total " in text
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_failed_queries_do_not_leak(tmp_path):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    registry = MetricsRegistry(tmp_path)
+    instrument_engine(engine.sync_engine, registry)
+
+    async with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM missing"))
+        await conn.execute(text("SELECT 1"))
+        raw = await conn.get_raw_connection()
+        assert raw.info["query_start"] == {}
+
+    assert registry.counters["db_queries_total"][()] == 1
+    await engine.dispose()
@@ -0,0 +1,60 @@
+import pytest
+
+from core.ratelimit import MemoryBackend, SQLiteBackend
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_limit_and_refill(clock):
+    backend = MemoryBackend(limit=3, period=3, clock=clock)
+
+    results = [await backend.hit("127.0.0.1") for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    assert results[-1].retry_after == 1
+
+    clock.now += 1
+    assert (await backend.hit("127.0.0.1")).allowed
+    assert not (await backend.hit("127.0.0.1")).allowed
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_is_bounded(clock):
+    backend = MemoryBackend(limit=5, period=60, max_keys=100, clock=clock)
+
+    for i in range(1_000):
+        await backend.hit(f"10.0.{i // 256}.{i % 256}")
+    assert len(backend) == 100
+
+    clock.now += 60
+    await backend.hit("127.0.0.1")
+    assert len(backend) == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_is_shared(tmp_path, clock):
+    path = tmp_path / "ratelimit.db"
+    workers = [
+        SQLiteBackend(limit=4, period=60, path=path, clock=clock) for _ in range(2)
+    ]
+
+    results = [await workers[i % 2].hit("127.0.0.1") for i in range(5)]
+    assert [r.allowed for r in results] == [True, True, True, True, False]
+
+    for worker in workers:
+        await worker.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_purges_expired_keys(tmp_path, clock):
+    backend = SQLiteBackend(
+        limit=5, period=60, path=tmp_path / "rl.db", purge_every=10, clock=clock
+    )
+
+    for i in range(9):
+        await backend.hit(f"10.0.0.{i}")
+    clock.now += 60
+    await backend.hit("127.0.0.1")
+
+    rows = backend._connect().execute("SELECT key FROM rate_limit").fetchall()
+    assert rows == [("127.0.0.1",)]
+    await backend.close()
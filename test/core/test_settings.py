@@ -12,6 +12,7 @@ def test_app_settings(monkeypatch):
     monkeypatch.setenv("LOGGER_BLACKLIST", "uvicorn,gunicorn")
     monkeypatch.setenv("DATABASE_DRIVERNAME", "sqlite+aiosqlite")
     monkeypatch.setenv("DATABASE_DATABASENAME", "memory.db")
+    monkeypatch.setenv("RATELIMIT_BACKEND", "sqlite")
 
     settings = AppSetting()
 
@@ -26,3 +27,23 @@ def test_app_settings(monkeypatch):
     assert settings.DATABASE.DRIVERNAME == "sqlite+aiosqlite"
     assert settings.DATABASE.DATABASENAME == "memory.db"
     assert str(settings.DATABASE.URL) == "sqlite+aiosqlite:///memory.db"
+    assert settings.RATELIMIT.BACKEND == "sqlite"
+    assert settings.RATELIMIT.LIMIT == 100
+
+
+def test_database_engine_options(monkeypatch):
+    monkeypatch.setenv("DATABASE_DRIVERNAME", "sqlite+aiosqlite")
+    monkeypatch.setenv("DATABASE_DATABASENAME", ":memory:")
+    monkeypatch.setenv("DATABASE_POOLSIZE", "20")
+    monkeypatch.setenv("DATABASE_BUSYTIMEOUT", "1000")
+
+    memory = AppSetting().DATABASE
+    assert "pool_size" not in memory.ENGINEOPTIONS
+    assert memory.PRAGMAS["busy_timeout"] == 1000
+    assert memory.PRAGMAS["foreign_keys"] == "ON"
+
+    monkeypatch.setenv("DATABASE_DATABASENAME", "library.db")
+    assert AppSetting().DATABASE.ENGINEOPTIONS["pool_size"] == 20
+
+    monkeypatch.setenv("DATABASE_DRIVERNAME", "postgresql+asyncpg")
+    assert AppSetting().DATABASE.PRAGMAS == {}
@@ -1,8 +1,12 @@
 import pytest
 from uuid import uuid4
 
+from database.mixin import uuid7
 from database.model import Book, PublishingHouse, BookFile
-from sqlalchemy.ext.asyncio import AsyncSession
+from database.session import set_sqlite_pragmas
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
 
 @pytest.mark.asyncio
@@ -102,3 +106,45 @@ async def test_cascade_delete(session: AsyncSession):
     assert book_check is None
     assert pub_check is None
     assert file_check is None
+
+
+@pytest.mark.asyncio
+async def test_foreign_keys_enforced(session: AsyncSession):
+    session.add(PublishingHouse(id=uuid4(), name="Ghost", lang="en", book_id=uuid4()))
+
+    with pytest.raises(IntegrityError):
+        await session.commit()
+    await session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pragma.db'}")
+    set_sqlite_pragmas(
+        engine.sync_engine,
+        {"journal_mode": "WAL", "busy_timeout": 1234, "foreign_keys": "ON"},
+    )
+
+    async with engine.connect() as conn:
+        assert await conn.scalar(text("PRAGMA journal_mode")) == "wal"
+        assert await conn.scalar(text("PRAGMA busy_timeout")) == 1234
+        assert await conn.scalar(text("PRAGMA foreign_keys")) == 1
+    await engine.dispose()
+
+
+def test_uuid7_is_time_ordered():
+    ids = [uuid7() for _ in range(10_000)]
+
+    assert ids == sorted(ids)
+    assert [i.hex for i in ids] == sorted(i.hex for i in ids)
+    assert len(set(ids)) == len(ids)
+    assert all(i.version == 7 and i.variant == "specified in RFC 4122" for i in ids)
+
+
+@pytest.mark.asyncio
+async def test_book_id_is_uuid7(session: AsyncSession):
+    book = Book(title="Dune", author="Herbert", desc="", page_count=412)
+    session.add(book)
+    await session.commit()
+
+    assert book.id.version == 7
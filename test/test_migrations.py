@@ -0,0 +1,175 @@
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+
+from database.model import CoreModel
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "library.db"
+    engine = create_engine(f"sqlite:///{path}")
+    CoreModel.metadata.create_all(engine)
+
+    config = Config(ROOT / "alembic.ini")
+    config.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{path}")
+    config.attributes["configure_logger"] = False
+    command.stamp(config, "head")
+
+    yield engine, config
+    engine.dispose()
+
+
+def indexes(engine) -> set[str]:
+    inspector = inspect(engine)
+    return {
+        index["name"]
+        for table in (
+            "book",
+            "publishing_house",
+            "book_file",
+            "book_file_job",
+            "book_file_upload",
+        )
+        if inspector.has_table(table)
+        for index in inspector.get_indexes(table)
+    }
+
+
+def test_filter_indexes_migration(database):
+    engine, config = database
+
+    command.downgrade(config, "base")
+    assert "ix_book_author_created_at_id" not in indexes(engine)
+
+    command.upgrade(config, "head")
+    declared = {
+        index.name
+        for table in CoreModel.metadata.tables.values()
+        for index in table.indexes
+    }
+    assert declared <= indexes(engine)
+
+
+def test_base_schema_has_no_later_columns(database):
+    engine, config = database
+
+    command.downgrade(config, "base")
+    columns = {column["name"] for column in inspect(engine).get_columns("book_file")}
+    # Так выглядел `book_file` до миграций: остальное добавляют ревизии.
+    assert columns == {
+        "id",
+        "created_at",
+        "updated_at",
+        "path",
+        "file_type",
+        "size",
+        "pub_id",
+    }
+
+    command.upgrade(config, "head")
+    columns = {column["name"] for column in inspect(engine).get_columns("book_file")}
+    assert columns == set(CoreModel.metadata.tables["book_file"].columns.keys())
+
+
+def test_drop_id_unique_migration(database):
+    engine, config = database
+    command.downgrade(config, "0001")
+    assert inspect(engine).get_unique_constraints("book")
+
+    book_id, pub_id = uuid4().hex, uuid4().hex
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO book (id, title, author, page_count, created_at, updated_at)"
+                " VALUES (:id, 'Dune', 'Herbert', 412, '2024-01-01', '2024-01-01')"
+            ),
+            {"id": book_id},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO publishing_house (id, name, lang, book_id, created_at,"
+                " updated_at) VALUES (:id, 'Ace', 'en', :book_id, '2024-01-01',"
+                " '2024-01-01')"
+            ),
+            {"id": pub_id, "book_id": book_id},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO book_file (id, path, file_type, size, pub_id, created_at,"
+                " updated_at) VALUES (:id, 'dune.pdf', '.pdf', 2048, :pub_id,"
+                " '2024-01-01', '2024-01-01')"
+            ),
+            {"id": uuid4().hex, "pub_id": pub_id},
+        )
+
+    command.upgrade(config, "head")
+
+    inspector = inspect(engine)
+    assert not any(
+        inspector.get_unique_constraints(table)
+        for table in ("book", "publishing_house", "book_file")
+    )
+    assert "ix_book_author_created_at_id" in indexes(engine)
+    assert inspector.get_foreign_keys("publishing_house")[0]["referred_table"] == "book"
+    with engine.connect() as conn:
+        summary = conn.execute(
+            text("SELECT pub_count, file_count FROM book_summary WHERE book_id = :id"),
+            {"id": book_id},
+        )
+        assert summary.one() == (1, 1)
+        versions = conn.execute(
+            text("SELECT name FROM collection_version ORDER BY name")
+        )
+        assert versions.scalars().all() == ["book", "book_file", "publishing_house"]
+        jobs = conn.execute(text("SELECT status FROM book_file_job"))
+        assert jobs.scalars().all() == ["pending"]
+        found = conn.execute(
+            text(
+                "SELECT book_id FROM book_search_key"
+                " JOIN book_search ON book_search.rowid = book_search_key.id"
+                " WHERE book_search MATCH 'ace'"
+            )
+        )
+        assert found.scalars().all() == [book_id]
+
+
+def test_book_search_key_migration(database):
+    engine, config = database
+    command.downgrade(config, "0005")
+
+    book_id = uuid4().hex
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO book (id, title, author, page_count, created_at, updated_at)"
+                " VALUES (:id, 'Solaris', 'Lem', 204, '2024-01-01', '2024-01-01')"
+            ),
+            {"id": book_id},
+        )
+        found = conn.execute(
+            text(
+                "SELECT book.id FROM book_search JOIN book"
+                " ON book.rowid = book_search.rowid WHERE book_search MATCH 'solaris'"
+            )
+        )
+        assert found.scalars().all() == [book_id]
+
+    command.upgrade(config, "head")
+    with engine.begin() as conn:
+        # Так выглядит пересоздание таблицы: rowid книги сменился.
+        conn.execute(text("UPDATE book SET rowid = rowid + 1000"))
+        found = conn.execute(
+            text(
+                "SELECT book_id FROM book_search_key"
+                " JOIN book_search ON book_search.rowid = book_search_key.id"
+                " WHERE book_search MATCH 'solaris'"
+            )
+        )
+        assert found.scalars().all() == [book_id]
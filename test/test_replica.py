@@ -0,0 +1,98 @@
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from fastapi import status
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.context import CLIENT_COOKIE
+from database.replica import ReplicaSet
+from database.session import SessionManager
+
+
+@pytest_asyncio.fixture
+async def engines(tmp_path):
+    engines = [
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica1.db'}"),
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica2.db'}"),
+    ]
+    yield engines
+    for engine in engines:
+        await engine.dispose()
+
+
+def test_round_robin(engines):
+    replicas = ReplicaSet(engines)
+    first, second = replicas.replicas
+
+    assert [replicas.choose() for _ in range(4)] == [first, second, first, second]
+
+
+def test_least_busy(engines):
+    replicas = ReplicaSet(engines, strategy="leastbusy")
+    first, second = replicas.replicas
+    first.in_flight = 3
+
+    assert replicas.choose() is second
+
+
+def test_sticky_after_write(engines, clock):
+    replicas = ReplicaSet(engines, sticky_seconds=5, clock=clock)
+
+    replicas.mark_write("10.0.0.1")
+    assert replicas.choose("10.0.0.1") is None
+    assert replicas.choose("10.0.0.2") is not None
+
+    clock.now += 5
+    assert replicas.choose("10.0.0.1") is not None
+
+
+@pytest.mark.asyncio
+async def test_health_check(engines):
+    down = create_async_engine("sqlite+aiosqlite:////nonexistent/dir/replica.db")
+    replicas = ReplicaSet([down, *engines])
+
+    await replicas.check()
+
+    assert [replica.healthy for replica in replicas.replicas] == [False, True, True]
+    assert all(replicas.choose().engine is not down for _ in range(4))
+
+    for replica in replicas.replicas:
+        replica.healthy = False
+    assert replicas.choose() is None
+    await down.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sticky_reads_follow_client_cookie(client, engines, clock, monkeypatch):
+    # Реплика пустая: чтение с неё не найдёт таблиц.
+    replicas = ReplicaSet(engines[:1], sticky_seconds=5, clock=clock)
+    monkeypatch.setattr(SessionManager._instance, "replicas", replicas)
+    client.cookies.clear()
+    book_id = None
+    try:
+        response = await client.get(f"/V1/book-file/{uuid4()}/status")
+        assert CLIENT_COOKIE not in response.cookies
+
+        response = await client.post(
+            "/V1/book/",
+            json={"title": "Sticky", "author": "Sticky", "desc": "", "page_count": 1},
+        )
+        book_id = response.json()["id"]
+        token = response.cookies[CLIENT_COOKIE]
+        assert replicas.is_sticky(token)
+        assert not replicas.is_sticky("127.0.0.1")
+
+        response = await client.get(f"/V1/book/{book_id}", params={"expand": ""})
+        assert response.status_code == status.HTTP_200_OK
+
+        client.cookies.clear()
+        # Полный ответ уходит в кэш и потому читается с primary.
+        response = await client.get(f"/V1/book/{book_id}")
+        assert response.status_code == status.HTTP_200_OK
+        response = await client.get(f"/V1/book/{book_id}", params={"expand": ""})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    finally:
+        client.cookies.clear()
+        if book_id:
+            await client.delete(f"/V1/book/{book_id}")
@@ -0,0 +1,66 @@
+import asyncio
+import fcntl
+import hashlib
+import io
+import os
+from uuid import uuid4
+
+import pytest
+
+from utils.file import FileManager
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(FileManager, "STORAGE_FOLDER", tmp_path)
+    monkeypatch.setattr(FileManager, "CHUNK_SIZE", 7)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_reading_is_content_addressed(storage):
+    content = b"%PDF-1.7 some book content" * 10
+
+    stored = await FileManager.reading("Book.PDF", io.BytesIO(content))
+
+    assert stored.size == len(content)
+    assert stored.sha256 == hashlib.sha256(content).hexdigest()
+    assert stored.path == FileManager.content_path(stored.sha256, ".pdf")
+    assert stored.path.read_bytes() == content
+    assert list((storage / "tmp").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_reading_deduplicates(storage):
+    first = await FileManager.reading("a.epub", io.BytesIO(b"same"))
+    second = await FileManager.reading("b.epub", io.BytesIO(b"same"))
+    other = await FileManager.reading("c.epub", io.BytesIO(b"other"))
+
+    assert first.path == second.path
+    assert other.path != first.path
+    assert len(list(storage.rglob("*.epub"))) == 2
+
+
+@pytest.mark.asyncio
+async def test_writing_streams_stored_file(storage):
+    stored = await FileManager.reading("a.txt", io.BytesIO(b"0123456789"))
+
+    chunks = [chunk async for chunk in FileManager.writing(stored.path)]
+    assert chunks == [b"0123456", b"789"]
+
+
+@pytest.mark.asyncio
+async def test_write_part_does_not_touch_committed_file(storage):
+    upload_id = uuid4()
+    await FileManager.create_part(upload_id, 4)
+    path = FileManager.part_path(upload_id)
+
+    # Часть открыла файл, а `commit_part` успел взять блокировку первым.
+    with open(path, "rb") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        write = asyncio.create_task(FileManager.write_part(upload_id, 0, b"late"))
+        await asyncio.sleep(0.1)
+        os.replace(path, storage / "stored")
+    with pytest.raises(FileNotFoundError):
+        await write
+    assert (storage / "stored").read_bytes() == b"\0" * 4